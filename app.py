@@ -2,6 +2,7 @@ import streamlit as st
 from streamlit_creators import show_creators
 from streamlit_posts import show_posts
 from streamlit_hashtags import show_hashtags
+from streamlit_trends import show_trends
 
 # === Page configuration ===
 st.set_page_config(
@@ -49,12 +50,13 @@ st.markdown(
 st.image("image/tiktok.png", width=80)
 st.title("TikTok Trending Dashboard")
 
-# === Tabs ===
-tab1, tab2, tab3 = st.tabs(["Creators", "Posts", "Hashtags"])
-
-with tab1:
-    show_creators()
-with tab2:
-    show_posts()
-with tab3:
-    show_hashtags()
+# === Views ===
+# Only the selected view runs; st.tabs would compute all of them on every rerun
+VIEWS = {
+    "Creators": show_creators,
+    "Posts": show_posts,
+    "Hashtags": show_hashtags,
+    "Trends": show_trends,
+}
+view = st.radio("View", list(VIEWS), horizontal=True, key="view", label_visibility="collapsed")
+VIEWS[view]()
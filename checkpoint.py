@@ -0,0 +1,90 @@
+import json
+import sqlite3
+from datetime import datetime
+
+from partitions import bookkeeping_rows
+
+# === Crawl Runs ===
+def start_run(db_path, run_id, crawl_date, crawl_time, regions, page_sizes):
+    """
+    Register a new crawl run (status 'running' until finish_run is called)
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO crawl_runs (run_id, crawl_date, crawl_time, regions, page_sizes, status, started_at) "
+        "VALUES (?, ?, ?, ?, ?, 'running', ?)",
+        (run_id, crawl_date, crawl_time, json.dumps(list(regions)), json.dumps(page_sizes),
+         datetime.now().isoformat(timespec="seconds"))
+    )
+    conn.commit()
+    conn.close()
+
+
+def finish_run(db_path, run_id, status):
+    """
+    Mark a run 'completed' (every unit done) or 'partial' (some units failed)
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "UPDATE crawl_runs SET status = ?, finished_at = ? WHERE run_id = ?",
+        (status, datetime.now().isoformat(timespec="seconds"), run_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_run(db_path, run_id=None):
+    """
+    Return a run as a dict; without run_id, the latest run that did not complete.
+    Returns None when there is nothing to resume.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    if run_id:
+        row = conn.execute("SELECT * FROM crawl_runs WHERE run_id = ?", (run_id,)).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT * FROM crawl_runs WHERE status != 'completed' ORDER BY started_at DESC LIMIT 1"
+        ).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    run = dict(row)
+    run["regions"] = json.loads(run["regions"])
+    run["page_sizes"] = json.loads(run["page_sizes"])
+    return run
+
+
+# === Checkpoints ===
+def load_completed(db_path, run_id):
+    """
+    Units already saved for a run: {(endpoint, region, vertical, page_num): is_last}
+    Failed units are left out so they are fetched again. In partitioned mode
+    the checkpoints are in the partition that holds the pages' rows.
+    """
+    rows = bookkeeping_rows(
+        db_path, "crawl_checkpoints",
+        "SELECT endpoint, region, vertical, page_num, is_last FROM crawl_checkpoints "
+        "WHERE run_id = ? AND status = 'done'",
+        (run_id,)
+    )
+    return {
+(endpoint, region, vertical, page_num): bool(is_last)
+            for endpoint, region, vertical, page_num, is_last in rows}
+
+
+def insert_checkpoints(conn, run_id, units):
+    """
+    Record units as (endpoint, region, vertical, page_num, status, row_count, is_last)
+    on an open connection, e.g. inside the transaction that saved their rows.
+    A later 'done' overwrites an earlier 'failed' for the same unit.
+    """
+    if not units:
+        return
+    updated_at = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        "INSERT OR REPLACE INTO crawl_checkpoints "
+        "(run_id, endpoint, region, vertical, page_num, status, row_count, is_last, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(run_id, *unit[:6], int(unit[6]), updated_at) for unit in units]
+    )
@@ -0,0 +1,291 @@
+import os
+import time
+import argparse
+from datetime import date, timedelta
+
+import pandas as pd
+
+from create_tiktok_db import (
+    init_db, SNAPSHOT_TABLES, VERSION_TABLES, ENTITY_IDS, VIEW_SELECT, VIEW_FROM, LATEST_TABLES, ROLLUP_TABLES,
+)
+from db_writer import SQLiteWriter
+from rollups import refresh_rollups
+from parquet_archive import write_partitions
+from partitions import data_files
+
+# === Retention ===
+# Snapshots older than DOWNSAMPLE_DAYS are reduced to one per entity per day;
+# data older than ARCHIVE_DAYS leaves the live database for an archive (a
+# SQLite file with the same schema, or the Parquet dataset). Both ages count
+# back from today, in whole crawl days.
+DOWNSAMPLE_DAYS = 30
+ARCHIVE_DAYS = 365
+
+archive_db_path = "database/tiktokdb_archive.db"
+
+# Rows sampled per index by ANALYZE (keeps it fast on a large database)
+ANALYSIS_LIMIT = 1000
+
+# Per-crawl tables: entity key within a day, and the cumulative counters that
+# keep the day's maximum in the one snapshot left per day (the rest keep the
+# last crawl's values)
+DOWNSAMPLE_KEYS = {
+    "post_snapshots": ["item_id", "region"],
+    "hashtag_snapshots": ["hashtag_id", "region"],
+    "creator_snapshots": ["user_id", "region", "video_type"],
+}
+DAY_MAX_COLUMNS = {
+    "post_snapshots": ["like_count", "play_count"],
+    "hashtag_snapshots": ["video_views", "publish_count"],
+    "creator_snapshots": [],
+}
+
+# A creator snapshot stays while a creator video row points at it (the
+# creators views join on it)
+KEEP_REFERENCED = {
+    "creator_snapshots": "NOT EXISTS (SELECT 1 FROM creator_videos AS v WHERE v.user_id = creator_snapshots.user_id "
+                         "AND v.region = creator_snapshots.region AND v.video_type = creator_snapshots.video_type "
+                         "AND v.crawl_ts = creator_snapshots.crawl_ts)",
+}
+
+
+def day_start_ts(day):
+    """
+    crawl_ts of 00:00 on a date (crawl_ts counts local wall-clock seconds)
+    """
+    return (day - date(1970, 1, 1)).days * 86400
+
+
+def prune_versions(conn):
+    """
+    Delete versions no stored snapshot reads any more (every crawl between
+    them and the entity's next version was downsampled or archived)
+    """
+    for table, versions in VERSION_TABLES.items():
+        snapshots, entity = SNAPSHOT_TABLES[table], ENTITY_IDS[table]
+        conn.execute(f"""
+            DELETE FROM {versions} WHERE ({entity}, region, crawl_ts) IN (
+                SELECT {entity}, region, crawl_ts FROM (
+                    SELECT {entity}, region, crawl_ts, LEAD(crawl_ts) OVER (
+                        PARTITION BY {entity}, region ORDER BY crawl_ts) AS next_ts
+                    FROM {versions}) AS v
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {snapshots} AS s
+                    WHERE s.{entity} = v.{entity} AND s.region = v.region AND s.crawl_ts >= v.crawl_ts
+                      AND (v.next_ts IS NULL OR s.crawl_ts < v.next_ts)))""")
+    # Creator profiles are read by the creator videos
+    conn.execute("""
+        DELETE FROM creator_profile_versions WHERE (user_id, crawl_ts) IN (
+            SELECT user_id, crawl_ts FROM (
+                SELECT user_id, crawl_ts, LEAD(crawl_ts) OVER (PARTITION BY user_id ORDER BY crawl_ts) AS next_ts
+                FROM creator_profile_versions) AS v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM creator_videos AS c
+                WHERE c.user_id = v.user_id AND c.crawl_ts >= v.crawl_ts
+                  AND (v.next_ts IS NULL OR c.crawl_ts < v.next_ts)))""")
+
+
+# === Downsampling ===
+def downsample(conn, cutoff_ts):
+    """
+    Keep one snapshot per entity per day before cutoff_ts: the day's last
+    crawl, with its cumulative counters raised to the day's maximum.
+    Returns the crawl dates that changed (their latest tables and rollups
+    need a refresh).
+    """
+    dates = set()
+    for table, keys in DOWNSAMPLE_KEYS.items():
+        same_entity = " AND ".join(f"later.{key} = {table}.{key}" for key in keys)
+        later_same_day = (f"SELECT 1 FROM {table} AS later WHERE {same_entity} "
+                          f"AND later.crawl_ts > {table}.crawl_ts "
+                          f"AND later.crawl_ts < ({table}.crawl_ts / 86400 + 1) * 86400")
+        dates.update(row[0] for row in conn.execute(
+            f"SELECT DISTINCT date(crawl_ts, 'unixepoch') FROM {table} "
+            f"WHERE crawl_ts < ? AND EXISTS ({later_same_day})", (cutoff_ts,)))
+
+        counters = DAY_MAX_COLUMNS[table]
+        if counters:
+            conn.execute(f"""
+                UPDATE {table} SET {', '.join(f'{column} = day.{column}' for column in counters)}
+                FROM (
+                    SELECT {', '.join(keys)}, MAX(crawl_ts) AS crawl_ts,
+                           {', '.join(f'MAX({column}) AS {column}' for column in counters)}
+                    FROM {table} WHERE crawl_ts < ?
+                    GROUP BY {', '.join(keys)}, crawl_ts / 86400 HAVING COUNT(*) > 1) AS day
+                WHERE {' AND '.join(f'{table}.{key} = day.{key}' for key in keys + ['crawl_ts'])}""",
+                (cutoff_ts,))
+
+        keep = f" AND {KEEP_REFERENCED[table]}" if table in KEEP_REFERENCED else ""
+        conn.execute(f"DELETE FROM {table} WHERE crawl_ts < ? AND EXISTS ({later_same_day}){keep}", (cutoff_ts,))
+    prune_versions(conn)
+    refresh_rollups(conn, dates)
+    return dates
+
+
+# === Archiving ===
+def day_tables():
+    """
+    Derived tables keyed by crawl_date (latest snapshots and rollups)
+    """
+    return list(LATEST_TABLES) + list(ROLLUP_TABLES)
+
+
+def copy_to_archive(conn, cutoff_ts, cutoff_date):
+    """
+    Copy everything before the cutoff into the attached `archive` database.
+    Creator rows still read by newer days are copied too but stay live, so
+    the archive's own views are complete.
+    """
+    for table, snapshots in SNAPSHOT_TABLES.items():
+        for storage in (snapshots, VERSION_TABLES[table]):
+            conn.execute(f"INSERT OR IGNORE INTO archive.{storage} SELECT * FROM main.{storage} WHERE crawl_ts < ?",
+                         (cutoff_ts,))
+    for storage in ("creator_videos", "creator_snapshots"):
+        conn.execute(f"INSERT OR IGNORE INTO archive.{storage} SELECT * FROM main.{storage} WHERE crawl_ts < ?",
+                     (cutoff_ts,))
+    conn.execute("INSERT OR IGNORE INTO archive.creator_profile_versions SELECT * FROM main.creator_profile_versions "
+                 "WHERE crawl_ts < ?", (cutoff_ts,))
+    for table in day_tables():
+        conn.execute(f"INSERT OR REPLACE INTO archive.{table} SELECT * FROM main.{table} WHERE crawl_date < ?",
+                     (cutoff_date,))
+
+
+# Creator video rows the kept latest days still read (first sightings can be
+# old); {table} is the outer creator_videos / creators row
+LIVE_CREATOR_VIDEOS = ("EXISTS (SELECT 1 FROM creator_latest_videos AS l WHERE l.crawl_date >= ? "
+                       "AND l.user_id = {table}.user_id AND l.video_item_id = {table}.video_item_id "
+                       "AND l.region = {table}.region)")
+
+
+def export_parquet(conn, cutoff_ts, cutoff_date, out_dir):
+    """
+    Write the raw rows about to be archived to the Parquet dataset, as the
+    flat posts / creators / hashtags rows. Files are tagged with the cutoff
+    date: a run that is retried replaces its own files, later runs add new ones.
+    """
+    tag = f"-archived{cutoff_date.replace('-', '')}"
+    frames = {
+        table: pd.read_sql(f"SELECT {VIEW_SELECT[table]} FROM {VIEW_FROM[table]} WHERE s.crawl_ts < ?",
+                           conn, params=(cutoff_ts,))
+        for table in SNAPSHOT_TABLES
+    }
+    frames["creators"] = pd.read_sql(f"SELECT * FROM creators WHERE crawl_date < ? "
+                                     f"AND NOT {LIVE_CREATOR_VIDEOS.format(table='creators')}",
+                                     conn, params=(cutoff_date, cutoff_date))
+    return {table: write_partitions(df, table, out_dir, tag) for table, df in frames.items() if not df.empty}
+
+
+def delete_archived(conn, cutoff_ts, cutoff_date):
+    """
+    Remove everything before the cutoff from the live database, except the
+    creator rows newer days still read
+    """
+    for snapshots in SNAPSHOT_TABLES.values():
+        conn.execute(f"DELETE FROM {snapshots} WHERE crawl_ts < ?", (cutoff_ts,))
+    conn.execute(f"DELETE FROM creator_videos WHERE crawl_ts < ? "
+                 f"AND NOT {LIVE_CREATOR_VIDEOS.format(table='creator_videos')}",
+                 (cutoff_ts, cutoff_date))
+    conn.execute(f"DELETE FROM creator_snapshots WHERE crawl_ts < ? AND {KEEP_REFERENCED['creator_snapshots']}",
+                 (cutoff_ts,))
+    for table in day_tables():
+        conn.execute(f"DELETE FROM {table} WHERE crawl_date < ?", (cutoff_date,))
+    prune_versions(conn)
+
+
+# === Space / statistics ===
+def reclaim_space(conn, pages=None):
+    """
+    Return free pages to the OS and refresh the planner statistics.
+    Databases created before auto_vacuum=INCREMENTAL get one full VACUUM to
+    switch; after that each run only frees pages (`pages` at most).
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        print("Switching to auto_vacuum=INCREMENTAL (one-time full VACUUM)")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion (execute frees one page)
+        conn.executescript(f"PRAGMA incremental_vacuum({pages or 0});")
+        print(f"Freed {free - conn.execute('PRAGMA freelist_count').fetchone()[0]} of {free} free pages")
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+
+
+def compact(db_path, downsample_days=DOWNSAMPLE_DAYS, archive_days=ARCHIVE_DAYS, archive_db=archive_db_path,
+            parquet=None, vacuum_pages=None, today=None):
+    """
+    Downsample, archive (to `archive_db`, or to the Parquet dataset `parquet`
+    when given), then reclaim space. A step is skipped when its days is None.
+    """
+    today = today or date.today()
+    init_db(db_path)
+    size_before = os.path.getsize(db_path)
+    writer = SQLiteWriter(db_path)
+    try:
+        conn = writer.conn
+        if downsample_days is not None:
+            start = time.perf_counter()
+            before = conn.total_changes
+            with writer.transaction():
+                dates = downsample(conn, day_start_ts(today - timedelta(days=downsample_days)))
+            print(f"Downsampled {len(dates)} days older than {downsample_days} days "
+                  f"({conn.total_changes - before} rows changed, {time.perf_counter() - start:.1f}s)")
+
+        if archive_days is not None:
+            start = time.perf_counter()
+            cutoff_day = today - timedelta(days=archive_days)
+            cutoff_ts, cutoff_date = day_start_ts(cutoff_day), cutoff_day.isoformat()
+            if parquet:
+                with writer.transaction():
+                    written = export_parquet(conn, cutoff_ts, cutoff_date, parquet)
+                    delete_archived(conn, cutoff_ts, cutoff_date)
+                target = parquet
+            else:
+                init_db(archive_db)
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_db,))
+                try:
+                    with writer.transaction():
+                        before = conn.total_changes
+                        copy_to_archive(conn, cutoff_ts, cutoff_date)
+                        written = {"rows": conn.total_changes - before}
+                        delete_archived(conn, cutoff_ts, cutoff_date)
+                finally:
+                    conn.execute("DETACH DATABASE archive")
+                target = archive_db
+            print(f"Archived data before {cutoff_date} to {target}: "
+                  + (", ".join(f"{n} {t}" for t, n in written.items()) or "nothing to move")
+                  + f" ({time.perf_counter() - start:.1f}s)")
+
+        reclaim_space(conn, vacuum_pages)
+    finally:
+        writer.close()
+    print(f"Database size: {size_before / 1e6:.1f} MB -> {os.path.getsize(db_path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Downsample, archive and vacuum old crawl data")
+    parser.add_argument("--db", default="database/tiktokdb.db", help="SQLite database path")
+    parser.add_argument("--downsample-days", type=int, default=DOWNSAMPLE_DAYS,
+                        help="keep one snapshot per entity per day for data older than this")
+    parser.add_argument("--archive-days", type=int, default=ARCHIVE_DAYS,
+                        help="move data older than this out of the live database")
+    parser.add_argument("--archive-db", default=archive_db_path, help="SQLite archive database")
+    parser.add_argument("--parquet", help="archive to this Parquet dataset directory instead of --archive-db")
+    parser.add_argument("--no-downsample", action="store_true", help="skip downsampling")
+    parser.add_argument("--no-archive", action="store_true", help="skip archiving")
+    parser.add_argument("--vacuum-pages", type=int, default=None,
+                        help="free at most this many pages per run (default: all free pages)")
+    args = parser.parse_args()
+
+    # Partitioned mode: every writable month partition (frozen ones are skipped)
+    for path in data_files(args.db):
+        print(f"=== {path} ===")
+        compact(
+            path,
+            downsample_days=None if args.no_downsample else args.downsample_days,
+            archive_days=None if args.no_archive else args.archive_days,
+            archive_db=args.archive_db,
+            parquet=args.parquet,
+            vacuum_pages=args.vacuum_pages,
+        )
@@ -1,20 +1,26 @@
 import sqlite3
 import os
+import argparse
 
 # Database path
 db_path = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\database\tiktokdb.db"
 
-# Ensure folder exists
-os.makedirs(os.path.dirname(db_path), exist_ok=True)
+# Schema version stored in PRAGMA user_version; bump it when adding a migration
+SCHEMA_VERSION = 11
 
-# Connect to SQLite (will create file if not exists)
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# PRAGMA application_id of a month partition (partitions.py): crawled data
+# only, no bookkeeping tables ("TTMP")
+PARTITION_APPLICATION_ID = 0x54544D50
 
-# === Create tables ===
-# Creators table: Primary key = (user_id, video_item_id) → ensure each user's video is unique
-# If the same user_id + video_item_id is inserted again, SQLite will ignore (no overwrite)
-cursor.execute("""
+# === Table definitions ===
+# The flat creators / hashtags / posts tables below are the layout up to v7 / v8
+# and are only used by the older migrations: v8 splits creators into the
+# creator_* tables, v9 moves posts / hashtags into full-row *_snapshots tables
+# with typed keys, v10 splits those into per-crawl metrics and versions.
+# Creators table up to v7 (one flat row per video, profile repeated on each)
+# Primary key = (user_id, video_item_id, region) → ensure each user's video is unique per region
+# If the same user_id + video_item_id + region is inserted again, SQLite will ignore (no overwrite)
+CREATE_CREATORS = """
 CREATE TABLE IF NOT EXISTS creators (
     nickname TEXT,
     uniqueId TEXT,
@@ -30,15 +36,16 @@ CREATE TABLE IF NOT EXISTS creators (
     video_play_count INTEGER,
     video_like_count INTEGER,
     video_rank INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
     crawl_date TEXT,
     crawl_time TEXT,
-    PRIMARY KEY (user_id, video_item_id)
+    PRIMARY KEY (user_id, video_item_id, region)
 )
-""")
+"""
 
-# Hashtags table: Primary key = (hashtag_id, crawl_date, crawl_time)
+# Hashtags table: Primary key = (hashtag_id, region, crawl_date, crawl_time)
 # Allow multiple historical versions of the same hashtag for trend analysis
-cursor.execute("""
+CREATE_HASHTAGS = """
 CREATE TABLE IF NOT EXISTS hashtags (
     hashtag_id TEXT,
     hashtag_name TEXT,
@@ -47,15 +54,16 @@ CREATE TABLE IF NOT EXISTS hashtags (
     video_views INTEGER,
     publish_count INTEGER,
     industry_value REAL,
+    region TEXT NOT NULL DEFAULT 'MY',
     crawl_date TEXT,
     crawl_time TEXT,
-    PRIMARY KEY (hashtag_id, crawl_date, crawl_time)
+    PRIMARY KEY (hashtag_id, region, crawl_date, crawl_time)
 )
-""")
+"""
 
-# Posts table: Primary key = (item_id, crawl_date, crawl_time)
+# Posts table: Primary key = (item_id, region, crawl_date, crawl_time)
 # Allow multiple historical versions of the same post for tracking changes over time
-cursor.execute("""
+CREATE_POSTS = """
 CREATE TABLE IF NOT EXISTS posts (
     url TEXT,
     nickname TEXT,
@@ -65,12 +73,967 @@ CREATE TABLE IF NOT EXISTS posts (
     genre TEXT,
     like_count INTEGER,
     play_count INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
     crawl_date TEXT,
     crawl_time TEXT,
-    PRIMARY KEY (item_id, crawl_date, crawl_time)
+    PRIMARY KEY (item_id, region, crawl_date, crawl_time)
 )
-""")
+"""
 
-conn.commit()
-conn.close()
-print("Database and tables created successfully.")
+# Full-row posts / hashtags storage of v9 (every column on every crawl)
+CREATE_POST_SNAPSHOTS_V9 = """
+CREATE TABLE IF NOT EXISTS post_snapshots (
+    url TEXT,
+    nickname TEXT,
+    user_id INTEGER,
+    item_id INTEGER,
+    item_name TEXT,
+    genre TEXT,
+    like_count INTEGER,
+    play_count INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    PRIMARY KEY (item_id, crawl_ts, region)
+)
+"""
+
+CREATE_HASHTAG_SNAPSHOTS_V9 = """
+CREATE TABLE IF NOT EXISTS hashtag_snapshots (
+    hashtag_id INTEGER,
+    hashtag_name TEXT,
+    country TEXT,
+    rank INTEGER,
+    video_views INTEGER,
+    publish_count INTEGER,
+    industry_value TEXT,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    PRIMARY KEY (hashtag_id, crawl_ts, region)
+)
+"""
+
+# === Snapshot storage ===
+# Crawled rows are stored with INTEGER ids and one INTEGER crawl_ts: seconds
+# since 1970-01-01 of the crawl's local wall-clock time (the clock crawl_date /
+# crawl_time are written in), so date(crawl_ts, 'unixepoch') is the crawl_date.
+# posts, hashtags and creators are views with the old TEXT columns on top.
+CRAWL_DATE_TIME = "date({ts}, 'unixepoch') AS crawl_date, time({ts}, 'unixepoch') AS crawl_time"
+CRAWL_TS = "CAST(strftime('%s', {date} || ' ' || COALESCE({time}, '00:00:00')) AS INTEGER)"
+
+# Posts / hashtags are stored as deltas: every crawl adds only the entity's
+# metrics to *_snapshots (history kept for trends), while the descriptive
+# columns go to *_versions once when the entity first appears and again only
+# when one of them changes. The views rebuild full rows from the version in
+# effect at each crawl.
+CREATE_POST_SNAPSHOTS = """
+CREATE TABLE IF NOT EXISTS post_snapshots (
+    item_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    like_count INTEGER,
+    play_count INTEGER,
+    PRIMARY KEY (item_id, crawl_ts, region)
+)
+"""
+
+CREATE_POST_VERSIONS = """
+CREATE TABLE IF NOT EXISTS post_versions (
+    item_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    url TEXT,
+    nickname TEXT,
+    user_id INTEGER,
+    item_name TEXT,
+    genre TEXT,
+    PRIMARY KEY (item_id, region, crawl_ts)
+) WITHOUT ROWID
+"""
+
+CREATE_HASHTAG_SNAPSHOTS = """
+CREATE TABLE IF NOT EXISTS hashtag_snapshots (
+    hashtag_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    rank INTEGER,
+    video_views INTEGER,
+    publish_count INTEGER,
+    PRIMARY KEY (hashtag_id, crawl_ts, region)
+)
+"""
+
+CREATE_HASHTAG_VERSIONS = """
+CREATE TABLE IF NOT EXISTS hashtag_versions (
+    hashtag_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    crawl_ts INTEGER,
+    hashtag_name TEXT,
+    country TEXT,
+    industry_value TEXT,
+    PRIMARY KEY (hashtag_id, region, crawl_ts)
+) WITHOUT ROWID
+"""
+
+# Creator profiles, versioned like post_versions / hashtag_versions: a row when
+# the creator first appears and again only when the profile changes. A profile
+# is the creator's, not a region's or a vertical's.
+CREATE_CREATOR_PROFILE_VERSIONS = """
+CREATE TABLE IF NOT EXISTS creator_profile_versions (
+    user_id INTEGER,
+    crawl_ts INTEGER,
+    nickname TEXT,
+    uniqueId TEXT,
+    bio TEXT,
+    profile_url TEXT,
+    PRIMARY KEY (user_id, crawl_ts)
+) WITHOUT ROWID
+"""
+
+# Per-crawl creator snapshot: followers and rank in one vertical's ranking
+CREATE_CREATOR_SNAPSHOTS = """
+CREATE TABLE IF NOT EXISTS creator_snapshots (
+    user_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    video_type TEXT,
+    crawl_ts INTEGER,
+    follower_count INTEGER,
+    creator_rank INTEGER,
+    PRIMARY KEY (user_id, region, video_type, crawl_ts)
+)
+"""
+
+# Creator-video facts: same key as the old creators table, so a video is kept
+# once per region (first crawl it appeared in)
+CREATE_CREATOR_VIDEOS = """
+CREATE TABLE IF NOT EXISTS creator_videos (
+    user_id INTEGER,
+    video_item_id INTEGER,
+    region TEXT NOT NULL DEFAULT 'MY',
+    video_type TEXT,
+    video_name TEXT,
+    video_url TEXT,
+    video_play_count INTEGER,
+    video_like_count INTEGER,
+    video_rank INTEGER,
+    crawl_ts INTEGER,
+    PRIMARY KEY (user_id, video_item_id, region)
+)
+"""
+
+# === Compatibility views ===
+# The old flat rows (same columns and order) over the storage tables, so
+# readers, rollups and the CSV / crawler writers keep using posts / hashtags /
+# creators. INSTEAD OF INSERT triggers convert the written values; an id that
+# is not a 64-bit integer aborts the statement instead of being stored as text.
+# View columns (the old table layout) of the delta-stored tables, their entity
+# id, the columns kept in *_versions and the ids checked on insert
+SNAPSHOT_COLUMNS = {
+    "posts": ["url", "nickname", "user_id", "item_id", "item_name", "genre", "like_count", "play_count", "region"],
+    "hashtags": ["hashtag_id", "hashtag_name", "country", "rank", "video_views", "publish_count",
+                 "industry_value", "region"],
+}
+SNAPSHOT_TABLES = {"posts": "post_snapshots", "hashtags": "hashtag_snapshots"}
+VERSION_TABLES = {"posts": "post_versions", "hashtags": "hashtag_versions"}
+ENTITY_IDS = {"posts": "item_id", "hashtags": "hashtag_id"}
+VERSION_COLUMNS = {
+    "posts": ["url", "nickname", "user_id", "item_name", "genre"],
+    "hashtags": ["hashtag_name", "country", "industry_value"],
+}
+INTEGER_IDS = {"posts": ["item_id", "user_id"], "hashtags": ["hashtag_id"]}
+
+INTEGER_ID_CHECK = """
+    SELECT RAISE(ABORT, '{column} must be an integer id')
+    WHERE NEW.{column} IS NOT NULL
+      AND CAST(CAST(NEW.{column} AS INTEGER) AS TEXT) IS NOT CAST(NEW.{column} AS TEXT);"""
+
+
+def version_ts_sql(table, entity, region, crawl_ts, compare="<="):
+    """
+    crawl_ts of the version of an entity in effect at (compare="<=") or
+    before (compare="<") a crawl
+    """
+    return (f"SELECT MAX(crawl_ts) FROM {VERSION_TABLES[table]} WHERE {ENTITY_IDS[table]} = {entity} "
+            f"AND region = {region} AND crawl_ts {compare} {crawl_ts}")
+
+
+# SELECT list / FROM clause of the posts and hashtags views, also used by the
+# latest-table refresh (s = snapshot, v = version)
+VIEW_SELECT = {
+    table: ", ".join(f"{'v' if column in VERSION_COLUMNS[table] else 's'}.{column}" for column in columns)
+           + ", " + CRAWL_DATE_TIME.format(ts="s.crawl_ts")
+    for table, columns in SNAPSHOT_COLUMNS.items()
+}
+VIEW_FROM = {
+    table: f"{SNAPSHOT_TABLES[table]} AS s JOIN {VERSION_TABLES[table]} AS v "
+           f"ON v.{ENTITY_IDS[table]} = s.{ENTITY_IDS[table]} AND v.region = s.region "
+           f"AND v.crawl_ts = ({version_ts_sql(table, 's.' + ENTITY_IDS[table], 's.region', 's.crawl_ts')})"
+    for table in SNAPSHOT_COLUMNS
+}
+
+
+def profile_ts_sql(user_id, crawl_ts, compare="<="):
+    """
+    crawl_ts of the creator profile version in effect at (compare="<=") or
+    before (compare="<") a crawl
+    """
+    return (f"SELECT MAX(crawl_ts) FROM creator_profile_versions WHERE user_id = {user_id} "
+            f"AND crawl_ts {compare} {crawl_ts}")
+
+
+def snapshot_view_sql(table):
+    return f"CREATE VIEW IF NOT EXISTS {table} AS\nSELECT {VIEW_SELECT[table]}\nFROM {VIEW_FROM[table]}\n"
+
+
+def snapshot_insert_trigger_sql(table):
+    """
+    INSTEAD OF INSERT trigger of posts / hashtags: the metrics row, then a new
+    version only if the entity is new or its descriptive columns changed.
+    Both version inserts run only when the metrics row was stored, so a
+    duplicate ignored by INSERT OR IGNORE writes nothing.
+    """
+    snapshots, versions, entity = SNAPSHOT_TABLES[table], VERSION_TABLES[table], ENTITY_IDS[table]
+    attributes = VERSION_COLUMNS[table]
+    metrics = [c for c in SNAPSHOT_COLUMNS[table] if c not in attributes and c not in (entity, "region")]
+    crawl_ts = CRAWL_TS.format(date="NEW.crawl_date", time="NEW.crawl_time")
+    region = "COALESCE(NEW.region, 'MY')"
+    checks = "".join(INTEGER_ID_CHECK.format(column=column) for column in INTEGER_IDS[table])
+    return f"""
+CREATE TRIGGER IF NOT EXISTS {table}_insert INSTEAD OF INSERT ON {table}
+BEGIN{checks}
+
+    INSERT INTO {snapshots} ({entity}, region, crawl_ts, {', '.join(metrics)})
+    VALUES (NEW.{entity}, {region}, {crawl_ts}, {', '.join('NEW.' + c for c in metrics)});
+
+    INSERT INTO {versions} ({entity}, region, crawl_ts, {', '.join(attributes)})
+    SELECT NEW.{entity}, {region}, {crawl_ts}, {', '.join('NEW.' + c for c in attributes)}
+    WHERE changes() = 1 AND NOT EXISTS (
+        SELECT 1 FROM {versions} AS v
+        WHERE v.{entity} = NEW.{entity} AND v.region = {region}
+          AND v.crawl_ts = ({version_ts_sql(table, 'NEW.' + entity, region, crawl_ts)})
+          AND {' AND '.join(f'v.{c} IS NEW.{c}' for c in attributes)});
+
+    -- A crawl older than stored ones (out-of-order load) that added a version:
+    -- the next later crawl keeps the version it was stored with
+    INSERT INTO {versions} ({entity}, region, crawl_ts, {', '.join(attributes)})
+    SELECT v.{entity}, v.region, later.crawl_ts, {', '.join('v.' + c for c in attributes)}
+    FROM {versions} AS v, (
+        SELECT MIN(crawl_ts) AS crawl_ts FROM {snapshots}
+        WHERE {entity} = NEW.{entity} AND region = {region} AND crawl_ts > {crawl_ts}) AS later
+    WHERE changes() = 1 AND later.crawl_ts IS NOT NULL
+      AND v.{entity} = NEW.{entity} AND v.region = {region}
+      AND v.crawl_ts = ({version_ts_sql(table, 'NEW.' + entity, region, crawl_ts, '<')})
+      AND NOT EXISTS (
+        SELECT 1 FROM {versions} WHERE {entity} = NEW.{entity} AND region = {region}
+          AND crawl_ts > {crawl_ts} AND crawl_ts <= later.crawl_ts);
+END
+"""
+
+
+CREATOR_PROFILE_COLUMNS = ["nickname", "uniqueId", "bio", "profile_url"]
+NEW_CRAWL_TS = CRAWL_TS.format(date="NEW.crawl_date", time="NEW.crawl_time")
+
+CREATE_CREATORS_VIEW = f"""
+CREATE VIEW IF NOT EXISTS creators AS
+SELECT creator_profile_versions.nickname, creator_profile_versions.uniqueId, creator_videos.user_id,
+       creator_snapshots.follower_count, creator_profile_versions.bio, creator_snapshots.creator_rank,
+       creator_videos.video_type, creator_videos.video_item_id, creator_videos.video_name,
+       creator_videos.video_url, creator_profile_versions.profile_url, creator_videos.video_play_count,
+       creator_videos.video_like_count, creator_videos.video_rank, creator_videos.region,
+       {CRAWL_DATE_TIME.format(ts="creator_videos.crawl_ts")}
+FROM creator_videos
+JOIN creator_snapshots USING (user_id, region, video_type, crawl_ts)
+JOIN creator_profile_versions ON creator_profile_versions.user_id = creator_videos.user_id
+    AND creator_profile_versions.crawl_ts = ({profile_ts_sql("creator_videos.user_id", "creator_videos.crawl_ts")})
+"""
+
+# Writes into the view are split across the three tables. The first row of a
+# creator in a crawl adds a profile version if the profile differs from the
+# one in effect then; the video row follows the INSERT's own conflict clause
+# (INSERT OR IGNORE keeps the first sighting, as before).
+CREATE_CREATORS_INSERT_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS creators_insert INSTEAD OF INSERT ON creators
+BEGIN{INTEGER_ID_CHECK.format(column="user_id")}{INTEGER_ID_CHECK.format(column="video_item_id")}
+
+    INSERT INTO creator_profile_versions (user_id, crawl_ts, {', '.join(CREATOR_PROFILE_COLUMNS)})
+    SELECT NEW.user_id, {NEW_CRAWL_TS}, {', '.join('NEW.' + c for c in CREATOR_PROFILE_COLUMNS)}
+    WHERE NOT EXISTS (
+        SELECT 1 FROM creator_snapshots WHERE user_id = NEW.user_id AND crawl_ts = {NEW_CRAWL_TS})
+      AND NOT EXISTS (
+        SELECT 1 FROM creator_profile_versions AS v
+        WHERE v.user_id = NEW.user_id
+          AND v.crawl_ts = ({profile_ts_sql("NEW.user_id", NEW_CRAWL_TS)})
+          AND {' AND '.join(f'v.{c} IS NEW.{c}' for c in CREATOR_PROFILE_COLUMNS)})
+    ON CONFLICT DO NOTHING;
+
+    -- A crawl older than stored ones (out-of-order load) that added a version:
+    -- the creator's next later crawl keeps the profile it was stored with
+    INSERT INTO creator_profile_versions (user_id, crawl_ts, {', '.join(CREATOR_PROFILE_COLUMNS)})
+    SELECT v.user_id, later.crawl_ts, {', '.join('v.' + c for c in CREATOR_PROFILE_COLUMNS)}
+    FROM creator_profile_versions AS v, (
+        SELECT MIN(crawl_ts) AS crawl_ts FROM creator_snapshots
+        WHERE user_id = NEW.user_id AND crawl_ts > {NEW_CRAWL_TS}) AS later
+    WHERE changes() = 1 AND later.crawl_ts IS NOT NULL
+      AND v.user_id = NEW.user_id
+      AND v.crawl_ts = ({profile_ts_sql("NEW.user_id", NEW_CRAWL_TS, "<")})
+      AND NOT EXISTS (
+        SELECT 1 FROM creator_profile_versions WHERE user_id = NEW.user_id
+          AND crawl_ts > {NEW_CRAWL_TS} AND crawl_ts <= later.crawl_ts);
+
+    INSERT INTO creator_snapshots (user_id, region, video_type, crawl_ts, follower_count, creator_rank)
+    VALUES (NEW.user_id, COALESCE(NEW.region, 'MY'), NEW.video_type, {NEW_CRAWL_TS},
+            NEW.follower_count, NEW.creator_rank)
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO creator_videos (user_id, video_item_id, region, video_type, video_name, video_url,
+                                video_play_count, video_like_count, video_rank, crawl_ts)
+    VALUES (NEW.user_id, NEW.video_item_id, COALESCE(NEW.region, 'MY'), NEW.video_type, NEW.video_name,
+            NEW.video_url, NEW.video_play_count, NEW.video_like_count, NEW.video_rank, {NEW_CRAWL_TS});
+END
+"""
+
+# Crawl runs: one row per script.py run, with what is needed to resume it
+CREATE_CRAWL_RUNS = """
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    run_id TEXT PRIMARY KEY,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    regions TEXT,
+    page_sizes TEXT,
+    status TEXT,
+    started_at TEXT,
+    finished_at TEXT
+)
+"""
+
+# Crawl checkpoints: one row per fetched (endpoint, region, vertical, page) unit
+# status = 'done' once the page's rows are saved, 'failed' if the request failed
+CREATE_CRAWL_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    run_id TEXT,
+    endpoint TEXT,
+    region TEXT,
+    vertical TEXT,
+    page_num INTEGER,
+    status TEXT,
+    row_count INTEGER,
+    is_last INTEGER,
+    updated_at TEXT,
+    PRIMARY KEY (run_id, endpoint, region, vertical, page_num)
+)
+"""
+
+# Ingested CSV folders: one row per csv_file/<DDMMYYYY> folder loaded by insert_csv_to_db.py
+# A folder is skipped on the next backfill while its checksum is unchanged
+CREATE_INGESTED_FOLDERS = """
+CREATE TABLE IF NOT EXISTS ingested_folders (
+    folder TEXT PRIMARY KEY,
+    checksum TEXT,
+    row_count INTEGER,
+    ingested_at TEXT
+)
+"""
+
+# === Latest snapshot tables ===
+# One row per entity per crawl_date: the last crawl_time snapshot of that day.
+# Same columns (and order) as the raw tables; rebuilt per crawl_date by
+# rollups.refresh_rollups() at ingest, so readers never de-duplicate.
+CREATE_POSTS_LATEST = """
+CREATE TABLE IF NOT EXISTS posts_latest (
+    url TEXT,
+    nickname TEXT,
+    user_id INTEGER,
+    item_id INTEGER,
+    item_name TEXT,
+    genre TEXT,
+    like_count INTEGER,
+    play_count INTEGER,
+    region TEXT,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    PRIMARY KEY (crawl_date, item_id, user_id)
+)
+"""
+
+# creators_latest was a table like the others up to v7; since v8 it is a view
+# over creator_latest_videos (below)
+CREATE_CREATORS_LATEST = """
+CREATE TABLE IF NOT EXISTS creators_latest (
+    nickname TEXT,
+    uniqueId TEXT,
+    user_id TEXT,
+    follower_count INTEGER,
+    bio TEXT,
+    creator_rank INTEGER,
+    video_type TEXT,
+    video_item_id TEXT,
+    video_name TEXT,
+    video_url TEXT,
+    profile_url TEXT,
+    video_play_count INTEGER,
+    video_like_count INTEGER,
+    video_rank INTEGER,
+    region TEXT,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    PRIMARY KEY (crawl_date, user_id, video_item_id)
+)
+"""
+
+# Latest creator videos per day as keys into creator_videos; the profile and
+# snapshot columns are joined in by the creators_latest view
+CREATE_CREATOR_LATEST_VIDEOS = """
+CREATE TABLE IF NOT EXISTS creator_latest_videos (
+    crawl_date TEXT,
+    user_id INTEGER,
+    video_item_id INTEGER,
+    region TEXT,
+    PRIMARY KEY (crawl_date, user_id, video_item_id)
+) WITHOUT ROWID
+"""
+
+CREATE_CREATORS_LATEST_VIEW = f"""
+CREATE VIEW IF NOT EXISTS creators_latest AS
+SELECT creator_profile_versions.nickname, creator_profile_versions.uniqueId, creator_latest_videos.user_id,
+       creator_snapshots.follower_count, creator_profile_versions.bio, creator_snapshots.creator_rank,
+       creator_videos.video_type, creator_latest_videos.video_item_id, creator_videos.video_name,
+       creator_videos.video_url, creator_profile_versions.profile_url, creator_videos.video_play_count,
+       creator_videos.video_like_count, creator_videos.video_rank, creator_latest_videos.region,
+       creator_latest_videos.crawl_date, time(creator_videos.crawl_ts, 'unixepoch') AS crawl_time
+FROM creator_latest_videos
+JOIN creator_videos USING (user_id, video_item_id, region)
+JOIN creator_snapshots ON creator_snapshots.user_id = creator_videos.user_id
+    AND creator_snapshots.region = creator_videos.region
+    AND creator_snapshots.video_type = creator_videos.video_type
+    AND creator_snapshots.crawl_ts = creator_videos.crawl_ts
+JOIN creator_profile_versions ON creator_profile_versions.user_id = creator_videos.user_id
+    AND creator_profile_versions.crawl_ts = ({profile_ts_sql("creator_videos.user_id", "creator_videos.crawl_ts")})
+"""
+
+CREATE_HASHTAGS_LATEST = """
+CREATE TABLE IF NOT EXISTS hashtags_latest (
+    hashtag_id INTEGER,
+    hashtag_name TEXT,
+    country TEXT,
+    rank INTEGER,
+    video_views INTEGER,
+    publish_count INTEGER,
+    industry_value TEXT,
+    region TEXT,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    PRIMARY KEY (crawl_date, hashtag_id, hashtag_name)
+)
+"""
+
+# === Daily rollup tables ===
+# Rebuilt per crawl_date by rollups.refresh_rollups() whenever rows are ingested;
+# sums and counts are stored so averages can be derived on read
+CREATE_POSTS_DAILY_GENRE = """
+CREATE TABLE IF NOT EXISTS posts_daily_genre (
+    crawl_date TEXT,
+    genre TEXT,
+    video_count INTEGER,
+    play_sum INTEGER,
+    like_sum INTEGER,
+    engagement_sum REAL,
+    engagement_count INTEGER,
+    PRIMARY KEY (crawl_date, genre)
+)
+"""
+
+CREATE_POSTS_DAILY_CREATOR = """
+CREATE TABLE IF NOT EXISTS posts_daily_creator (
+    crawl_date TEXT,
+    nickname TEXT,
+    video_count INTEGER,
+    play_sum INTEGER,
+    like_sum INTEGER,
+    PRIMARY KEY (crawl_date, nickname)
+)
+"""
+
+CREATE_CREATORS_DAILY = """
+CREATE TABLE IF NOT EXISTS creators_daily (
+    crawl_date TEXT PRIMARY KEY,
+    creator_count INTEGER,
+    follower_sum INTEGER,
+    video_count INTEGER,
+    view_sum INTEGER,
+    like_sum INTEGER,
+    engagement_sum REAL,
+    engagement_count INTEGER
+)
+"""
+
+CREATE_CREATORS_DAILY_TYPE = """
+CREATE TABLE IF NOT EXISTS creators_daily_type (
+    crawl_date TEXT,
+    video_type TEXT,
+    creator_count INTEGER,
+    video_count INTEGER,
+    view_sum INTEGER,
+    like_sum INTEGER,
+    PRIMARY KEY (crawl_date, video_type)
+)
+"""
+
+CREATE_HASHTAGS_DAILY_INDUSTRY = """
+CREATE TABLE IF NOT EXISTS hashtags_daily_industry (
+    crawl_date TEXT,
+    industry_value TEXT,
+    hashtag_count INTEGER,
+    view_sum INTEGER,
+    publish_sum INTEGER,
+    PRIMARY KEY (crawl_date, industry_value)
+)
+"""
+
+# Top-N lists per day (e.g. creators_by_followers, videos_by_views)
+CREATE_DAILY_TOP = """
+CREATE TABLE IF NOT EXISTS daily_top (
+    crawl_date TEXT,
+    list_name TEXT,
+    rank INTEGER,
+    entity_id TEXT,
+    label TEXT,
+    url TEXT,
+    value INTEGER,
+    value2 INTEGER,
+    PRIMARY KEY (crawl_date, list_name, rank)
+)
+"""
+
+TABLES = {
+    "post_snapshots": CREATE_POST_SNAPSHOTS,
+    "post_versions": CREATE_POST_VERSIONS,
+    "hashtag_snapshots": CREATE_HASHTAG_SNAPSHOTS,
+    "hashtag_versions": CREATE_HASHTAG_VERSIONS,
+    "creator_profile_versions": CREATE_CREATOR_PROFILE_VERSIONS,
+    "creator_snapshots": CREATE_CREATOR_SNAPSHOTS,
+    "creator_videos": CREATE_CREATOR_VIDEOS,
+}
+
+# Compatibility views (and their INSTEAD OF triggers), created after every table
+VIEWS = {
+    "posts": snapshot_view_sql("posts"),
+    "posts_insert": snapshot_insert_trigger_sql("posts"),
+    "hashtags": snapshot_view_sql("hashtags"),
+    "hashtags_insert": snapshot_insert_trigger_sql("hashtags"),
+    "creators": CREATE_CREATORS_VIEW,
+    "creators_insert": CREATE_CREATORS_INSERT_TRIGGER,
+    "creators_latest": CREATE_CREATORS_LATEST_VIEW,
+}
+
+# Table holding one row per row of each compatibility view (counts inserts)
+VIEW_ROW_TABLES = {**SNAPSHOT_TABLES, "creators": "creator_videos"}
+
+# Storage indexes: the ingest-time refresh of the latest tables reads one day of
+# crawl_ts; the trend view reads one video / hashtag over a range of crawl_ts,
+# which the (item_id, crawl_ts) / (hashtag_id, crawl_ts) primary keys cover.
+# Dashboard day reads go to the latest and rollup tables, keyed on crawl_date.
+INDEXES = {
+    "idx_post_snapshots_crawl_ts": "CREATE INDEX IF NOT EXISTS idx_post_snapshots_crawl_ts ON post_snapshots (crawl_ts)",
+    "idx_hashtag_snapshots_crawl_ts": "CREATE INDEX IF NOT EXISTS idx_hashtag_snapshots_crawl_ts ON hashtag_snapshots (crawl_ts)",
+    "idx_creator_videos_crawl_ts": "CREATE INDEX IF NOT EXISTS idx_creator_videos_crawl_ts ON creator_videos (crawl_ts)",
+}
+
+# Bookkeeping tables, not crawled data
+SUPPORT_TABLES = {
+    "crawl_runs": CREATE_CRAWL_RUNS,
+    "crawl_checkpoints": CREATE_CRAWL_CHECKPOINTS,
+    "ingested_folders": CREATE_INGESTED_FOLDERS,
+}
+# The ones a month partition keeps for its own rows
+PARTITION_SUPPORT_TABLES = ("crawl_checkpoints", "ingested_folders")
+
+LATEST_TABLES = {
+    "posts_latest": CREATE_POSTS_LATEST,
+    "creator_latest_videos": CREATE_CREATOR_LATEST_VIDEOS,
+    "hashtags_latest": CREATE_HASHTAGS_LATEST,
+}
+
+ROLLUP_TABLES = {
+    "posts_daily_genre": CREATE_POSTS_DAILY_GENRE,
+    "posts_daily_creator": CREATE_POSTS_DAILY_CREATOR,
+    "creators_daily": CREATE_CREATORS_DAILY,
+    "creators_daily_type": CREATE_CREATORS_DAILY_TYPE,
+    "hashtags_daily_industry": CREATE_HASHTAGS_DAILY_INDUSTRY,
+    "daily_top": CREATE_DAILY_TOP,
+}
+
+
+def create_tables(cursor, partition=False):
+    """
+    Create any missing table / index with the latest schema.
+    A partition gets the checkpoints / ingested folders of the rows it
+    holds, so rows and their bookkeeping commit in one file; crawl runs stay
+    in the main database.
+    """
+    support = {name: create_sql for name, create_sql in SUPPORT_TABLES.items()
+               if not partition or name in PARTITION_SUPPORT_TABLES}
+    for tables in (TABLES, support, LATEST_TABLES, ROLLUP_TABLES, VIEWS):
+        for create_sql in tables.values():
+            cursor.execute(create_sql)
+    for create_sql in INDEXES.values():
+        cursor.execute(create_sql)
+
+
+# === Migrations ===
+def rebuild_table(cursor, table, create_sql, copy_columns, select_exprs=None):
+    """
+    Recreate a table with a new definition and copy the old rows across.
+    Needed whenever the primary key changes, which ALTER TABLE cannot do.
+    """
+    select_exprs = select_exprs or copy_columns
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    cursor.execute(create_sql)
+    cursor.execute(
+        f"INSERT OR IGNORE INTO {table} ({', '.join(copy_columns)}) "
+        f"SELECT {', '.join(select_exprs)} FROM {table}_old"
+    )
+    cursor.execute(f"DROP TABLE {table}_old")
+
+
+def table_columns(cursor, table):
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+
+def migrate_v1_add_region(cursor):
+    """
+    v1: region column on every table and in every primary key.
+    Existing rows were all crawled for Malaysia.
+    """
+    for table, create_sql in {"creators": CREATE_CREATORS, "hashtags": CREATE_HASHTAGS, "posts": CREATE_POSTS}.items():
+        columns = table_columns(cursor, table)
+        if not columns or "region" in columns:
+            continue
+        rebuild_table(cursor, table, create_sql, columns + ["region"], columns + ["'MY'"])
+
+
+def migrate_v2_checkpoints(cursor):
+    """
+    v2: crawl_runs / crawl_checkpoints tables for resumable crawls
+    """
+    cursor.execute(CREATE_CRAWL_RUNS)
+    cursor.execute(CREATE_CRAWL_CHECKPOINTS)
+
+
+def migrate_v3_ingested_folders(cursor):
+    """
+    v3: ingested_folders table for checksum-based CSV backfills
+    """
+    cursor.execute(CREATE_INGESTED_FOLDERS)
+
+
+def migrate_v4_crawl_date_indexes(cursor):
+    """
+    v4: crawl_date-led indexes for the dashboard queries
+    """
+    # posts / hashtags / creators were still tables here (views since v8 / v9)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_crawl_date_genre ON posts (crawl_date, genre)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hashtags_crawl_date_industry ON hashtags (crawl_date, industry_value)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_creators_crawl_date_video_type ON creators (crawl_date, video_type)")
+    cursor.execute("ANALYZE")
+
+
+def migrate_v5_daily_rollups(cursor):
+    """
+    v5: daily rollup tables (filled for every stored crawl date by v6)
+    """
+    for create_sql in ROLLUP_TABLES.values():
+        cursor.execute(create_sql)
+
+
+def migrate_v6_latest_snapshots(cursor):
+    """
+    v6: latest-snapshot-per-entity-per-day tables (filled, with the rollups
+    now computed from them, by v10)
+    """
+    for create_sql in (CREATE_POSTS_LATEST, CREATE_CREATORS_LATEST, CREATE_HASHTAGS_LATEST):
+        cursor.execute(create_sql)
+
+
+def migrate_v7_trend_indexes(cursor):
+    """
+    v7: (item_id, crawl_date) / (hashtag_id, crawl_date) indexes for the trend view
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_item_crawl_date ON posts (item_id, crawl_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hashtags_hashtag_crawl_date ON hashtags (hashtag_id, crawl_date)")
+    cursor.execute("ANALYZE")
+
+
+def migrate_v8_normalize_creators(cursor):
+    """
+    v8: split the flat creators table into creator_profiles (latest profile per
+    creator), creator_snapshots (followers / rank per crawl) and creator_videos,
+    with a creators view over them in its place; creators_latest becomes a view
+    over creator_latest_videos keys (filled by v10).
+    Databases upgraded from here on get the creator tables in their current
+    typed layout, with every profile change kept in creator_profile_versions
+    (the first row of a creator in each crawl); ones already at v8 are
+    converted by v9.
+    """
+    for table in ("creator_profile_versions", "creator_snapshots", "creator_videos"):
+        cursor.execute(TABLES[table])
+    profile = ", ".join(CREATOR_PROFILE_COLUMNS)
+    cursor.execute(f"""
+        INSERT INTO creator_profile_versions (user_id, crawl_ts, {profile})
+        SELECT user_id, crawl_ts, {profile} FROM (
+            SELECT *, LAG(version) OVER (PARTITION BY user_id ORDER BY crawl_ts) AS previous_version FROM (
+                SELECT user_id, {CRAWL_TS.format(date="crawl_date", time="crawl_time")} AS crawl_ts, {profile},
+                       json_array({profile}) AS version, ROW_NUMBER() OVER (
+                    PARTITION BY user_id, crawl_date, crawl_time ORDER BY rowid) AS crawl_row
+                FROM creators)
+            WHERE crawl_row = 1)
+        WHERE previous_version IS NOT version""")
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO creator_snapshots
+            (user_id, region, video_type, crawl_ts, follower_count, creator_rank)
+        SELECT user_id, region, video_type, {CRAWL_TS.format(date="crawl_date", time="crawl_time")}, follower_count, creator_rank
+        FROM creators ORDER BY rowid""")
+    cursor.execute(f"""
+        INSERT INTO creator_videos (user_id, video_item_id, region, video_type, video_name, video_url,
+                                    video_play_count, video_like_count, video_rank, crawl_ts)
+        SELECT user_id, video_item_id, region, video_type, video_name, video_url,
+               video_play_count, video_like_count, video_rank, {CRAWL_TS.format(date="crawl_date", time="crawl_time")}
+        FROM creators ORDER BY rowid""")
+    cursor.execute("DROP TABLE creators")
+    cursor.execute("DROP TABLE creators_latest")
+    cursor.execute(CREATE_CREATOR_LATEST_VIDEOS)
+    for view in ("creators", "creators_insert", "creators_latest"):
+        cursor.execute(VIEWS[view])
+    cursor.execute(INDEXES["idx_creator_videos_crawl_ts"])
+
+
+def migrate_v9_typed_keys(cursor):
+    """
+    v9: INTEGER ids and one INTEGER crawl_ts instead of crawl_date / crawl_time
+    text; posts / hashtags move to post_snapshots / hashtag_snapshots (full
+    rows, split further by v10), hashtags.industry_value becomes TEXT.
+    """
+    def copy_exprs(table):
+        return [CRAWL_TS.format(date="crawl_date", time="crawl_time") if column == "crawl_ts" else column
+                for column in table_columns(cursor, table)]
+
+    # Views are rebuilt over the new tables (renaming a table would rewrite them)
+    for view in ("creators_latest", "creators"):
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+
+    # Creator tables still in the v8 layout (TEXT ids, crawl_date / crawl_time)
+    if "crawl_date" in table_columns(cursor, "creator_videos"):
+        for table in ("creator_snapshots", "creator_videos"):
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            cursor.execute(TABLES[table])
+            columns = table_columns(cursor, table)
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                           f"SELECT {', '.join(copy_exprs(table))} FROM {table}_old ORDER BY rowid")
+            cursor.execute(f"DROP TABLE {table}_old")
+        convert_latest_profiles(cursor, CRAWL_TS.format(date="p.crawl_date", time="p.crawl_time"))
+
+    for table, storage, create_sql in (("posts", "post_snapshots", CREATE_POST_SNAPSHOTS_V9),
+                                       ("hashtags", "hashtag_snapshots", CREATE_HASHTAG_SNAPSHOTS_V9)):
+        cursor.execute(create_sql)
+        columns = table_columns(cursor, storage)
+        cursor.execute(f"INSERT INTO {storage} ({', '.join(columns)}) "
+                       f"SELECT {', '.join(copy_exprs(storage))} FROM {table} ORDER BY rowid")
+        cursor.execute(f"DROP TABLE {table}")
+
+    # Latest tables are refilled by v10 with the new id types
+    for table, create_sql in LATEST_TABLES.items():
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(create_sql)
+    for view in ("creators", "creators_insert", "creators_latest"):
+        cursor.execute(VIEWS[view])
+    cursor.execute(INDEXES["idx_creator_videos_crawl_ts"])
+
+
+def migrate_v10_delta_snapshots(cursor):
+    """
+    v10: posts / hashtags stored as deltas: the full-row *_snapshots tables
+    are split into per-crawl metrics (*_snapshots) and *_versions, keeping a
+    version only where the descriptive columns differ from the entity's
+    previous crawl. Then refill every latest table and rollup, and refresh
+    the planner statistics.
+    """
+    from rollups import rebuild_all_rollups
+
+    for table, snapshots in SNAPSHOT_TABLES.items():
+        versions, entity = VERSION_TABLES[table], ENTITY_IDS[table]
+        attributes = ", ".join(VERSION_COLUMNS[table])
+        # The view (and its trigger) is recreated over the new tables
+        cursor.execute(f"DROP VIEW IF EXISTS {table}")
+        cursor.execute(f"ALTER TABLE {snapshots} RENAME TO {snapshots}_v9")
+        cursor.execute(TABLES[snapshots])
+        cursor.execute(TABLES[versions])
+        columns = ", ".join(table_columns(cursor, snapshots))
+        cursor.execute(f"INSERT INTO {snapshots} ({columns}) SELECT {columns} FROM {snapshots}_v9 ORDER BY rowid")
+        cursor.execute(f"""
+            INSERT INTO {versions} ({entity}, region, crawl_ts, {attributes})
+            SELECT {entity}, region, crawl_ts, {attributes} FROM (
+                SELECT *, json_array({attributes}) AS version, LAG(json_array({attributes})) OVER (
+                    PARTITION BY {entity}, region ORDER BY crawl_ts) AS previous_version
+                FROM {snapshots}_v9)
+            WHERE previous_version IS NOT version""")
+        cursor.execute(f"DROP TABLE {snapshots}_v9")
+
+    for table in SNAPSHOT_TABLES:
+        cursor.execute(VIEWS[table])
+        cursor.execute(VIEWS[f"{table}_insert"])
+    for create_sql in INDEXES.values():
+        cursor.execute(create_sql)
+    rebuild_all_rollups(cursor)
+    cursor.execute("ANALYZE")
+
+
+def convert_latest_profiles(cursor, profile_ts):
+    """
+    Turn creator_profiles (one row per creator, its latest profile; v8 to v10)
+    into each creator's first profile version, dated at its earliest stored
+    crawl. Older profiles were not kept, so every stored crawl shows this one.
+    """
+    cursor.execute(TABLES["creator_profile_versions"])
+    profile = ", ".join(CREATOR_PROFILE_COLUMNS)
+    cursor.execute(f"""
+        INSERT INTO creator_profile_versions (user_id, crawl_ts, {profile})
+        SELECT p.user_id, COALESCE((SELECT MIN(crawl_ts) FROM creator_snapshots WHERE user_id = p.user_id),
+                                   {profile_ts}), {', '.join('p.' + c for c in CREATOR_PROFILE_COLUMNS)}
+        FROM creator_profiles AS p""")
+    cursor.execute("DROP TABLE creator_profiles")
+
+
+def migrate_v11_creator_profile_versions(cursor):
+    """
+    v11: creator profiles versioned by crawl_ts, so creators rows show the
+    profile of their own crawl instead of the latest one
+    """
+    if not table_columns(cursor, "creator_profiles"):
+        # Upgraded from v7 or older: v8 built the versions already
+        return
+    for view in ("creators_latest", "creators"):
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+    convert_latest_profiles(cursor, "p.crawl_ts")
+    for view in ("creators", "creators_insert", "creators_latest"):
+        cursor.execute(VIEWS[view])
+
+
+MIGRATIONS = {
+    1: migrate_v1_add_region,
+    2: migrate_v2_checkpoints,
+    3: migrate_v3_ingested_folders,
+    4: migrate_v4_crawl_date_indexes,
+    5: migrate_v5_daily_rollups,
+    6: migrate_v6_latest_snapshots,
+    7: migrate_v7_trend_indexes,
+    8: migrate_v8_normalize_creators,
+    9: migrate_v9_typed_keys,
+    10: migrate_v10_delta_snapshots,
+    11: migrate_v11_creator_profile_versions,
+}
+
+
+def init_db(db_path, partition=False):
+    """
+    Create the database if needed and bring its schema up to SCHEMA_VERSION.
+    `partition` creates a month partition; existing partitions are recognised
+    by their application_id.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    existing = {
+        row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+
+    fresh = not existing & (set(TABLES) | {"creators", "posts", "hashtags"})
+    if fresh:
+        # Must be set before the first table: lets compact_db.py hand freed
+        # pages back to the OS without a full VACUUM
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    partition = partition or cursor.execute("PRAGMA application_id").fetchone()[0] == PARTITION_APPLICATION_ID
+
+    cursor.execute("BEGIN")
+    if fresh:
+        # New database: create the latest schema directly
+        create_tables(cursor, partition)
+    else:
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            MIGRATIONS[target](cursor)
+            print(f"Applied schema migration v{target}")
+        create_tables(cursor, partition)
+    if partition:
+        cursor.execute(f"PRAGMA application_id = {PARTITION_APPLICATION_ID}")
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    conn.close()
+
+
+# === Query Plan Check ===
+# The queries the Streamlit dashboards run on every rerun, plus the per-day
+# raw read behind each ingest-time snapshot refresh
+DASHBOARD_QUERIES = [
+    ("posts_latest", "SELECT (SELECT MIN(crawl_date) FROM posts_latest), (SELECT MAX(crawl_date) FROM posts_latest)", ()),
+    ("creator_latest_videos", "SELECT (SELECT MIN(crawl_date) FROM creators_latest), "
+                              "(SELECT MAX(crawl_date) FROM creators_latest)", ()),
+    ("hashtags_latest", "SELECT (SELECT MIN(crawl_date) FROM hashtags_latest), "
+                        "(SELECT MAX(crawl_date) FROM hashtags_latest)", ()),
+    ("posts_latest", "SELECT * FROM posts_latest WHERE crawl_date = ?", ("2025-10-30",)),
+    ("posts_latest", "SELECT * FROM posts_latest WHERE crawl_date = ? AND genre = ? "
+                     "ORDER BY play_count DESC, item_id, user_id LIMIT ? OFFSET ?", ("2025-10-30", "Entertainment", 50, 0)),
+    ("creator_latest_videos", "SELECT * FROM creators_latest WHERE crawl_date = ?", ("2025-10-30",)),
+    ("creator_latest_videos", "SELECT * FROM creators_latest WHERE crawl_date = ? AND video_type = ? "
+                              "ORDER BY video_play_count DESC, user_id, video_item_id LIMIT ? OFFSET ?",
+     ("2025-10-30", "Entertainment", 50, 0)),
+    ("hashtags_latest", "SELECT * FROM hashtags_latest WHERE crawl_date = ?", ("2025-10-30",)),
+    ("post_snapshots", "SELECT rowid FROM post_snapshots WHERE crawl_ts >= CAST(strftime('%s', ?) AS INTEGER) "
+                       "AND crawl_ts < CAST(strftime('%s', ?, '+1 day') AS INTEGER)", ("2025-10-30", "2025-10-30")),
+    ("creator_videos", "SELECT rowid FROM creator_videos WHERE crawl_ts >= CAST(strftime('%s', ?) AS INTEGER) "
+                       "AND crawl_ts < CAST(strftime('%s', ?, '+1 day') AS INTEGER)", ("2025-10-30", "2025-10-30")),
+    ("posts_daily_genre", "SELECT * FROM posts_daily_genre WHERE crawl_date = ?", ("2025-10-30",)),
+    ("posts_daily_creator", "SELECT nickname, play_sum FROM posts_daily_creator WHERE crawl_date = ? "
+                            "ORDER BY play_sum DESC LIMIT 1", ("2025-10-30",)),
+    ("creators_daily", "SELECT * FROM creators_daily WHERE crawl_date = ?", ("2025-10-30",)),
+    ("daily_top", "SELECT * FROM daily_top WHERE crawl_date = ? AND list_name = ? AND rank <= ? ORDER BY rank",
+     ("2025-10-30", "creators_by_followers", 20)),
+    ("hashtags_daily_industry", "SELECT * FROM hashtags_daily_industry WHERE crawl_date = ?", ("2025-10-30",)),
+    ("post_snapshots", "SELECT crawl_ts, play_count, like_count FROM post_snapshots WHERE item_id = ? "
+                       "AND crawl_ts >= CAST(strftime('%s', ?) AS INTEGER) "
+                       "AND crawl_ts < CAST(strftime('%s', ?, '+1 day') AS INTEGER)",
+     ("7552375265188482312", "2025-09-01", "2025-10-30")),
+    ("hashtag_snapshots", "SELECT crawl_ts, video_views, publish_count, rank FROM hashtag_snapshots "
+                          "WHERE hashtag_id = ? AND crawl_ts >= CAST(strftime('%s', ?) AS INTEGER) "
+                          "AND crawl_ts < CAST(strftime('%s', ?, '+1 day') AS INTEGER)", ("1", "2025-09-01", "2025-10-30")),
+]
+
+
+def check_query_plans(db_path, queries=DASHBOARD_QUERIES):
+    """
+    Run EXPLAIN QUERY PLAN for each dashboard query and flag any SCAN of the
+    table, including full scans of an index: only SEARCH steps stay flat as
+    history grows. Returns True when no query scans.
+    """
+    conn = sqlite3.connect(db_path)
+    all_indexed = True
+    for table, sql, params in queries:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        full_scan = any(detail.startswith(f"SCAN {table}") for detail in plan)
+        all_indexed = all_indexed and not full_scan
+        print(f"[{'FULL SCAN' if full_scan else 'OK'}] {sql}")
+        for detail in plan:
+            print(f"    {detail}")
+    conn.close()
+    return all_indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or upgrade the TikTok SQLite database")
+    parser.add_argument("--db", default=db_path, help="SQLite database path")
+    parser.add_argument("--check", action="store_true",
+                        help="verify with EXPLAIN QUERY PLAN that dashboard queries use indexes")
+    args = parser.parse_args()
+
+    init_db(args.db)
+    print("Database and tables created successfully.")
+    if args.check and not check_query_plans(args.db):
+        raise SystemExit("Some dashboard queries still scan a whole table or index.")
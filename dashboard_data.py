@@ -0,0 +1,402 @@
+import sqlite3
+import threading
+import math
+from datetime import timedelta
+from functools import lru_cache
+
+import streamlit as st
+import pandas as pd
+
+from rollups import (
+    TOP_N, SNAPSHOT_KEYS, read_posts_genres, read_posts_creator_plays, read_creators_daily,
+    read_daily_top, read_hashtags_industries,
+)
+from partitions import PartitionedReader, is_partitioned, partition_dir
+
+# === Dashboard Data Access ===
+# All three tabs read through this module: one cached read-only connection per
+# server process and memoized query results keyed by (query, date, data version).
+# Widget changes rerun the script but are answered from the cache; a new crawl
+# bumps the data version and the next rerun reads fresh rows.
+
+DB_PATH = "database/tiktokdb.db"
+
+# Seconds between data-version checks (how quickly a finished crawl shows up)
+DATA_VERSION_TTL = 30
+
+# Memoized results kept per query function (roughly days × tabs × filters)
+CACHE_ENTRIES = 64
+
+# Rows per page of the "All Data" tables
+PAGE_SIZE = 50
+
+# Most points drawn per trend line; longer date ranges are bucketed into
+# N-day periods in SQL, so a year of history is still ~120 rows
+MAX_TREND_POINTS = 120
+
+# Videos / hashtags offered in the trend view's picker (top of the picked day)
+TREND_CHOICES = 200
+
+# Compiled statements kept per connection (default 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Day reads go to the latest-snapshot tables (one row per entity per day,
+# maintained at ingest), so nothing is de-duplicated here
+LATEST_TABLES = {
+    "posts": "posts_latest",
+    "creators": "creators_latest",
+    "hashtags": "hashtags_latest",
+}
+
+
+class ReadOnlyDB:
+    """
+    Read-only SQLite connection shared by every Streamlit session.
+    Sessions run in separate threads, so each read holds the lock.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False,
+                                    cached_statements=STATEMENT_CACHE_SIZE)
+        self.lock = threading.Lock()
+
+    def read(self, func, *args):
+        with self.lock:
+            return func(self.conn, *args)
+
+    def data_version(self):
+        """
+        Changes whenever another connection (crawler, CSV loader) commits
+        """
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+@st.cache_resource(show_spinner=False)
+def get_db(db_path=DB_PATH):
+    """
+    ReadOnlyDB, or a PartitionedReader when the database is partitioned
+    (partitions.py; restart the dashboard after --split)
+    """
+    if is_partitioned(db_path):
+        return PartitionedReader(partition_dir(db_path), cached_statements=STATEMENT_CACHE_SIZE)
+    return ReadOnlyDB(db_path)
+
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def data_version(db_path=DB_PATH):
+    return get_db(db_path).data_version()
+
+
+# === Query Layer ===
+# Every statement is a fixed SQL string, built once per shape (lru_cache), with
+# ? placeholders for all values; sqlite3's per-connection statement cache then
+# reuses the compiled statement on every rerun. Table and column names only
+# come from the constants here and in the views, never from widget values.
+
+# Raw-table columns each view reads for its in-memory sections (no SELECT *)
+VIEW_COLUMNS = {
+    "posts": ["url", "nickname", "user_id", "item_id", "genre", "like_count", "play_count"],
+    "creators": [
+        "nickname", "user_id", "follower_count", "creator_rank", "video_type",
+        "video_item_id", "video_url", "video_play_count", "video_like_count",
+    ],
+    "hashtags": ["hashtag_id", "hashtag_name", "industry_value", "video_views", "publish_count"],
+}
+
+
+@lru_cache(maxsize=None)
+def date_range_sql(table):
+    latest = LATEST_TABLES[table]
+    return f"SELECT (SELECT MIN(crawl_date) FROM {latest}), (SELECT MAX(crawl_date) FROM {latest})"
+
+
+@lru_cache(maxsize=None)
+def day_sql(table):
+    return f"SELECT {', '.join(VIEW_COLUMNS[table])} FROM {LATEST_TABLES[table]} WHERE crawl_date = ?"
+
+
+@lru_cache(maxsize=None)
+def distinct_sql(table, column):
+    return (f"SELECT DISTINCT {column} FROM {LATEST_TABLES[table]} "
+            f"WHERE crawl_date = ? AND {column} IS NOT NULL ORDER BY 1")
+
+
+@lru_cache(maxsize=None)
+def day_rows_where(filter_columns):
+    """
+    WHERE clause selecting one day's rows narrowed by equality filters;
+    parameters are crawl_date then one value per filter column
+    """
+    where = "crawl_date = ?"
+    for column in filter_columns:
+        where += f" AND {column} = ?"
+    return where
+
+
+@lru_cache(maxsize=None)
+def count_sql(table, filter_columns):
+    return f"SELECT COUNT(*) FROM {LATEST_TABLES[table]} WHERE {day_rows_where(filter_columns)}"
+
+
+@lru_cache(maxsize=None)
+def page_sql(table, columns, filter_columns, order_by, descending):
+    # Ties broken on the entity key (unique per day) so pages never overlap
+    return (f"SELECT {', '.join(columns)} FROM {LATEST_TABLES[table]} WHERE {day_rows_where(filter_columns)} "
+            f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}, {', '.join(SNAPSHOT_KEYS[table])} "
+            f"LIMIT ? OFFSET ?")
+
+
+def read_date_range(conn, table):
+    return conn.execute(date_range_sql(table)).fetchone()
+
+
+def read_day(conn, table, crawl_date):
+    return pd.read_sql(day_sql(table), conn, params=(crawl_date,))
+
+
+def read_distinct(conn, table, crawl_date, column):
+    return [row[0] for row in conn.execute(distinct_sql(table, column), (crawl_date,))]
+
+
+def read_row_count(conn, table, crawl_date, filters):
+    filter_columns = tuple(column for column, _ in filters)
+    values = [value for _, value in filters]
+    return conn.execute(count_sql(table, filter_columns), [crawl_date] + values).fetchone()[0]
+
+
+def read_page(conn, table, crawl_date, columns, filters, order_by, descending, limit, offset):
+    """
+    One page of a day's rows: filtering, sorting and paging all run in SQLite
+    """
+    filter_columns = tuple(column for column, _ in filters)
+    values = [value for _, value in filters]
+    return pd.read_sql(
+        page_sql(table, columns, filter_columns, order_by, descending),
+        conn, params=[crawl_date] + values + [limit, offset]
+    )
+
+
+# Trend view: one entity's history from the storage tables (every snapshot
+# kept), via their (item_id, crawl_ts) / (hashtag_id, crawl_ts) primary keys.
+# Parameters: id, start, end, start, bucket_days. Counts only grow, so a
+# period's value is its MAX; rank is the best (MIN) rank of the period.
+TREND_RANGE = ("crawl_ts >= CAST(strftime('%s', ?) AS INTEGER) "
+               "AND crawl_ts < CAST(strftime('%s', ?, '+1 day') AS INTEGER)")
+TREND_BUCKET = "(crawl_ts - CAST(strftime('%s', ?) AS INTEGER)) / (86400 * ?)"
+
+TREND_SQL = {
+    "posts": f"""
+        SELECT date(MIN(crawl_ts), 'unixepoch') AS period, MAX(play_count) AS play_count,
+               MAX(like_count) AS like_count
+        FROM post_snapshots WHERE item_id = ? AND {TREND_RANGE}
+        GROUP BY {TREND_BUCKET} ORDER BY period""",
+    "hashtags": f"""
+        SELECT date(MIN(crawl_ts), 'unixepoch') AS period, MAX(video_views) AS video_views,
+               MAX(publish_count) AS publish_count, MIN(rank) AS best_rank
+        FROM hashtag_snapshots WHERE hashtag_id = ? AND {TREND_RANGE}
+        GROUP BY {TREND_BUCKET} ORDER BY period""",
+}
+
+TREND_CHOICES_SQL = {
+    "posts": "SELECT item_id, nickname, item_name FROM posts_latest WHERE crawl_date = ? "
+             "ORDER BY play_count DESC LIMIT ?",
+    "hashtags": "SELECT hashtag_id, hashtag_name FROM hashtags_latest WHERE crawl_date = ? "
+                "ORDER BY video_views DESC LIMIT ?",
+}
+
+
+def read_trend(conn, table, entity_id, start, end, bucket_days):
+    return pd.read_sql(TREND_SQL[table], conn, params=(entity_id, start, end, start, bucket_days))
+
+
+def read_trend_choices(conn, table, crawl_date, limit):
+    return pd.read_sql(TREND_CHOICES_SQL[table], conn, params=(crawl_date, limit))
+
+
+READERS = {
+    "date_range": read_date_range,
+    "day": read_day,
+    "distinct": read_distinct,
+    "row_count": read_row_count,
+    "page": read_page,
+    "trend": read_trend,
+    "trend_choices": read_trend_choices,
+    "posts_genres": read_posts_genres,
+    "posts_creator_plays": read_posts_creator_plays,
+    "creators_daily": read_creators_daily,
+    "daily_top": read_daily_top,
+    "hashtags_industries": read_hashtags_industries,
+}
+
+
+# Position of the crawl date in each reader's arguments (trend: start, end);
+# a partitioned read attaches only the months between them
+READER_DATES = {
+    "day": 1,
+    "distinct": 1,
+    "row_count": 1,
+    "page": 1,
+    "trend": (2, 3),
+    "trend_choices": 1,
+    "posts_genres": 0,
+    "posts_creator_plays": 0,
+    "creators_daily": 0,
+    "daily_top": 0,
+    "hashtags_industries": 0,
+}
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _cached_read(db_path, reader, args, version):
+    """
+    Run READERS[reader](conn, *args) once per data version; Streamlit returns
+    a copy of the cached result, so callers may add columns freely
+    """
+    db = get_db(db_path)
+    if not isinstance(db, PartitionedReader):
+        return db.read(READERS[reader], *args)
+    if reader == "date_range":
+        return db.read_bounds(READERS[reader], *args)
+    start, end = (READER_DATES[reader],) * 2 if isinstance(READER_DATES[reader], int) else READER_DATES[reader]
+    return db.read(READERS[reader], args[start], args[end], *args)
+
+
+def cached_read(reader, *args):
+    return _cached_read(DB_PATH, reader, args, data_version(DB_PATH))
+
+
+# === Dashboard helpers ===
+def date_range(table):
+    """
+    (min_date, max_date) of a table as 'YYYY-MM-DD' strings, None when empty
+    """
+    return cached_read("date_range", table)
+
+
+def load_day(table, crawl_date):
+    """
+    One day of rows, one per entity (latest snapshot)
+    """
+    return cached_read("day", table, str(crawl_date))
+
+
+def distinct_values(table, crawl_date, column):
+    """
+    Sorted non-null values of a column on one day (filter options)
+    """
+    return cached_read("distinct", table, str(crawl_date), column)
+
+
+def trend_bucket_days(start, end):
+    """
+    Days per trend point so that start..end stays within MAX_TREND_POINTS
+    """
+    return max(1, math.ceil(((end - start).days + 1) / MAX_TREND_POINTS))
+
+
+def trend_chunks(start, end, bucket_days, max_months):
+    """
+    start..end cut into ranges of whole trend periods that touch at most
+    max_months months each (SQLite's ATTACH limit for partitioned reads).
+    Every range starts on a period boundary, so the periods come out the same.
+    """
+    chunks = []
+    while start <= end:
+        month_index = start.year * 12 + start.month - 1 + max_months
+        limit = start.replace(year=month_index // 12, month=month_index % 12 + 1, day=1) - timedelta(days=1)
+        days = (limit - start).days + 1
+        stop = min(end, start + timedelta(days=max(days - days % bucket_days, bucket_days) - 1))
+        chunks.append((start, stop))
+        start = stop + timedelta(days=1)
+    return chunks
+
+
+def trend(table, entity_id, start, end):
+    """
+    History of one video (posts) or hashtag between two dates, downsampled
+    to at most MAX_TREND_POINTS periods; returns (DataFrame, bucket_days)
+    """
+    bucket_days = trend_bucket_days(start, end)
+    db = get_db(DB_PATH)
+    if not isinstance(db, PartitionedReader):
+        return cached_read("trend", table, str(entity_id), str(start), str(end), bucket_days), bucket_days
+    frames = [cached_read("trend", table, str(entity_id), str(chunk_start), str(chunk_end), bucket_days)
+              for chunk_start, chunk_end in trend_chunks(start, end, bucket_days, db.max_months)]
+    # Empty chunks left out: they would turn the counts into object columns
+    return pd.concat([df for df in frames if not df.empty] or frames[:1], ignore_index=True), bucket_days
+
+
+def trend_choices(table, crawl_date):
+    return cached_read("trend_choices", table, str(crawl_date), TREND_CHOICES)
+
+
+def posts_genres(crawl_date):
+    return cached_read("posts_genres", str(crawl_date))
+
+
+def posts_creator_plays(crawl_date, nickname=None):
+    return cached_read("posts_creator_plays", str(crawl_date), nickname)
+
+
+def creators_daily(crawl_date):
+    return cached_read("creators_daily", str(crawl_date))
+
+
+def daily_top(crawl_date, list_name, limit=TOP_N):
+    return cached_read("daily_top", str(crawl_date), list_name, limit)
+
+
+def hashtags_industries(crawl_date):
+    return cached_read("hashtags_industries", str(crawl_date))
+
+
+# === Shared State ===
+def select_date(min_date, max_date, key):
+    """
+    Date picker shared by every view: the chosen day is kept in
+    st.session_state["selected_date"] so switching views keeps it
+    (clamped to the range the current view has data for)
+    """
+    selected = st.session_state.get("selected_date", max_date)
+    selected = min(max(selected, min_date), max_date)
+
+    def remember():
+        st.session_state["selected_date"] = st.session_state[key]
+
+    return st.date_input(
+        "Select Date",
+        min_value=min_date,
+        max_value=max_date,
+        value=selected,
+        key=key,
+        on_change=remember
+    )
+
+
+def paged_rows(table, crawl_date, columns, filters, sort_columns, key, page_size=PAGE_SIZE):
+    """
+    Sort and page controls for an "All Data" table.
+    `filters` maps column -> selected value ("All" = no filter), `sort_columns`
+    maps label -> column. Returns only the visible page, numbered in "No.".
+    """
+    filters = tuple((column, value) for column, value in filters.items() if value != "All")
+    total = cached_read("row_count", table, str(crawl_date), filters)
+    pages = max(1, math.ceil(total / page_size))
+
+    col1, col2, col3 = st.columns(3)
+    sort_label = col1.selectbox("Sort by", list(sort_columns), key=f"{key}_sort")
+    descending = col2.checkbox("Descending", value=True, key=f"{key}_desc")
+    # Back to the first page whenever the date, filters or sort order change
+    view_state = (str(crawl_date), filters, sort_label, descending)
+    if st.session_state.get(f"{key}_view") != view_state:
+        st.session_state[f"{key}_view"] = view_state
+        st.session_state[f"{key}_page"] = 1
+    page = col3.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    offset = (page - 1) * page_size
+    df = cached_read("page", table, str(crawl_date), tuple(columns), filters,
+                     sort_columns[sort_label], descending, page_size, offset)
+    df.insert(0, "No.", range(offset + 1, offset + len(df) + 1))
+    st.caption(f"Rows {offset + 1 if total else 0}-{offset + len(df)} of {total}")
+    return df
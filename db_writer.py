@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# === Writer Pragmas ===
+# WAL lets the Streamlit dashboards keep reading while the crawler writes;
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+WRITER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,        # KiB (negative) → 64 MB page cache
+    "mmap_size": 268435456,      # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # ms to wait for a reader-held lock instead of failing
+}
+
+
+class SQLiteWriter:
+    """
+    Single long-lived SQLite connection for all writes to one database.
+    Inserts are grouped into explicit transactions with `transaction()`.
+    """
+
+    def __init__(self, db_path, pragmas=None):
+        self.db_path = db_path
+        # isolation_level=None: transactions are opened explicitly below
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        for name, value in {**WRITER_PRAGMAS, **(pragmas or {})}.items():
+            self.conn.execute(f"PRAGMA {name} = {value}")
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def insert_rows(self, table_name, columns, rows):
+        """
+        INSERT OR IGNORE a list of dicts (missing keys become NULL).
+        Runs inside the caller's transaction if one is open.
+        """
+        placeholders = ", ".join(["?" for _ in columns])
+        column_names = ", ".join(columns)
+        insert_sql = f"INSERT OR IGNORE INTO {table_name} ({column_names}) VALUES ({placeholders})"
+        values = [[row.get(col, None) for col in columns] for row in rows]
+        with self.lock:
+            self.conn.executemany(insert_sql, values)
+        return len(values)
+
+    def close(self):
+        """
+        Fold the WAL back into the main file, refresh planner stats and close
+        """
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
@@ -0,0 +1,139 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_bucket, backoff_delay, RETRY_STATUSES, MAX_RETRIES
+
+# === Pool Settings ===
+# Connections kept open per upstream host. With pool_block=True this is also
+# the hard cap on parallel requests to that host.
+HOST_POOL_SIZES = {
+    "www.tiktok.com": 4,
+    "ads.tiktok.com": 4,
+}
+DEFAULT_POOL_SIZE = 2
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session(pool_sizes):
+    """
+    Create a Session with one keep-alive connection pool per known host
+    """
+    session = requests.Session()
+    # Every call sends its own headers/cookies, so never persist Set-Cookie
+    # responses into the next request (same behaviour as plain requests.get)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    session.mount("https://", HTTPAdapter(pool_connections=len(pool_sizes) + 1,
+                                          pool_maxsize=DEFAULT_POOL_SIZE))
+    for host, size in pool_sizes.items():
+        session.mount(f"https://{host}", HTTPAdapter(pool_connections=1,
+                                                     pool_maxsize=size,
+                                                     pool_block=True))
+    return session
+
+
+def configure_session(pool_sizes=None):
+    """
+    (Re)create the shared session, e.g. to match the crawl concurrency.
+    `pool_sizes` maps host -> max open connections.
+    """
+    global _session
+    sizes = dict(HOST_POOL_SIZES)
+    if pool_sizes:
+        sizes.update(pool_sizes)
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(sizes)
+    return _session
+
+
+def get_session():
+    """
+    Return the shared Session, creating it on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(HOST_POOL_SIZES)
+    return _session
+
+
+def http_get(url, **kwargs):
+    """
+    GET through the shared pooled session (drop-in for requests.get).
+    Paced by the host's token bucket. 429/5xx responses slow the bucket down;
+    they and connection errors are retried with jittered backoff.
+    """
+    bucket = get_bucket(urlparse(url).hostname)
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            response = get_session().get(url, **kwargs)
+        except requests.RequestException:
+            if attempt == MAX_RETRIES:
+                raise
+            bucket.on_retry()
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES:
+            bucket.on_success()
+            return response
+
+        bucket.on_throttle()
+        if attempt == MAX_RETRIES:
+            return response
+        bucket.on_retry()
+        time.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+
+
+def get_pool_stats():
+    """
+    Connection reuse statistics per host:
+    {host: {"requests": n, "connections": n, "reused": n}}
+    """
+    stats = {}
+    if _session is None:
+        return stats
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host_stats["requests"] += pool.num_requests
+            host_stats["connections"] += pool.num_connections
+    for host_stats in stats.values():
+        host_stats["reused"] = max(host_stats["requests"] - host_stats["connections"], 0)
+    return stats
+
+
+def print_pool_stats():
+    """
+    Print connection reuse per host
+    """
+    for host, s in get_pool_stats().items():
+        rate = s["reused"] / s["requests"] if s["requests"] else 0
+        print(f"[{host}] {s['requests']} requests over {s['connections']} connections "
+              f"({s['reused']} reused, {rate:.0%} reuse)")
+
+
+def close_session():
+    """
+    Close all pooled connections
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -1,101 +1,283 @@
 import sqlite3
 import os
+import time
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import pandas as pd
 
+from create_tiktok_db import init_db, VIEW_ROW_TABLES
+from partitions import PartitionRouter, bookkeeping_rows
+from rollups import refresh_rollups
+
 # === Database path ===
 db_path = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\database\tiktokdb.db"
 
-# === CSV files path ===
-file_creators = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\24092025\2\trending_tiktok_creators.csv"
-file_posts = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\24092025\2\trending_tiktok_posts.csv"
-file_hashtags = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\24092025\2\trending_tiktok_hashtags.csv"
+# === CSV archive ===
+# One folder per crawl day: csv_file/<DDMMYYYY>/trending_tiktok_<table>.csv
+archive_dir = "csv_file"
+CSV_FILES = {
+    "creators": "trending_tiktok_creators.csv",
+    "posts": "trending_tiktok_posts.csv",
+    "hashtags": "trending_tiktok_hashtags.csv",
+}
 
-# === Connect to SQLite ===
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# Rows per executemany call; a failing chunk is rolled back on its own
+CHUNK_SIZE = 5000
 
-# === Load CSVs ===
-df_creators = pd.read_csv(file_creators)
-df_posts = pd.read_csv(file_posts)
-df_hashtags = pd.read_csv(file_hashtags)
+# === Column types per table ===
+# IDs are read as text so long numeric strings keep every digit;
+# counts use nullable integers so missing values stay NULL instead of float NaN.
+TABLE_DTYPES = {
+    "creators": {
+        "nickname": str, "uniqueId": str, "user_id": str, "follower_count": "Int64",
+        "bio": str, "creator_rank": "Int64", "video_type": str, "video_item_id": str,
+        "video_name": str, "video_url": str, "profile_url": str,
+        "video_play_count": "Int64", "video_like_count": "Int64", "video_rank": "Int64",
+        "region": str, "crawl_date": str, "crawl_time": str,
+    },
+    "posts": {
+        "url": str, "nickname": str, "user_id": str, "item_id": str, "item_name": str,
+        "genre": str, "like_count": "Int64", "play_count": "Int64",
+        "region": str, "crawl_date": str, "crawl_time": str,
+    },
+    "hashtags": {
+        "hashtag_id": str, "hashtag_name": str, "country": str, "rank": "Int64",
+        "video_views": "Int64", "publish_count": "Int64", "industry_value": str,
+        "region": str, "crawl_date": str, "crawl_time": str,
+    },
+}
 
-# === Insert creators ===
-for _, row in df_creators.iterrows():
-    try:
-        cursor.execute("""
-        INSERT OR IGNORE INTO creators (
-            nickname, uniqueId, user_id, follower_count, bio,
-            creator_rank, video_type, video_item_id, video_name, video_url,
-            profile_url, video_play_count, video_like_count, video_rank,
-            crawl_date, crawl_time
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row.get("nickname"),
-            row.get("uniqueId"),
-            row.get("user_id"),
-            row.get("follower_count"),
-            row.get("bio"),
-            row.get("creator_rank"),
-            row.get("video_type"),
-            row.get("video_item_id"),
-            row.get("video_name"),
-            row.get("video_url"),
-            row.get("profile_url"),
-            row.get("video_play_count"),
-            row.get("video_like_count"),
-            row.get("video_rank"),
-            row.get("crawl_date"),
-            row.get("crawl_time"),
-        ))
-    except Exception as e:
-        print("Creators insert error:", e, row.to_dict())
-
-# === Insert posts ===
-for _, row in df_posts.iterrows():
+
+def load_csv(path, table_name):
+    """
+    Read one crawl CSV with the table's column types.
+    Unknown columns are dropped; columns missing from older files (e.g. region)
+    are simply not inserted and fall back to the table default.
+    """
+    dtypes = TABLE_DTYPES[table_name]
+    return pd.read_csv(path, usecols=lambda c: c in dtypes, dtype=dtypes, keep_default_na=False,
+                       na_values=[""])
+
+
+def frame_to_rows(df):
+    """
+    Convert a DataFrame to a list of tuples for executemany in one pass:
+    every column becomes Python objects and NaN/NA becomes None (NULL).
+    """
+    return df.astype(object).where(df.notna(), None).to_numpy().tolist()
+
+
+def inserted_so_far(conn, table_name):
+    """
+    Running insert counter for a table. A view's trigger also writes its
+    dimension tables, so views count the rows of the table behind each view
+    row instead (append-only: MAX(rowid) grows by one per new row).
+    """
+    row_table = VIEW_ROW_TABLES.get(table_name)
+    if row_table is None:
+        return conn.total_changes
+    return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {row_table}").fetchone()[0]
+
+
+def bulk_insert(conn, table_name, columns, rows, chunk_size=CHUNK_SIZE):
+    """
+    INSERT OR IGNORE rows in chunks inside the caller's transaction.
+    Each chunk runs under a SAVEPOINT, so a bad chunk is rolled back and
+    reported without losing the others.
+    Returns (inserted, failed) row counts.
+    """
+    placeholders = ", ".join(["?" for _ in columns])
+    insert_sql = f"INSERT OR IGNORE INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    inserted = failed = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        before = inserted_so_far(conn, table_name)
+        conn.execute("SAVEPOINT chunk")
+        try:
+            conn.executemany(insert_sql, chunk)
+            conn.execute("RELEASE chunk")
+            inserted += inserted_so_far(conn, table_name) - before
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO chunk")
+            conn.execute("RELEASE chunk")
+            failed += len(chunk)
+            print(f"{table_name.capitalize()} insert error in rows {start}-{start + len(chunk) - 1}: {e}")
+    return inserted, failed
+
+
+# === Archive Backfill ===
+def find_archive_folders(archive_dir):
+    """
+    Dated crawl folders (DDMMYYYY) under the archive, oldest first
+    """
+    folders = []
+    for name in os.listdir(archive_dir):
+        path = os.path.join(archive_dir, name)
+        if not os.path.isdir(path):
+            continue
+        try:
+            day = datetime.strptime(name, "%d%m%Y")
+        except ValueError:
+            continue
+        folders.append((day, path))
+    return [path for _, path in sorted(folders)]
+
+
+def folder_checksum(folder):
+    """
+    SHA-256 over the folder's CSV files (name + content)
+    """
+    digest = hashlib.sha256()
+    for file_name in CSV_FILES.values():
+        path = os.path.join(folder, file_name)
+        if not os.path.exists(path):
+            continue
+        digest.update(file_name.encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_folder(folder):
+    """
+    Worker: read and convert every CSV of one folder.
+    Returns (folder, checksum, {table_name: (columns, rows)}).
+    """
+    parsed = {}
+    for table_name, file_name in CSV_FILES.items():
+        path = os.path.join(folder, file_name)
+        if os.path.exists(path):
+            df = load_csv(path, table_name)
+            parsed[table_name] = (list(df.columns), frame_to_rows(df))
+    return folder, folder_checksum(folder), parsed
+
+
+def row_dates(columns, rows):
+    """
+    Distinct crawl_date values of parsed rows (dates whose rollups need a refresh)
+    """
+    if "crawl_date" not in columns:
+        return set()
+    i = columns.index("crawl_date")
+    return {row[i] for row in rows if row[i]}
+
+
+def ingested_checksums(db_path):
+    """
+    {folder: checksum} of ingested folders, the latest load of each
+    (in partitioned mode a folder is recorded in the partition of its rows)
+    """
+    rows = bookkeeping_rows(db_path, "ingested_folders",
+                            "SELECT ingested_at, folder, checksum FROM ingested_folders")
+    return {folder: checksum for _, folder, checksum in sorted(rows)}
+
+
+def route_parsed(router, parsed):
+    """
+    Split {table_name: (columns, rows)} by writer (month partition):
+    {writer: {table_name: (columns, rows)}}
+    """
+    routed = {}
+    for table_name, (columns, rows) in parsed.items():
+        i = columns.index("crawl_date") if "crawl_date" in columns else None
+        for writer, writer_rows in router.split(rows, lambda row: None if i is None else row[i]).items():
+            routed.setdefault(writer, {})[table_name] = (columns, writer_rows)
+    return routed
+
+
+def backfill_archive(db_path, archive_dir, workers=None, force=False):
+    """
+    Load every dated folder of the CSV archive.
+    Folders are parsed in a process pool; the main process is the only writer
+    and commits each folder (rows, daily rollups, checksum) in its own transaction
+    (one per month partition the folder's rows fall in, checksum in the last).
+    Folders whose checksum is already recorded are skipped unless `force`.
+    """
+    init_db(db_path)
+    router = PartitionRouter(db_path)
     try:
-        cursor.execute("""
-        INSERT OR IGNORE INTO posts (
-            url, nickname, user_id, item_id, item_name, genre,
-            like_count, play_count, crawl_date, crawl_time
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row.get("url"),
-            row.get("nickname"),
-            row.get("user_id"),
-            row.get("item_id"),
-            row.get("item_name"),
-            row.get("genre"),
-            row.get("like_count"),
-            row.get("play_count"),
-            row.get("crawl_date"),
-            row.get("crawl_time"),
-        ))
-    except Exception as e:
-        print("Posts insert error:", e, row.to_dict())
-
-# === Insert hashtags ===
-for _, row in df_hashtags.iterrows():
+        done = ingested_checksums(db_path)
+        folders = find_archive_folders(archive_dir)
+        todo = [
+            folder for folder in folders
+            if force or done.get(os.path.basename(folder)) != folder_checksum(folder)
+        ]
+        print(f"{len(folders)} folders in {archive_dir}, {len(folders) - len(todo)} already ingested, "
+              f"{len(todo)} to load")
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Parse in parallel but write in date order: creator_videos keeps
+            # the first sighting of a video, so the load order matters
+            for folder, checksum, parsed in pool.map(parse_folder, todo):
+                total = inserted = failed = 0
+                routed = route_parsed(router, parsed) or {router.writer(): {}}
+                for n, (writer, tables) in enumerate(routed.items(), start=1):
+                    with writer.transaction() as conn:
+                        for table_name, (columns, rows) in tables.items():
+                            table_inserted, table_failed = bulk_insert(conn, table_name, columns, rows)
+                            refresh_rollups(conn, row_dates(columns, rows), tables=(table_name,))
+                            total += len(rows)
+                            inserted += table_inserted
+                            failed += table_failed
+                        if n == len(routed) and not failed:
+                            conn.execute(
+                                "INSERT OR REPLACE INTO ingested_folders (folder, checksum, row_count, ingested_at) "
+                                "VALUES (?, ?, ?, ?)",
+                                (os.path.basename(folder), checksum, total,
+                                 datetime.now().isoformat(timespec="seconds"))
+                            )
+                print(f"{os.path.basename(folder)}: {total} rows read, {inserted} inserted, {failed} failed")
+        print(f"Backfill finished in {time.perf_counter() - start:.1f}s")
+    finally:
+        router.close()
+
+
+def load_files(db_path, files):
+    """
+    Bulk-load {table_name: csv_path} into the database in a single transaction
+    (one per month partition in partitioned mode)
+    """
+    init_db(db_path)
+    router = PartitionRouter(db_path)
     try:
-        cursor.execute("""
-        INSERT OR IGNORE INTO hashtags (
-            hashtag_id, hashtag_name, country, rank, video_views,
-            publish_count, industry_value, crawl_date, crawl_time
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row.get("hashtag_id"),
-            row.get("hashtag_name"),
-            row.get("country"),
-            row.get("rank"),
-            row.get("video_views"),
-            row.get("publish_count"),
-            row.get("industry_value"),
-            row.get("crawl_date"),
-            row.get("crawl_time"),
-        ))
-    except Exception as e:
-        print("Hashtags insert error:", e, row.to_dict())
-
-# === Commit and close ===
-conn.commit()
-conn.close()
-print("CSV data inserted successfully into database.")
+        parsed = {}
+        for table_name, path in files.items():
+            df = load_csv(path, table_name)
+            parsed[table_name] = (list(df.columns), frame_to_rows(df))
+        for writer, tables in route_parsed(router, parsed).items():
+            with writer.transaction() as conn:
+                for table_name, (columns, rows) in tables.items():
+                    start = time.perf_counter()
+                    inserted, failed = bulk_insert(conn, table_name, columns, rows)
+                    refresh_rollups(conn, row_dates(columns, rows), tables=(table_name,))
+                    print(f"{table_name}: {len(rows)} rows read, {inserted} inserted, "
+                          f"{len(rows) - inserted - failed} duplicates ignored, {failed} failed "
+                          f"({time.perf_counter() - start:.2f}s)")
+    finally:
+        router.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load crawl CSV files into the SQLite database")
+    parser.add_argument("--db", default=db_path, help="SQLite database path")
+    parser.add_argument("--archive", default=archive_dir,
+                        help="archive of csv_file/<DDMMYYYY> folders to backfill")
+    parser.add_argument("--folder", help="load only this one folder (no checksum bookkeeping)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="reload folders even if already ingested")
+    args = parser.parse_args()
+
+    if args.folder:
+        load_files(args.db, {
+            table_name: os.path.join(args.folder, file_name)
+            for table_name, file_name in CSV_FILES.items()
+            if os.path.exists(os.path.join(args.folder, file_name))
+        })
+    else:
+        backfill_archive(args.db, args.archive, workers=args.workers, force=args.force)
+    print("CSV data inserted successfully into database.")
@@ -0,0 +1,119 @@
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# === Number Formatting (K / M) ===
+# Shared by the three dashboards. format_numbers() formats a whole column at
+# once with NumPy masks instead of one Python call per cell; format_number()
+# stays for the single KPI values.
+
+
+def format_number(n, na=""):
+    """
+    1234 -> "1.2K", 2500000 -> "2.5M", 999 -> "999"; missing -> `na`
+    """
+    try:
+        if pd.isna(n) or n == "":
+            return na
+        if n >= 1_000_000:
+            return f"{n/1_000_000:.1f}M"
+        elif n >= 1_000:
+            return f"{n/1_000:.1f}K"
+        else:
+            return str(int(n))
+    except:
+        return str(n)
+
+
+# Every string the K and small buckets can produce, indexed by tenths / value
+# (1.0K .. 1000.0K and 0 .. 999), so those buckets are a single array lookup
+THOUSANDS_TEXT = np.array([f"{t // 10}.{t % 10}K" for t in range(10_001)], dtype=object)
+SMALL_TEXT = np.array([str(i) for i in range(1_000)], dtype=object)
+
+
+def _round_tenths(scaled):
+    """
+    Round to tenths on integers; also flags values on a .x5 tie, which keep
+    Python's own (binary-exact) rounding
+    """
+    tenths = scaled * 10
+    rounded = np.floor(tenths + 0.5).astype(np.int64)
+    tie = np.abs(tenths - np.floor(tenths) - 0.5) < 1e-6
+    return rounded, tie
+
+
+def format_numbers(values, na=""):
+    """
+    Vectorized format_number over a column; returns a Series of strings
+    with the same index (non-numeric values count as missing)
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce")
+    arr = values.to_numpy(dtype="float64", na_value=np.nan)
+    out = np.full(arr.shape, na, dtype=object)
+
+    # Bucket the whole column with masks
+    valid = ~np.isnan(arr)
+    millions = valid & (arr >= 1_000_000)
+    thousands = valid & (arr >= 1_000) & ~millions
+    small = valid & ~millions & ~thousands
+
+    # Millions: unbounded, so only the distinct rounded values are formatted
+    scaled = arr[millions] / 1_000_000
+    rounded, tie = _round_tenths(scaled)
+    uniques, inverse = np.unique(rounded, return_inverse=True)
+    text = np.array([f"{t // 10}.{t % 10}M" for t in uniques.tolist()], dtype=object)[inverse]
+    text[tie] = [f"{v:.1f}M" for v in scaled[tie]]
+    out[millions] = text
+
+    scaled = arr[thousands] / 1_000
+    rounded, tie = _round_tenths(scaled)
+    text = THOUSANDS_TEXT[rounded]
+    text[tie] = [f"{v:.1f}K" for v in scaled[tie]]
+    out[thousands] = text
+
+    # Below 1000, including negatives, which have no K / M bucket
+    ints = arr[small].astype(np.int64)
+    in_table = ints >= 0
+    text = np.empty(len(ints), dtype=object)
+    text[in_table] = SMALL_TEXT[ints[in_table]]
+    text[~in_table] = [str(i) for i in ints[~in_table].tolist()]
+    out[small] = text
+    return pd.Series(out, index=values.index)
+
+
+# === Micro-benchmark ===
+def benchmark(rows, repeat=5):
+    """
+    Time .apply(format_number) against format_numbers on a synthetic count
+    column (log-uniform 0..1e9 with ~2% missing) and check they agree
+    """
+    rng = np.random.default_rng(0)
+    counts = np.floor(10 ** rng.uniform(0, 9, rows)).astype(np.int64)
+    column = pd.Series(counts, dtype="Int64")
+    column[rng.random(rows) < 0.02] = pd.NA
+
+    def best_of(func):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    apply_time, expected = best_of(lambda: column.apply(format_number))
+    vector_time, result = best_of(lambda: format_numbers(column))
+    if not expected.equals(result):
+        raise SystemExit("format_numbers output differs from format_number")
+    print(f"{rows} values: apply {apply_time * 1000:.1f} ms, vectorized {vector_time * 1000:.1f} ms "
+          f"({apply_time / vector_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized number formatter")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        benchmark(rows)
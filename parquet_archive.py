@@ -0,0 +1,185 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from insert_csv_to_db import CSV_FILES, TABLE_DTYPES, archive_dir, find_archive_folders, load_csv
+
+# === Parquet Archive ===
+# Columnar copy of the crawl data: parquet_file/<table>/crawl_date=.../region=.../<vertical>=.../*.parquet
+# Reads only open the partitions a date / region filter selects and only the
+# columns asked for, with the types below instead of re-parsing CSV text.
+parquet_dir = "parquet_file"
+
+# Hive partition keys per table (directory levels, outermost first)
+PARTITION_COLUMNS = {
+    "posts": ["crawl_date", "region", "genre"],
+    "creators": ["crawl_date", "region", "video_type"],
+    "hashtags": ["crawl_date", "region"],
+}
+
+# Older CSV files have no region column; rows get the tables' DEFAULT 'MY'
+DEFAULT_REGION = "MY"
+
+COMPRESSION = "zstd"
+
+ARROW_TYPES = {str: pa.string(), "Int64": pa.int64()}
+
+
+def table_schema(table_name):
+    """
+    Arrow schema of a table, from the CSV loader's column types
+    """
+    return pa.schema([(column, ARROW_TYPES[dtype]) for column, dtype in TABLE_DTYPES[table_name].items()])
+
+
+def partitioning(table_name):
+    schema = table_schema(table_name)
+    return ds.partitioning(pa.schema([schema.field(c) for c in PARTITION_COLUMNS[table_name]]), flavor="hive")
+
+
+def write_partitions(df, table_name, out_dir=parquet_dir, tag=""):
+    """
+    Write rows of one table into its partitioned dataset.
+    Files are named after the rows' crawl_time (one per crawl run), so writing
+    the same run again - a resumed crawl, or its CSV converted later from the
+    archive - replaces its files instead of duplicating rows, while other
+    runs of the same day are kept. `tag` is added to the file names of a
+    write that holds only part of a run (compact_db.py archiving).
+    """
+    df = df.copy()
+    if "region" not in df.columns:
+        df["region"] = DEFAULT_REGION
+    df["region"] = df["region"].fillna(DEFAULT_REGION)
+    schema = table_schema(table_name)
+    for column, dtype in TABLE_DTYPES[table_name].items():
+        if column not in df.columns:
+            df[column] = None
+        df[column] = df[column].astype("string" if dtype is str else dtype)
+
+    written = 0
+    for crawl_time, run_rows in df.groupby(df["crawl_time"].fillna(""), sort=False):
+        table = pa.Table.from_pandas(run_rows[schema.names], schema=schema, preserve_index=False)
+        ds.write_dataset(
+            table,
+            os.path.join(out_dir, table_name),
+            format="parquet",
+            partitioning=partitioning(table_name),
+            existing_data_behavior="overwrite_or_ignore",
+            basename_template=f"{table_name}-{crawl_time.replace(':', '')}{tag}-{{i}}.parquet",
+            file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+        )
+        written += table.num_rows
+    return written
+
+
+def read_table(table_name, columns=None, start=None, end=None, regions=None, out_dir=parquet_dir):
+    """
+    Read a table from the Parquet archive as a DataFrame.
+    Only `columns` are decoded, and only partitions within start..end
+    ('YYYY-MM-DD', inclusive) and `regions` are opened.
+    """
+    dataset = ds.dataset(os.path.join(out_dir, table_name), format="parquet",
+                         partitioning=partitioning(table_name))
+    condition = None
+    for term in (
+        ds.field("crawl_date") >= str(start) if start else None,
+        ds.field("crawl_date") <= str(end) if end else None,
+        ds.field("region").isin(list(regions)) if regions else None,
+    ):
+        if term is not None:
+            condition = term if condition is None else condition & term
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+# === CSV Conversion ===
+def export_files(files, out_dir=parquet_dir):
+    """
+    Convert {table_name: csv_path} (one crawl's CSV files) to Parquet;
+    returns {table_name: rows written}
+    """
+    written = {}
+    for table_name, path in files.items():
+        written[table_name] = write_partitions(load_csv(path, table_name), table_name, out_dir)
+    return written
+
+
+def convert_folder(folder, out_dir):
+    """
+    Worker: convert one csv_file/<DDMMYYYY> folder; returns (folder, {table_name: rows})
+    """
+    return folder, export_files({
+        table_name: os.path.join(folder, file_name)
+        for table_name, file_name in CSV_FILES.items()
+        if os.path.exists(os.path.join(folder, file_name))
+    }, out_dir)
+
+
+def convert_archive(archive_dir=archive_dir, out_dir=parquet_dir, workers=None):
+    """
+    Convert every dated folder of the CSV archive, one process per folder
+    """
+    folders = find_archive_folders(archive_dir)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(convert_folder, folder, out_dir) for folder in folders]
+        for future in as_completed(futures):
+            folder, written = future.result()
+            print(f"{os.path.basename(folder)}: " + ", ".join(f"{n} {t}" for t, n in written.items()))
+    print(f"Converted {len(folders)} folders in {time.perf_counter() - start:.1f}s")
+
+
+# === Size / read comparison ===
+def directory_size(path, suffix):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names if name.endswith(suffix)
+    )
+
+
+def compare(archive_dir=archive_dir, out_dir=parquet_dir, table_name="creators",
+            columns=("crawl_date", "video_item_id", "video_play_count")):
+    """
+    Archive size and time to read a few columns of one table across every day,
+    from the CSV folders versus the Parquet dataset
+    """
+    csv_bytes = directory_size(archive_dir, ".csv")
+    parquet_bytes = directory_size(out_dir, ".parquet")
+    print(f"Archive size: CSV {csv_bytes / 1e6:.1f} MB, Parquet {parquet_bytes / 1e6:.1f} MB "
+          f"({csv_bytes / parquet_bytes:.1f}x smaller)")
+
+    columns = list(columns)
+    start = time.perf_counter()
+    frames = [load_csv(os.path.join(folder, CSV_FILES[table_name]), table_name)[columns]
+              for folder in find_archive_folders(archive_dir)]
+    csv_rows = sum(len(frame) for frame in frames)
+    csv_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parquet_rows = len(read_table(table_name, columns=columns, out_dir=out_dir))
+    parquet_time = time.perf_counter() - start
+    print(f"{table_name} {columns}: CSV {csv_rows} rows in {csv_time * 1000:.0f} ms, "
+          f"Parquet {parquet_rows} rows in {parquet_time * 1000:.0f} ms ({csv_time / parquet_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the crawl data as partitioned Parquet")
+    parser.add_argument("--out", default=parquet_dir, help="Parquet dataset directory")
+    parser.add_argument("--archive", default=archive_dir,
+                        help="archive of csv_file/<DDMMYYYY> folders to convert")
+    parser.add_argument("--folder", help="convert only this one folder")
+    parser.add_argument("--workers", type=int, default=None, help="converter processes (default: CPU count)")
+    parser.add_argument("--compare", action="store_true",
+                        help="afterwards, compare archive size and column read time with the CSV files")
+    args = parser.parse_args()
+
+    if args.folder:
+        folder, written = convert_folder(args.folder, args.out)
+        print(f"{os.path.basename(folder)}: " + ", ".join(f"{n} {t}" for t, n in written.items()))
+    else:
+        convert_archive(args.archive, args.out, workers=args.workers)
+    if args.compare:
+        compare(args.archive, args.out)
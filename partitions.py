@@ -0,0 +1,406 @@
+import os
+import re
+import stat
+import shutil
+import sqlite3
+import threading
+import argparse
+from collections import OrderedDict
+from datetime import date
+
+from create_tiktok_db import (
+    init_db, TABLES, SNAPSHOT_TABLES, VIEW_SELECT, VIEW_FROM, LATEST_TABLES, ROLLUP_TABLES,
+)
+from db_writer import SQLiteWriter
+
+# === Month Partitions ===
+# Optional storage mode: every crawl month lives in its own SQLite file,
+# database/tiktokdb_partitions/<YYYY-MM>.db, next to the main database.
+# The mode is on while that directory exists (`--split` creates it).
+# Each partition is self-contained (the versions, creator profiles and latest
+# / rollup rows its days read), so a day's reads open one small file.
+# Checkpoints and ingested folders are kept with the rows they record, in the
+# partition the rows went to; crawl runs stay in the main database.
+PARTITION_SUFFIX = "_partitions"
+PARTITION_FILE = re.compile(r"^(\d{4}-\d{2})\.db$")
+
+# Read connections kept open, one per set of attached months (LRU)
+READ_POOL_SIZE = 4
+
+# Crawl-ts range of the month :m ('YYYY-MM')
+MONTH_TS = ("{ts} >= CAST(strftime('%s', :m || '-01') AS INTEGER) "
+            "AND {ts} < CAST(strftime('%s', :m || '-01', '+1 month') AS INTEGER)")
+MONTH_DATES = "{date} >= :m || '-01' AND {date} < date(:m || '-01', '+1 month')"
+
+
+def partition_dir(db_path):
+    return os.path.splitext(db_path)[0] + PARTITION_SUFFIX
+
+
+def is_partitioned(db_path):
+    return os.path.isdir(partition_dir(db_path))
+
+
+def month_of(crawl_date):
+    """
+    'YYYY-MM' of a crawl date (or of a month); rows without a date belong to
+    the current month
+    """
+    return str(crawl_date or date.today())[:7]
+
+
+def partition_path(db_path, month):
+    return os.path.join(partition_dir(db_path), f"{month}.db")
+
+
+def list_months(directory):
+    """
+    Months with a partition file in a partitions directory, oldest first
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(match.group(1) for match in map(PARTITION_FILE.match, os.listdir(directory)) if match)
+
+
+def is_frozen(path):
+    """
+    A frozen partition has no write permission bits (see freeze_partition)
+    """
+    return os.path.exists(path) and not os.stat(path).st_mode & stat.S_IWUSR
+
+
+def data_files(db_path):
+    """
+    Files holding crawled data: the database itself, or its writable partitions
+    """
+    if not is_partitioned(db_path):
+        return [db_path]
+    return [path for path in (partition_path(db_path, month) for month in list_months(partition_dir(db_path)))
+            if not is_frozen(path)]
+
+
+# === Write Router ===
+def open_writer(db_path, crawl_date=None):
+    """
+    SQLiteWriter for rows crawled on `crawl_date`: the database itself, or in
+    partitioned mode the month's partition (created on first use). The
+    partition has its own crawl_checkpoints / ingested_folders, so rows and
+    their bookkeeping commit in one file (a transaction over an attached WAL
+    database is not atomic across the two files).
+    Without a date (crawl runs only) it is always the database itself.
+    """
+    if crawl_date is None or not is_partitioned(db_path):
+        return SQLiteWriter(db_path)
+    month = month_of(crawl_date)
+    path = partition_path(db_path, month)
+    if is_frozen(path):
+        raise sqlite3.OperationalError(f"Partition {month} is frozen (read-only); "
+                                       f"run partitions.py --thaw {month} to write to it")
+    init_db(path, partition=True)
+    return SQLiteWriter(path)
+
+
+def bookkeeping_rows(db_path, table, sql, params=()):
+    """
+    Rows of a query on a bookkeeping table, from the database and from every
+    partition that has the table (partitions made before they kept their own
+    bookkeeping have none)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    for month in list_months(partition_dir(db_path)):
+        path = partition_path(db_path, month)
+        conn = sqlite3.connect(f"file:{path}?mode=ro" + ("&immutable=1" if is_frozen(path) else ""), uri=True)
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+                rows += conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    return rows
+
+
+class PartitionRouter:
+    """
+    Writers of one load, opened on demand: one per crawl month in partitioned
+    mode, a single one for every date otherwise
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.partitioned = is_partitioned(db_path)
+        self.writers = {}
+
+    def writer(self, crawl_date=None):
+        """
+        Writer for rows of a crawl date (or month); without one, the database
+        itself
+        """
+        month = month_of(crawl_date) if self.partitioned and crawl_date is not None else None
+        if month not in self.writers:
+            self.writers[month] = open_writer(self.db_path, month)
+        return self.writers[month]
+
+    def split(self, rows, crawl_date_of):
+        """
+        Group rows by the writer they go to: {writer: rows}, oldest month first
+        """
+        if not rows:
+            return {}
+        if not self.partitioned:
+            return {self.writer(): rows}
+        months = {}
+        for row in rows:
+            months.setdefault(month_of(crawl_date_of(row)), []).append(row)
+        return {self.writer(month): month_rows for month, month_rows in sorted(months.items())}
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+# === Read Layer ===
+class PartitionedReader:
+    """
+    Read-only access to the partitions of one database. A read ATTACHes only
+    the months its date range touches to an in-memory connection; with more
+    than one month, TEMP views (UNION ALL of the attached partitions) stand in
+    for every table and view, so the same SQL runs in both storage modes.
+    Connections are pooled per set of months; frozen partitions are opened
+    immutable, so SQLite skips locking and keeps their pages cached.
+    Sessions run in separate threads, so each read holds the lock.
+    """
+
+    def __init__(self, directory, cached_statements=128, pool_size=READ_POOL_SIZE):
+        self.directory = directory
+        self.cached_statements = cached_statements
+        self.pool_size = pool_size
+        self.pool = OrderedDict()
+        self.lock = threading.Lock()
+        self.max_months = sqlite3.connect(":memory:").getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+    def months_between(self, start, end):
+        """
+        Partition months touched by start..end ('YYYY-MM-DD', inclusive)
+        """
+        return [month for month in list_months(self.directory) if month_of(start) <= month <= month_of(end)]
+
+    def connect(self, months):
+        conn = sqlite3.connect("file::memory:", uri=True, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for i, (month, frozen) in enumerate(months):
+            path = os.path.join(self.directory, f"{month}.db")
+            conn.execute(f"ATTACH DATABASE ? AS p{i}", (f"file:{path}?mode=ro" + ("&immutable=1" if frozen else ""),))
+        if len(months) > 1:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM p0.sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'")]
+            for name in names:
+                union = " UNION ALL ".join(f"SELECT * FROM p{i}.{name}" for i in range(len(months)))
+                conn.execute(f"CREATE TEMP VIEW {name} AS {union}")
+        return conn
+
+    def connection(self, months):
+        """
+        Pooled connection with exactly these months attached
+        """
+        key = tuple((month, is_frozen(os.path.join(self.directory, f"{month}.db"))) for month in months)
+        if key in self.pool:
+            self.pool.move_to_end(key)
+        else:
+            self.pool[key] = self.connect(key)
+            if len(self.pool) > self.pool_size:
+                self.pool.popitem(last=False)[1].close()
+        return self.pool[key]
+
+    def read(self, func, start, end, *args):
+        """
+        func(conn, *args) over the partitions of start..end. A range with no
+        partition reads the newest one (its rows are all outside the range).
+        """
+        months = self.months_between(start, end) or list_months(self.directory)[-1:]
+        if not months:
+            raise FileNotFoundError(f"No partitions in {self.directory}")
+        if len(months) > self.max_months:
+            raise ValueError(f"{start}..{end} spans {len(months)} partitions; "
+                             f"SQLite attaches at most {self.max_months}")
+        with self.lock:
+            return func(self.connection(months), *args)
+
+    def read_bounds(self, func, *args):
+        """
+        (low, high) of a reader returning a pair, e.g. a table's date range:
+        low from the oldest partition that has one, high from the newest
+        """
+        months = list_months(self.directory)
+        with self.lock:
+            low = next((value for value in (func(self.connection([m]), *args)[0] for m in months)
+                        if value is not None), None)
+            high = next((value for value in (func(self.connection([m]), *args)[1] for m in reversed(months))
+                         if value is not None), None)
+        return low, high
+
+    def data_version(self):
+        """
+        Changes when a partition is added, frozen or written to (writable
+        partitions' file and WAL sizes and times; frozen ones never change)
+        """
+        version = []
+        for month in list_months(self.directory):
+            path = os.path.join(self.directory, f"{month}.db")
+            if is_frozen(path):
+                version.append((month, "frozen"))
+                continue
+            for file in (path, path + "-wal"):
+                if os.path.exists(file):
+                    info = os.stat(file)
+                    version.append((file, info.st_size, info.st_mtime_ns))
+        return tuple(version)
+
+
+# === Splitting / Freezing ===
+def split_months(conn):
+    """
+    Crawl months with stored rows in a single-file database
+    """
+    storage = list(SNAPSHOT_TABLES.values()) + ["creator_snapshots", "creator_videos"]
+    return [row[0] for row in conn.execute(" UNION ".join(
+        f"SELECT DISTINCT strftime('%Y-%m', crawl_ts, 'unixepoch') FROM {table}" for table in storage
+    ) + " ORDER BY 1")]
+
+
+def copy_month(conn, month):
+    """
+    Copy one month from the main database into the partition attached as
+    `part`. Posts and hashtags go through the partition's views, so its
+    insert triggers rebuild the versions its snapshots read. Creator videos
+    first seen in an earlier month are copied too when the month's
+    creators_latest reads them.
+    """
+    params = {"m": month}
+    for table in list(LATEST_TABLES) + list(ROLLUP_TABLES):
+        conn.execute(f"INSERT INTO part.{table} SELECT * FROM main.{table} "
+                     f"WHERE {MONTH_DATES.format(date='crawl_date')}", params)
+    for table in SNAPSHOT_TABLES:
+        conn.execute(f"INSERT INTO part.{table} SELECT {VIEW_SELECT[table]} FROM {VIEW_FROM[table]} "
+                     f"WHERE {MONTH_TS.format(ts='s.crawl_ts')} ORDER BY s.crawl_ts", params)
+    conn.execute(f"INSERT INTO part.creator_videos SELECT * FROM main.creator_videos "
+                 f"WHERE {MONTH_TS.format(ts='crawl_ts')}", params)
+    conn.execute("""
+        INSERT OR IGNORE INTO part.creator_videos SELECT v.* FROM part.creator_latest_videos AS l
+        JOIN main.creator_videos AS v
+          ON v.user_id = l.user_id AND v.video_item_id = l.video_item_id AND v.region = l.region""")
+    conn.execute(f"INSERT INTO part.creator_snapshots SELECT * FROM main.creator_snapshots "
+                 f"WHERE {MONTH_TS.format(ts='crawl_ts')}", params)
+    conn.execute("""
+        INSERT OR IGNORE INTO part.creator_snapshots SELECT s.* FROM part.creator_videos AS v
+        JOIN main.creator_snapshots AS s
+          ON s.user_id = v.user_id AND s.region = v.region AND s.video_type = v.video_type AND s.crawl_ts = v.crawl_ts""")
+    conn.execute("INSERT INTO part.creator_profile_versions SELECT * FROM main.creator_profile_versions "
+                 "WHERE user_id IN (SELECT user_id FROM part.creator_snapshots)")
+
+
+def split_database(db_path):
+    """
+    Turn on partitioned mode: move every month of a single-file database into
+    its own partition. Writers are locked out until the move is done; the
+    partitions are built in a temporary directory and renamed into place.
+    """
+    if is_partitioned(db_path):
+        print(f"{db_path} is already partitioned ({partition_dir(db_path)})")
+        return
+    init_db(db_path)
+    building = partition_dir(db_path) + ".tmp"
+    # Leftovers of an interrupted split would be renamed in with the new months
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    lock = SQLiteWriter(db_path)
+    try:
+        with lock.transaction() as main:
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            try:
+                for month in split_months(conn):
+                    path = os.path.join(building, f"{month}.db")
+                    init_db(path, partition=True)
+                    conn.execute("ATTACH DATABASE ? AS part", (path,))
+                    conn.execute("BEGIN")
+                    copy_month(conn, month)
+                    conn.execute("COMMIT")
+                    conn.execute("ANALYZE part")
+                    conn.execute("DETACH DATABASE part")
+                    print(f"{month}: {os.path.getsize(path) / 1e6:.1f} MB")
+            finally:
+                conn.close()
+            os.replace(building, partition_dir(db_path))
+            for table in list(TABLES) + list(LATEST_TABLES) + list(ROLLUP_TABLES):
+                main.execute(f"DELETE FROM {table}")
+        lock.conn.execute("VACUUM")
+    except BaseException:
+        # Gone already once the months were renamed into place
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+    finally:
+        lock.close()
+    print(f"Partitioned {db_path} into {partition_dir(db_path)}")
+
+
+def freeze_partition(path):
+    """
+    Make a finished month read-only: fold its WAL back, leave WAL mode (a
+    read-only WAL database still needs a writable -shm file), defragment,
+    refresh statistics and drop the write permission bits. Readers then open
+    it immutable. A frozen partition is not migrated by later schema
+    upgrades until it is thawed.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def thaw_partition(path):
+    """
+    Make a frozen partition writable again (the next writer turns WAL back on)
+    """
+    os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) | stat.S_IWUSR)
+
+
+def show_partitions(db_path):
+    directory = partition_dir(db_path)
+    months = list_months(directory)
+    if not months:
+        print(f"{db_path} is not partitioned" if not is_partitioned(db_path) else f"No partitions in {directory}")
+        return
+    for month in months:
+        path = partition_path(db_path, month)
+        print(f"{month}  {os.path.getsize(path) / 1e6:8.1f} MB  {'frozen' if is_frozen(path) else 'writable'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Month-partitioned storage: split, freeze and list partitions")
+    parser.add_argument("--db", default="database/tiktokdb.db", help="main SQLite database path")
+    parser.add_argument("--split", action="store_true",
+                        help="move the database's rows into month partitions (turns partitioned mode on)")
+    parser.add_argument("--freeze-before", nargs="?", const=month_of(None), metavar="YYYY-MM",
+                        help="make every partition before this month read-only (default: the current month)")
+    parser.add_argument("--thaw", metavar="YYYY-MM", help="make a frozen partition writable again")
+    args = parser.parse_args()
+
+    if args.split:
+        split_database(args.db)
+    if args.freeze_before:
+        for month in list_months(partition_dir(args.db)):
+            path = partition_path(args.db, month)
+            if month < args.freeze_before and not is_frozen(path):
+                freeze_partition(path)
+                print(f"Froze {month}")
+    if args.thaw:
+        thaw_partition(partition_path(args.db, args.thaw))
+        print(f"Thawed {args.thaw}")
+    show_partitions(args.db)
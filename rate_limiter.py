@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+
+# === Rate Settings (requests per second, per host) ===
+# Start rate, floor and ceiling. The bucket speeds up additively while the
+# upstream answers normally and halves its rate on every 429/5xx (AIMD).
+HOST_RATES = {
+    "www.tiktok.com": {"rate": 4.0, "min_rate": 0.25, "max_rate": 10.0},
+    "ads.tiktok.com": {"rate": 2.0, "min_rate": 0.25, "max_rate": 5.0},
+}
+DEFAULT_RATE = {"rate": 2.0, "min_rate": 0.25, "max_rate": 5.0}
+RATE_INCREASE = 0.1     # req/s added after each successful response
+RATE_DECREASE = 0.5     # rate multiplier after a throttle
+
+# === Retry Settings ===
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0      # seconds, doubled every attempt
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with adaptive rate and request counters
+    """
+
+    def __init__(self, rate, min_rate, max_rate, capacity=2):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.requests = 0
+        self.retries = 0
+        self.throttles = 0
+        self.first_request = None
+        self.last_request = None
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    if self.first_request is None:
+                        self.first_request = now
+                    self.last_request = now
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def on_throttle(self):
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+            # Drop any saved burst so the slower pace applies immediately
+            self.tokens = min(self.tokens, 0)
+
+    def on_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def effective_rate(self):
+        """
+        Requests per second actually sent so far
+        """
+        if self.first_request is None or self.last_request == self.first_request:
+            return 0.0
+        return (self.requests - 1) / (self.last_request - self.first_request)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "current_rate": round(self.rate, 2),
+            "effective_rate": round(self.effective_rate(), 2),
+        }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host):
+    """
+    Return the token bucket for a host, creating it on first use
+    """
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(**HOST_RATES.get(host, DEFAULT_RATE))
+                _buckets[host] = bucket
+    return bucket
+
+
+def reset_buckets():
+    """
+    Forget all per-host rates and counters
+    """
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Exponential backoff with full jitter; honours a numeric Retry-After header
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+def get_rate_stats():
+    """
+    Counters per host: {host: {"requests", "retries", "throttles", ...}}
+    """
+    return {host: bucket.stats() for host, bucket in _buckets.items()}
+
+
+def print_rate_stats():
+    """
+    Print retries, throttles and effective request rate per host
+    """
+    for host, s in get_rate_stats().items():
+        print(f"[{host}] {s['requests']} requests, {s['retries']} retries, "
+              f"{s['throttles']} throttled, {s['effective_rate']} req/s effective "
+              f"(rate now {s['current_rate']} req/s)")
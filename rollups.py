@@ -0,0 +1,229 @@
+import sqlite3
+import argparse
+
+import pandas as pd
+
+from create_tiktok_db import VIEW_SELECT, VIEW_FROM
+
+# === Daily Rollups ===
+# Per-day derived tables: the latest snapshot of every entity (<table>_latest)
+# and the aggregates behind the dashboard KPI rows, bar charts and top lists.
+# They are rebuilt for the affected dates every time rows are ingested
+# (crawler writer, save_to_sqlite, CSV backfill), so the dashboards read unique
+# rows and a handful of aggregates instead of reprocessing a whole raw day.
+
+TOP_N = 20
+
+# Entity key of each raw table within a day; the latest snapshot per key
+# (highest crawl_ts, then last inserted) goes into <table>_latest
+SNAPSHOT_KEYS = {
+    "posts": ["item_id", "user_id"],
+    "creators": ["user_id", "video_item_id"],
+    "hashtags": ["hashtag_id", "hashtag_name"],
+}
+
+# Rows of the crawl date :d in the storage tables, as a crawl_ts range (index range)
+DAY_TS = ("{ts} >= CAST(strftime('%s', :d) AS INTEGER) "
+          "AND {ts} < CAST(strftime('%s', :d, '+1 day') AS INTEGER)")
+
+# posts / hashtags: full rows rebuilt from the day's metrics rows and their
+# versions (VIEW_SELECT / VIEW_FROM of the views), one per entity key
+LATEST_SQL = {
+    table: [
+        f"DELETE FROM {table}_latest WHERE crawl_date = :d",
+        f"""INSERT INTO {table}_latest SELECT {VIEW_SELECT[table]} FROM {VIEW_FROM[table]} WHERE s.rowid IN (
+            SELECT snapshot_id FROM (
+                SELECT snapshot_id, ROW_NUMBER() OVER (
+                    PARTITION BY {', '.join(SNAPSHOT_KEYS[table])} ORDER BY crawl_time DESC, snapshot_id DESC) AS snapshot
+                FROM (SELECT s.rowid AS snapshot_id, {VIEW_SELECT[table]} FROM {VIEW_FROM[table]}
+                      WHERE {DAY_TS.format(ts="s.crawl_ts")}))
+            WHERE snapshot = 1)""",
+    ]
+    for table in VIEW_SELECT
+}
+
+# creators_latest is a view over creator_latest_videos: only the winning keys
+# of creator_videos are stored
+LATEST_SQL["creators"] = [
+    "DELETE FROM creator_latest_videos WHERE crawl_date = :d",
+    f"""INSERT INTO creator_latest_videos (crawl_date, user_id, video_item_id, region)
+    SELECT :d, user_id, video_item_id, region FROM (
+        SELECT user_id, video_item_id, region, ROW_NUMBER() OVER (
+            PARTITION BY user_id, video_item_id ORDER BY crawl_ts DESC, rowid DESC) AS snapshot
+        FROM creator_videos WHERE {DAY_TS.format(ts="crawl_ts")})
+    WHERE snapshot = 1""",
+]
+
+# One row per entity per day
+POSTS_DAY = "(SELECT * FROM posts_latest WHERE crawl_date = :d)"
+CREATORS_DAY = "(SELECT * FROM creators_latest WHERE crawl_date = :d)"
+HASHTAGS_DAY = "(SELECT * FROM hashtags_latest WHERE crawl_date = :d)"
+
+# like / play per row; NULL when there are no plays so AVG-style sums skip it
+POSTS_RATIO = "CAST(like_count AS REAL) / NULLIF(play_count, 0)"
+CREATORS_RATIO = "CAST(video_like_count AS REAL) / NULLIF(video_play_count, 0)"
+
+REFRESH_SQL = {
+    "posts": [
+        "DELETE FROM posts_daily_genre WHERE crawl_date = :d",
+        f"""INSERT INTO posts_daily_genre
+            (crawl_date, genre, video_count, play_sum, like_sum, engagement_sum, engagement_count)
+        SELECT :d, genre, COUNT(*), SUM(play_count), SUM(like_count), SUM({POSTS_RATIO}), COUNT({POSTS_RATIO})
+        FROM {POSTS_DAY} GROUP BY genre""",
+        "DELETE FROM posts_daily_creator WHERE crawl_date = :d",
+        f"""INSERT INTO posts_daily_creator (crawl_date, nickname, video_count, play_sum, like_sum)
+        SELECT :d, nickname, COUNT(*), SUM(play_count), SUM(like_count)
+        FROM {POSTS_DAY} GROUP BY nickname""",
+    ],
+    "creators": [
+        "DELETE FROM creators_daily WHERE crawl_date = :d",
+        f"""INSERT INTO creators_daily
+            (crawl_date, creator_count, follower_sum, video_count, view_sum, like_sum,
+             engagement_sum, engagement_count)
+        SELECT :d, COUNT(DISTINCT user_id),
+               (SELECT SUM(followers) FROM (
+                    SELECT MAX(follower_count) AS followers FROM {CREATORS_DAY} GROUP BY user_id)),
+               COUNT(DISTINCT video_item_id), SUM(video_play_count), SUM(video_like_count),
+               SUM({CREATORS_RATIO}), COUNT({CREATORS_RATIO})
+        FROM {CREATORS_DAY} HAVING COUNT(*) > 0""",
+        "DELETE FROM creators_daily_type WHERE crawl_date = :d",
+        f"""INSERT INTO creators_daily_type
+            (crawl_date, video_type, creator_count, video_count, view_sum, like_sum)
+        SELECT :d, video_type, COUNT(DISTINCT user_id), COUNT(DISTINCT video_item_id),
+               SUM(video_play_count), SUM(video_like_count)
+        FROM {CREATORS_DAY} GROUP BY video_type""",
+        "DELETE FROM daily_top WHERE crawl_date = :d AND list_name IN ('creators_by_followers', 'videos_by_views')",
+        f"""INSERT INTO daily_top (crawl_date, list_name, rank, entity_id, label, url, value, value2)
+        SELECT :d, 'creators_by_followers', ROW_NUMBER() OVER (ORDER BY followers DESC),
+               user_id, nickname, profile_url, followers, NULL
+        FROM (SELECT user_id, nickname, profile_url, MAX(follower_count) AS followers
+              FROM {CREATORS_DAY} GROUP BY user_id, nickname, profile_url
+              ORDER BY followers DESC LIMIT :n)""",
+        f"""INSERT INTO daily_top (crawl_date, list_name, rank, entity_id, label, url, value, value2)
+        SELECT :d, 'videos_by_views', ROW_NUMBER() OVER (ORDER BY plays DESC),
+               video_item_id, nickname, video_url, plays, likes
+        FROM (SELECT video_item_id, video_url, nickname,
+                     MAX(video_play_count) AS plays, MAX(video_like_count) AS likes
+              FROM {CREATORS_DAY} GROUP BY video_item_id, video_url, nickname
+              ORDER BY plays DESC LIMIT :n)""",
+    ],
+    "hashtags": [
+        "DELETE FROM hashtags_daily_industry WHERE crawl_date = :d",
+        f"""INSERT INTO hashtags_daily_industry
+            (crawl_date, industry_value, hashtag_count, view_sum, publish_sum)
+        SELECT :d, COALESCE(industry_value, ''), COUNT(DISTINCT hashtag_name),
+               SUM(video_views), SUM(publish_count)
+        FROM {HASHTAGS_DAY} WHERE hashtag_name IS NOT NULL
+        GROUP BY COALESCE(industry_value, '')""",
+    ],
+}
+
+
+def refresh_rollups(conn, dates, tables=tuple(REFRESH_SQL)):
+    """
+    Rebuild the latest-snapshot rows and rollups of the given crawl dates from
+    the raw tables. Runs inside the caller's transaction; idempotent per date.
+    """
+    for crawl_date in sorted(set(dates)):
+        params = {"d": crawl_date, "n": TOP_N}
+        for table in tables:
+            for sql in LATEST_SQL[table] + REFRESH_SQL[table]:
+                conn.execute(sql, params)
+
+
+def rebuild_all_rollups(conn):
+    """
+    Rebuild the rollups of every crawl date in the database
+    """
+    for table in REFRESH_SQL:
+        dates = [row[0] for row in conn.execute(f"SELECT DISTINCT crawl_date FROM {table}")]
+        refresh_rollups(conn, dates, tables=(table,))
+
+
+# === Dashboard Reads ===
+def read_posts_genres(conn, crawl_date):
+    """
+    Per-genre rollup with averages: genre, video_count, play_sum, like_sum,
+    play_count / like_count (means), engagement_rate (mean like/play)
+    """
+    df = pd.read_sql(
+        "SELECT genre, video_count, play_sum, like_sum, engagement_sum, engagement_count "
+        "FROM posts_daily_genre WHERE crawl_date = ?", conn, params=(str(crawl_date),)
+    )
+    df["play_count"] = (df["play_sum"] / df["video_count"]).round(0)
+    df["like_count"] = (df["like_sum"] / df["video_count"]).round(0)
+    df["engagement_rate"] = df["engagement_sum"] / df["engagement_count"]
+    return df
+
+
+def read_posts_creator_plays(conn, crawl_date, nickname=None):
+    """
+    Top creator by total plays as (nickname, plays), or the plays of `nickname`
+    """
+    if nickname is None:
+        row = conn.execute(
+            "SELECT nickname, play_sum FROM posts_daily_creator WHERE crawl_date = ? "
+            "ORDER BY play_sum DESC LIMIT 1", (str(crawl_date),)
+        ).fetchone()
+        return row if row else (None, 0)
+    row = conn.execute(
+        "SELECT play_sum FROM posts_daily_creator WHERE crawl_date = ? AND nickname = ?",
+        (str(crawl_date), nickname)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def read_creators_daily(conn, crawl_date):
+    """
+    Creators KPI row as a dict, or None when the day has no data
+    """
+    conn_row_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(
+            "SELECT creator_count, follower_sum, video_count, view_sum, like_sum, engagement_sum, engagement_count "
+            "FROM creators_daily WHERE crawl_date = ?", (str(crawl_date),)
+        ).fetchone()
+    finally:
+        conn.row_factory = conn_row_factory
+    return dict(row) if row else None
+
+
+def read_daily_top(conn, crawl_date, list_name, limit=TOP_N):
+    """
+    One precomputed top list ordered by rank
+    """
+    return pd.read_sql(
+        "SELECT rank, entity_id, label, url, value, value2 FROM daily_top "
+        "WHERE crawl_date = ? AND list_name = ? AND rank <= ? ORDER BY rank",
+        conn, params=(str(crawl_date), list_name, limit)
+    )
+
+
+def read_hashtags_industries(conn, crawl_date):
+    """
+    Per-industry hashtag rollup
+    """
+    return pd.read_sql(
+        "SELECT industry_value, hashtag_count, view_sum, publish_sum "
+        "FROM hashtags_daily_industry WHERE crawl_date = ?", conn, params=(str(crawl_date),)
+    )
+
+
+if __name__ == "__main__":
+    from db_writer import SQLiteWriter
+    from partitions import data_files
+
+    parser = argparse.ArgumentParser(description="Rebuild the latest-snapshot and daily rollup tables from the raw tables")
+    parser.add_argument("--db", default="database/tiktokdb.db", help="SQLite database path")
+    args = parser.parse_args()
+
+    # Partitioned mode: every writable month partition
+    for path in data_files(args.db):
+        writer = SQLiteWriter(path)
+        try:
+            with writer.transaction() as conn:
+                rebuild_all_rollups(conn)
+        finally:
+            writer.close()
+    print("Daily rollups rebuilt.")
@@ -1,10 +1,23 @@
-import requests
 import json
 from datetime import datetime
-import pandas as pd
 import csv
 import time
 import sqlite3
+import asyncio
+import argparse
+import math
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from http_client import configure_session, http_get, print_pool_stats, close_session
+from rate_limiter import print_rate_stats, reset_buckets
+from create_tiktok_db import init_db
+from checkpoint import start_run, finish_run, load_run, load_completed, insert_checkpoints
+from partitions import PartitionRouter, open_writer
+from rollups import refresh_rollups
+from parquet_archive import parquet_dir, export_files
 
 # === TikTok Vertical Categories & Regions ===
 vertical = [
@@ -14,8 +27,38 @@ vertical = [
 ]
 region = ["US","JP","UK","DE","MX","CA","FR","KR","ID","BZ","PL","AU","IT","ES"]
 
+# === Crawl Settings ===
+# Request pacing is handled per host by rate_limiter.py (token bucket + backoff)
+MAX_CONCURRENCY_PER_HOST = 4  # Parallel requests allowed per upstream host
+
+# === Pagination Settings ===
+DEFAULT_PAGE_SIZE = {"videos": 10, "creators": 10, "hashtags": 20}
+# Larger sizes probed once per endpoint; the largest one honoured in full is used
+PAGE_SIZE_CANDIDATES = {"videos": [50, 30, 20], "creators": [50, 30, 20], "hashtags": [50]}
+ENDPOINT_HOSTS = {"videos": "www.tiktok.com", "creators": "www.tiktok.com", "hashtags": "ads.tiktok.com"}
+
+# === Output Settings ===
+# SQLite table and column order (also the CSV column order) per endpoint
+ENDPOINT_TABLES = {
+    "videos": ("posts", [
+        "url", "nickname", "user_id", "item_id", "item_name", "genre",
+        "like_count", "play_count", "region", "crawl_date", "crawl_time"
+    ]),
+    "creators": ("creators", [
+        "nickname", "uniqueId", "user_id", "follower_count", "bio", "creator_rank",
+        "video_type", "video_item_id", "video_name", "video_url", "profile_url",
+        "video_play_count", "video_like_count", "video_rank", "region", "crawl_date", "crawl_time"
+    ]),
+    "hashtags": ("hashtags", [
+        "hashtag_id", "hashtag_name", "country", "rank", "video_views",
+        "publish_count", "industry_value", "region", "crawl_date", "crawl_time"
+    ]),
+}
+WRITE_BATCH_SIZE = 500   # Rows buffered per table before flushing to SQLite + CSV
+WRITE_QUEUE_SIZE = 50    # Pages waiting for the writer before fetchers block
+
 # === API Calls ===
-def call_tiktok_trending_api(genre, page_num):
+def call_tiktok_trending_api(genre, page_num, page_size=10, region="MY"):
     """
     Call TikTok Creator Studio trending videos API
     """
@@ -24,8 +67,8 @@ def call_tiktok_trending_api(genre, page_num):
     params = {
         "locale": "en",
         "aid": "1988",
-        "priority_region": "MY",
-        "region": "MY",
+        "priority_region": region,
+        "region": region,
         "tz_name": "Asia/Kuala_Lumpur",
         "app_name": "tiktok_creator_center",
         "app_language": "en",
@@ -41,10 +84,10 @@ def call_tiktok_trending_api(genre, page_num):
         "browser_version": "5.0+(Windows+NT+10.0;+Win64;+x64)+AppleWebKit/537.36+(KHTML,+like+Gecko)+Chrome/140.0.0.0+Safari/537.36",
         "key": "trendingListAllEntertainment",
         "PageNum": str(page_num),
-        "PageSize": "10",
+        "PageSize": str(page_size),
         "Region": "All",
         "Vertical": genre,
-        "op_region": "MY",
+        "op_region": region,
         "TrendingType": "0"
     }
     
@@ -58,9 +101,9 @@ def call_tiktok_trending_api(genre, page_num):
     }
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=30)
+        response = http_get(url, params=params, headers=headers, timeout=30)
         if response.status_code == 200:
-            print(f"Trending Videos [{genre}] Page {page_num+1} success")
+            print(f"Trending Videos [{region}] [{genre}] Page {page_num+1} success")
             data = response.json()
             result = [
                 {
@@ -72,20 +115,21 @@ def call_tiktok_trending_api(genre, page_num):
                     "genre": genre,
                     "like_count": video["LikeCount"],
                     "play_count": video["PlayCount"],
+                    "region": region,
                 }
                 for video in data.get("TrendingVideos", [])
             ]
             return result
         else:
-            print(f"Trending Videos [{genre}] Page {page_num+1} failed! Status Code: {response.status_code}")
+            print(f"Trending Videos [{region}] [{genre}] Page {page_num+1} failed! Status Code: {response.status_code}")
             print(response.text[:300])
             return None
     except Exception as e:
-        print(f"Error fetching Trending Videos: {e}")
+        print(f"Error fetching Trending Videos [{region}] [{genre}] Page {page_num+1}: {e}")
         return None
 
 
-def call_tiktok_trending_creators(vertical, page_num):
+def call_tiktok_trending_creators(vertical, page_num, page_size=10, region="MY"):
     """
     Call TikTok Creator Studio trending creators API with vertical
     """
@@ -94,8 +138,8 @@ def call_tiktok_trending_creators(vertical, page_num):
     params = {
         "locale": "en",
         "aid": "1988",
-        "priority_region": "MY",
-        "region": "MY",
+        "priority_region": region,
+        "region": region,
         "tz_name": "Asia/Kuala_Lumpur",
         "app_name": "tiktok_creator_center",
         "app_language": "en",
@@ -111,10 +155,10 @@ def call_tiktok_trending_creators(vertical, page_num):
         "browser_version": "5.0+(Windows+NT+10.0;+Win64;+x64)+AppleWebKit/537.36+(KHTML,+like+Gecko)+Chrome/140.0.0.0+Safari/537.36",
         "key": "trendingCreators",
         "PageNum": str(page_num),
-        "PageSize": "10",
+        "PageSize": str(page_size),
         "Region": "All",
         "Vertical": vertical,
-        "op_region": "MY",
+        "op_region": region,
         "TrendingType": "0"
     }
     
@@ -128,13 +172,13 @@ def call_tiktok_trending_creators(vertical, page_num):
     }
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=30)
+        response = http_get(url, params=params, headers=headers, timeout=30)
         if response.status_code == 200:
-            print(f"Trending Creators [{vertical}] Page {page_num+1} success")
+            print(f"Trending Creators [{region}] [{vertical}] Page {page_num+1} success")
             data = response.json()
             creators = []
             for idx, creator in enumerate(data.get("TrendingCreators", [])):
-                creator_rank = page_num * 10 + (idx + 1)
+                creator_rank = page_num * page_size + (idx + 1)
                 base_info = {
                     "nickname": creator.get("NickName"),
                     "uniqueId": creator.get("UniqueId"),
@@ -158,15 +202,16 @@ def call_tiktok_trending_creators(vertical, page_num):
                         "profile_url": f"https://www.tiktok.com/@{creator.get('UniqueId','')}",
                         "video_play_count": video.get("PlayCount"),
                         "video_like_count": video.get("LikeCount"),
-                        "video_rank": video_rank
+                        "video_rank": video_rank,
+                        "region": region,
                     })
             return creators
         else:
-            print(f"Trending Creators [{vertical}] Page {page_num+1} failed! Status Code: {response.status_code}")
+            print(f"Trending Creators [{region}] [{vertical}] Page {page_num+1} failed! Status Code: {response.status_code}")
             print(response.text[:300])
             return None
     except Exception as e:
-        print(f"Error fetching Trending Creators [{vertical}] Page {page_num+1}: {e}")
+        print(f"Error fetching Trending Creators [{region}] [{vertical}] Page {page_num+1}: {e}")
         return None
 
 
@@ -206,7 +251,7 @@ def call_tiktok_trending_hashtags(page_num, limit=20, period=7, country="MY"):
     }
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=30)
+        response = http_get(url, params=params, headers=headers, timeout=30)
         if response.status_code == 200:
             data = response.json()
             hashtags = []
@@ -219,113 +264,451 @@ def call_tiktok_trending_hashtags(page_num, limit=20, period=7, country="MY"):
                     "video_views": item.get("video_views"),
                     "publish_count": item.get("publish_cnt"),
                     "industry_value": item.get("industry_info", {}).get("value", ""),
+                    "region": country,
                 })
-            print(f"Trending Hashtags Page {page_num} success")
+            print(f"Trending Hashtags [{country}] Page {page_num} success")
             return hashtags
         else:
-            print(f"Trending Hashtags Page {page_num} failed! Status Code: {response.status_code}")
+            print(f"Trending Hashtags [{country}] Page {page_num} failed! Status Code: {response.status_code}")
             print(response.text[:300])
             return None
     except Exception as e:
-        print(f"Error fetching Trending Hashtags Page {page_num}: {e}")
+        print(f"Error fetching Trending Hashtags [{country}] Page {page_num}: {e}")
         return None
 
 # === Save to SQLite ===
 def save_to_sqlite(db_path, table_name, data, columns):
     """
     Save data to SQLite with INSERT OR IGNORE (to avoid duplicate PK errors)
+    and refresh the daily rollups of the dates it covers
     """
     if not data:
         print(f"No data to save for table {table_name}")
         return
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    placeholders = ", ".join(["?" for _ in columns])
-    column_names = ", ".join(columns)
-    insert_sql = f"INSERT OR IGNORE INTO {table_name} ({column_names}) VALUES ({placeholders})"
-    
-    values = [[row.get(col, None) for col in columns] for row in data]
-    cursor.executemany(insert_sql, values)
-    
-    conn.commit()
-    conn.close()
-    print(f"Saved {len(values)} records into '{table_name}' (duplicates ignored)")
+
+    router = PartitionRouter(db_path)
+    saved = 0
+    try:
+        # One transaction per month partition (a single one when unpartitioned)
+        for writer, rows in router.split(data, lambda row: row.get("crawl_date")).items():
+            with writer.transaction() as conn:
+                saved += writer.insert_rows(table_name, columns, rows)
+                refresh_rollups(conn, {row["crawl_date"] for row in rows if row.get("crawl_date")},
+                                tables=(table_name,))
+    finally:
+        router.close()
+    print(f"Saved {saved} records into '{table_name}' (duplicates ignored)")
+
+# === Streaming Writer ===
+class CrawlWriter:
+    """
+    Background writer for crawled pages.
+    Pages go in through a bounded queue; rows are flushed to SQLite and appended
+    to the CSV files every WRITE_BATCH_SIZE rows per table, so memory stays at
+    one batch and a crash keeps everything flushed so far.
+    All SQLite writes go through one long-lived WAL connection; a batch and the
+    checkpoints of its pages are committed in the same transaction (in
+    partitioned mode the connection is the crawl month's partition, which
+    keeps the checkpoints of its pages itself).
+    """
+
+    def __init__(self, db_path, csv_files, run_id, crawl_date, crawl_time, append=False,
+                 batch_size=WRITE_BATCH_SIZE, queue_size=WRITE_QUEUE_SIZE):
+        self.db = open_writer(db_path, crawl_date)
+        self.run_id = run_id
+        self.crawl_date = crawl_date
+        self.crawl_time = crawl_time
+        self.batch_size = batch_size
+        self.pages = queue.Queue(maxsize=queue_size)
+        self.buffers = {endpoint: [] for endpoint in ENDPOINT_TABLES}
+        self.pending_units = {endpoint: [] for endpoint in ENDPOINT_TABLES}
+        self.written = {endpoint: 0 for endpoint in ENDPOINT_TABLES}
+        self.failed = 0
+        self.csv_handles = {}
+        self.csv_writers = {}
+        for endpoint, path in csv_files.items():
+            # A resumed run appends to the CSV files of the interrupted one
+            handle = open(path, "a" if append else "w", newline="", encoding="utf-8")
+            writer = csv.DictWriter(handle, fieldnames=ENDPOINT_TABLES[endpoint][1],
+                                    extrasaction="ignore", quoting=csv.QUOTE_NONNUMERIC)
+            if handle.tell() == 0:
+                writer.writeheader()
+            self.csv_handles[endpoint] = handle
+            self.csv_writers[endpoint] = writer
+        self.thread = threading.Thread(target=self._run, name="crawl-writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def put(self, job, page_num, rows, is_last):
+        """
+        Queue one page of rows, or None for a failed request
+        (blocks while the queue is full)
+        """
+        self.pages.put((job, page_num, rows, is_last))
+
+    def close(self):
+        """
+        Flush whatever is buffered and stop the writer thread
+        """
+        self.pages.put(None)
+        self.thread.join()
+        self.db.close()
+        for handle in self.csv_handles.values():
+            handle.close()
+
+    def _run(self):
+        while True:
+            page = self.pages.get()
+            if page is None:
+                break
+            job, page_num, rows, is_last = page
+            endpoint = job["endpoint"]
+            unit = (endpoint, job["region"], job["key"], page_num)
+            if rows is None:
+                self.failed += 1
+                with self.db.transaction() as conn:
+                    insert_checkpoints(conn, self.run_id, [(*unit, "failed", 0, False)])
+                continue
+            stamp_crawl_time(rows, self.crawl_date, self.crawl_time)
+            self.buffers[endpoint].extend(rows)
+            self.pending_units[endpoint].append((*unit, "done", len(rows), is_last))
+            if len(self.buffers[endpoint]) >= self.batch_size:
+                self._flush(endpoint)
+        for endpoint in self.buffers:
+            self._flush(endpoint)
+
+    def _flush(self, endpoint):
+        rows = self.buffers[endpoint]
+        units = self.pending_units[endpoint]
+        if rows or units:
+            table_name, columns = ENDPOINT_TABLES[endpoint]
+            try:
+                # Rows, their checkpoints and the day's rollups commit together
+                # (empty end-of-ranking pages too)
+                with self.db.transaction() as conn:
+                    self.db.insert_rows(table_name, columns, rows)
+                    insert_checkpoints(conn, self.run_id, units)
+                    if rows:
+                        refresh_rollups(conn, [self.crawl_date], tables=(table_name,))
+                print(f"Saved {len(rows)} records into '{table_name}' (duplicates ignored)")
+            except sqlite3.Error as e:
+                # Pages stay unchecked so a resumed run fetches them again;
+                # the CSV is left alone so it does not get those rows twice
+                print(f"Error saving batch into '{table_name}': {e}")
+                self.failed += len(units)
+            else:
+                if rows and endpoint in self.csv_writers:
+                    self.csv_writers[endpoint].writerows(rows)
+                    self.csv_handles[endpoint].flush()
+                self.written[endpoint] += len(rows)
+        self.buffers[endpoint] = []
+        self.pending_units[endpoint] = []
+
+
+# === Crawl Modes ===
+def stamp_crawl_time(rows, crawl_date, crawl_time):
+    """
+    Add crawl_date / crawl_time to every row of a page result
+    """
+    for r in rows:
+        r["crawl_date"] = crawl_date
+        r["crawl_time"] = crawl_time
+    return rows
+
+
+def count_rows(rows, page_num, page_size):
+    """
+    Items on a videos / hashtags page (one row per item)
+    """
+    return len(rows)
+
+
+def count_creators(rows, page_num, page_size):
+    """
+    Creators on a creators page. Rows are one per creator video, so use the
+    highest creator_rank on the page instead of the row count.
+    """
+    if not rows:
+        return 0
+    return max(r["creator_rank"] for r in rows) - page_num * page_size
+
+
+ENDPOINT_COUNTERS = {"videos": count_rows, "creators": count_creators, "hashtags": count_rows}
+
+
+def endpoint_fetchers(regions):
+    """
+    (endpoint, region, ranking key, fetch) for every ranking to paginate,
+    sharded by region x vertical.
+    fetch(page_num, page_size) returns the parsed rows of one page or None.
+    """
+    fetchers = []
+    for region_code in regions:
+        for genre in vertical:
+            fetchers.append(("videos", region_code, genre,
+                             partial(call_tiktok_trending_api, genre, region=region_code)))
+        for vertical_cat in vertical:
+            fetchers.append(("creators", region_code, vertical_cat,
+                             partial(call_tiktok_trending_creators, vertical_cat, region=region_code)))
+        fetchers.append(("hashtags", region_code, "All",
+                         partial(call_tiktok_trending_hashtags, period=7, country=region_code)))
+    return fetchers
+
+
+def probe_page_size(fetch, endpoint):
+    """
+    Find the largest page size an endpoint honours by requesting page 0.
+    A full page accepts the size. A short page is either a silently capped
+    size or a ranking with fewer items than the size: it only counts when
+    page 1 at the same size comes back empty, i.e. page 0 really was the last.
+    Returns (page_size, rows of page 0 at that size or None).
+    """
+    default = DEFAULT_PAGE_SIZE[endpoint]
+    for size in sorted(PAGE_SIZE_CANDIDATES[endpoint], reverse=True):
+        if size <= default:
+            continue
+        result = fetch(0, size)
+        if not result:
+            continue
+        count = ENDPOINT_COUNTERS[endpoint](result, 0, size)
+        if count == size or (count < size and fetch(1, size) == []):
+            print(f"[{endpoint}] PageSize={size} accepted")
+            return size, result
+    print(f"[{endpoint}] Using default PageSize={default}")
+    return default, None
+
+
+def build_jobs(target_page, regions=("MY",), probe=True, page_sizes=None, completed=None):
+    """
+    One job per ranking: paginate until `target_page` default-size pages worth
+    of items are covered, or until a page comes back short.
+    Page sizes are probed once per endpoint, on the first region, unless
+    `page_sizes` is given (resumed runs must keep their page sizes).
+    `completed` maps checkpointed units to their is_last flag; those pages are skipped.
+    """
+    jobs = []
+    probed = dict(page_sizes or {})
+    completed = completed or {}
+    for endpoint, region_code, key, fetch in endpoint_fetchers(regions):
+        first_page = None
+        if endpoint not in probed:
+            if probe:
+                probed[endpoint], first_page = probe_page_size(fetch, endpoint)
+            else:
+                probed[endpoint] = DEFAULT_PAGE_SIZE[endpoint]
+        jobs.append({
+            "endpoint": endpoint,
+            "region": region_code,
+            "key": key,
+            "fetch": fetch,
+            "page_size": probed[endpoint],
+            "depth": target_page * DEFAULT_PAGE_SIZE[endpoint],
+            "first_page": first_page,
+            "done_pages": {
+                unit[3]: is_last for unit, is_last in completed.items()
+                if unit[:3] == (endpoint, region_code, key)
+            },
+        })
+    return jobs
+
+
+def is_last_page(job, result, page_num):
+    """
+    A successful page with fewer than page_size items ends the ranking
+    """
+    if result is None:
+        return False
+    count = ENDPOINT_COUNTERS[job["endpoint"]](result, page_num, job["page_size"])
+    if count < job["page_size"]:
+        print(f"[{job['endpoint']}] [{job['region']}] [{job['key']}] Page {page_num+1} returned {count} items, stopping")
+        return True
+    return False
+
+
+def fetch_page(job, page_num, on_page):
+    """
+    Fetch one page and hand it to `on_page(job, page_num, rows, is_last)` right away.
+    rows is None when the request failed.
+    """
+    if page_num == 0 and job["first_page"] is not None:
+        result = job["first_page"]
+    else:
+        result = job["fetch"](page_num, job["page_size"])
+    last = is_last_page(job, result, page_num)
+    on_page(job, page_num, result, last)
+    return last
+
+
+def job_pages(job):
+    """
+    Page numbers of a ranking, with checkpointed pages marked as skipped:
+    yields (page_num, already_done, was_last)
+    """
+    for page_num in range(math.ceil(job["depth"] / job["page_size"])):
+        if page_num in job["done_pages"]:
+            yield page_num, True, job["done_pages"][page_num]
+        else:
+            yield page_num, False, False
+
+
+def crawl_job(job, on_page):
+    """
+    Fetch the pages of one ranking in order
+    """
+    for page_num, done, last in job_pages(job):
+        if not done:
+            last = fetch_page(job, page_num, on_page)
+        if last:
+            break
+
+
+def crawl_serial(jobs, on_page):
+    """
+    Fetch every page one request at a time
+    """
+    for job in jobs:
+        crawl_job(job, on_page)
+
+
+async def _call_limited(semaphore, func, *args, **kwargs):
+    """
+    Run a blocking API call in a worker thread while holding a host slot
+    """
+    async with semaphore:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def crawl_job_async(semaphore, job, on_page):
+    """
+    Fetch the pages of one ranking in order; rankings run concurrently
+    """
+    for page_num, done, last in job_pages(job):
+        if not done:
+            # on_page runs in the worker thread, so a full write queue never blocks the loop
+            last = await _call_limited(semaphore, fetch_page, job, page_num, on_page)
+        if last:
+            break
+
+
+async def crawl_async(jobs, on_page, max_concurrency_per_host=MAX_CONCURRENCY_PER_HOST):
+    """
+    Fetch videos, creators and hashtags concurrently.
+    At most `max_concurrency_per_host` requests are in flight per upstream host.
+    Pages within one ranking stay sequential so a short page can stop it early.
+    """
+    host_slots = {
+        host: asyncio.Semaphore(max_concurrency_per_host)
+        for host in set(ENDPOINT_HOSTS.values())
+    }
+    # Worker threads for the blocking calls: one per host slot
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_concurrency_per_host * len(host_slots))
+    )
+    await asyncio.gather(*[
+        crawl_job_async(host_slots[ENDPOINT_HOSTS[job["endpoint"]]], job, on_page) for job in jobs
+    ])
+
 
 # === Main Function ===
-def main():
+def main(mode="async", max_concurrency_per_host=MAX_CONCURRENCY_PER_HOST, probe=True, regions=("MY",),
+         resume=None, parquet=None):
+    """
+    Run a crawl. `resume` is a run_id, or "latest" for the most recent run
+    that did not complete; only its missing and failed pages are fetched.
+    `parquet` is a directory to also write the run's rows to as partitioned Parquet.
+    """
     target_page = 10
     file_videos = "trending_tiktok_posts.csv"
     file_creators = "trending_tiktok_creators.csv"
     file_hashtags = "trending_tiktok_hashtags.csv"
     db_path = r"C:\Users\USER\Documents\Tunetouch\Code\Tiktok\testing\database\tiktokdb.db"
 
-    data_videos, data_creators, data_hashtags = [], [], []
+    init_db(db_path)
 
-    crawl_datetime = datetime.now()
-    crawl_date = crawl_datetime.strftime("%Y-%m-%d")
-    crawl_time = crawl_datetime.strftime("%H:%M:%S")
+    # --- New run or resume an interrupted one ---
+    run = None
+    if resume:
+        run = load_run(db_path, None if resume == "latest" else resume)
+        if run is None:
+            print("No unfinished crawl run to resume, starting a new one")
 
-    # --- Trending Videos ---
-    for genre in vertical:
-        for page_num in range(target_page):
-            result = call_tiktok_trending_api(genre, page_num)
-            if result:
-                for r in result:
-                    r["crawl_date"] = crawl_date
-                    r["crawl_time"] = crawl_time
-                data_videos.extend(result)
-            time.sleep(0.5)
+    # One keep-alive pool per host, sized to the number of parallel requests
+    configure_session({
+        "www.tiktok.com": max_concurrency_per_host,
+        "ads.tiktok.com": max_concurrency_per_host,
+    })
+    reset_buckets()
 
-    df_videos = pd.DataFrame(data_videos)
-    df_videos.to_csv(file_videos, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    print(f"Saved Trending Videos to {file_videos}")
+    if run:
+        run_id, crawl_date, crawl_time = run["run_id"], run["crawl_date"], run["crawl_time"]
+        regions = run["regions"]
+        completed = load_completed(db_path, run_id)
+        jobs = build_jobs(target_page, regions=regions, page_sizes=run["page_sizes"], completed=completed)
+        print(f"Resuming crawl run {run_id}: {len(completed)} pages already saved")
+    else:
+        crawl_datetime = datetime.now()
+        crawl_date = crawl_datetime.strftime("%Y-%m-%d")
+        crawl_time = crawl_datetime.strftime("%H:%M:%S")
+        run_id = crawl_datetime.strftime("%Y%m%d-%H%M%S")
+        jobs = build_jobs(target_page, regions=regions, probe=probe)
+        page_sizes = {job["endpoint"]: job["page_size"] for job in jobs}
+        start_run(db_path, run_id, crawl_date, crawl_time, regions, page_sizes)
+        print(f"Started crawl run {run_id}")
 
-    save_to_sqlite(db_path, "posts", data_videos, [
-        "url", "nickname", "user_id", "item_id", "item_name", "genre",
-        "like_count", "play_count", "crawl_date", "crawl_time"
-    ])
+    # --- Fetch all endpoints, streaming pages to SQLite + CSV ---
+    writer = CrawlWriter(db_path, {
+        "videos": file_videos,
+        "creators": file_creators,
+        "hashtags": file_hashtags,
+    }, run_id, crawl_date, crawl_time, append=run is not None).start()
 
-    # --- Trending Creators ---
-    for vertical_cat in vertical:
-        for page_num in range(target_page):
-            result = call_tiktok_trending_creators(vertical_cat, page_num)
-            if result:
-                for r in result:
-                    r["crawl_date"] = crawl_date
-                    r["crawl_time"] = crawl_time
-                data_creators.extend(result)
-            time.sleep(0.5)
-
-    df_creators = pd.DataFrame(data_creators)
-    df_creators.to_csv(file_creators, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    print(f"Saved Trending Creators to {file_creators}")
-
-    save_to_sqlite(db_path, "creators", data_creators, [
-        "nickname", "uniqueId", "user_id", "follower_count", "bio", "creator_rank",
-        "video_type", "video_item_id", "video_name", "video_url", "profile_url",
-        "video_play_count", "video_like_count", "video_rank", "crawl_date", "crawl_time"
-    ])
+    start = time.perf_counter()
+    try:
+        if mode == "async":
+            asyncio.run(crawl_async(jobs, writer.put, max_concurrency_per_host))
+        else:
+            crawl_serial(jobs, writer.put)
+    finally:
+        # Flush the last partial batches even if the crawl was interrupted
+        writer.close()
+        print(f"Crawl finished in {time.perf_counter() - start:.1f}s ({mode} mode, {len(regions)} regions)")
+        print_pool_stats()
+        print_rate_stats()
+        close_session()
 
-    # --- Trending Hashtags ---
-    for page_num in range(target_page):
-        result = call_tiktok_trending_hashtags(page_num, limit=20, period=7, country="MY")
-        if result:
-            for r in result:
-                r["crawl_date"] = crawl_date
-                r["crawl_time"] = crawl_time
-            data_hashtags.extend(result)
-        time.sleep(0.5)
-
-    df_hashtags = pd.DataFrame(data_hashtags)
-    df_hashtags.to_csv(file_hashtags, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    print(f"Saved Trending Hashtags to {file_hashtags}")
-
-    save_to_sqlite(db_path, "hashtags", data_hashtags, [
-        "hashtag_id", "hashtag_name", "country", "rank", "video_views",
-        "publish_count", "industry_value", "crawl_date", "crawl_time"
-    ])
+    status = "completed" if writer.failed == 0 else "partial"
+    finish_run(db_path, run_id, status)
+    print(f"Saved Trending Videos to {file_videos} ({writer.written['videos']} rows)")
+    print(f"Saved Trending Creators to {file_creators} ({writer.written['creators']} rows)")
+    print(f"Saved Trending Hashtags to {file_hashtags} ({writer.written['hashtags']} rows)")
+    if parquet:
+        # The CSV files hold exactly this run's rows (a resumed run appends to them)
+        written = export_files({
+            "posts": file_videos,
+            "creators": file_creators,
+            "hashtags": file_hashtags,
+        }, parquet)
+        print(f"Saved Parquet to {parquet} (" + ", ".join(f"{n} {t}" for t, n in written.items()) + ")")
+    if status == "partial":
+        print(f"{writer.failed} pages failed; rerun with --resume {run_id} to retry them")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Crawl TikTok trending videos, creators and hashtags")
+    parser.add_argument("--mode", choices=["async", "serial"], default="async",
+                        help="async runs requests concurrently, serial runs them one by one")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY_PER_HOST,
+                        help="max parallel requests per upstream host (async mode)")
+    parser.add_argument("--no-probe", action="store_true",
+                        help="skip page-size probing and use the default page sizes")
+    parser.add_argument("--regions", default="MY",
+                        help="comma-separated region codes to crawl, or 'all' for every code in `region`")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="resume an interrupted run (default: the latest unfinished one)")
+    parser.add_argument("--parquet", nargs="?", const=parquet_dir, metavar="DIR",
+                        help=f"also write the crawl as partitioned Parquet (default: {parquet_dir})")
+    args = parser.parse_args()
+    regions = region if args.regions == "all" else [r.strip() for r in args.regions.split(",") if r.strip()]
+    main(mode=args.mode, max_concurrency_per_host=args.concurrency, probe=not args.no_probe, regions=regions,
+         resume=args.resume, parquet=args.parquet)
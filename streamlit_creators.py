@@ -1,69 +1,45 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import datetime
 
+from number_format import format_number as format_value, format_numbers
+from dashboard_data import (
+    date_range, load_day, distinct_values, paged_rows, creators_daily, daily_top, select_date,
+)
+
 def show_creators():
-    # Helper function to format numbers (K, M)
+    # Missing values show as "0" on this tab
     def format_number(n):
-        try:
-            if pd.isna(n):
-                return "0"
-            if n >= 1_000_000:
-                return f"{n/1_000_000:.1f}M"
-            elif n >= 1_000:
-                return f"{n/1_000:.1f}K"
-            else:
-                return str(int(n))
-        except:
-            return str(n)
+        return format_value(n, na="0")
 
     # App title
     st.markdown("### <u>Creators Dashboard</u>", unsafe_allow_html=True)
 
-    # === Connect to SQLite DB and get available date range ===
-    db_path = "database/tiktokdb.db"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT MIN(crawl_date), MAX(crawl_date) FROM creators")
-    min_date, max_date = cursor.fetchone()
-    conn.close()
+    # === Get available date range (cached) ===
+    min_date, max_date = date_range("creators")
 
     if not min_date or not max_date:
         st.warning("No data available in creators table.")
         return
 
     # === Date selection based on DB values ===
-    selected_date = st.date_input(
-        "Select Date",
-        min_value=pd.to_datetime(min_date).date(),
-        max_value=pd.to_datetime(max_date).date(),
-        value=pd.to_datetime(max_date).date(),
-        key="creators_date"
-    )
-
-    # === Query creators table for selected date ===
-    conn = sqlite3.connect(db_path)
-    query = f"""
-    SELECT * FROM creators
-    WHERE crawl_date = '{selected_date}'
-    """
-    df = pd.read_sql(query, conn)
-
-    df = df.drop_duplicates(subset=["user_id", "video_item_id"], keep="first")
-
-    # === Query creators table for previous day ===
-    prev_date = pd.to_datetime(selected_date) - pd.Timedelta(days=1)
-    query_prev = f"""
-    SELECT * FROM creators
-    WHERE crawl_date = '{prev_date.date()}'
-    """
-    df_prev = pd.read_sql(query_prev, conn)
-    conn.close()
-
-    df_prev = df_prev.drop_duplicates(subset=["user_id", "video_item_id"], keep="first")
-
-    if df.empty:
+    selected_date = select_date(pd.to_datetime(min_date).date(), pd.to_datetime(max_date).date(), key="creators_date")
+
+    # === Query daily rollups for selected date and previous day (cached) ===
+    prev_date = (pd.to_datetime(selected_date) - pd.Timedelta(days=1)).date()
+    stats = creators_daily(selected_date)
+    stats_prev = creators_daily(prev_date)
+    top_creators = daily_top(selected_date, "creators_by_followers").rename(
+        columns={"label": "nickname", "url": "profile_url", "value": "follower_count"})
+    top_videos = daily_top(selected_date, "videos_by_views").rename(
+        columns={"label": "nickname", "url": "video_url", "value": "video_play_count", "value2": "video_like_count"})
+    prev_top_creator = daily_top(prev_date, "creators_by_followers", limit=1)
+    prev_top_video = daily_top(prev_date, "videos_by_views", limit=1)
+
+    # === Creators rows for selected date (category and all-data tables) ===
+    df = load_day("creators", selected_date)
+
+    if df.empty or stats is None:
         st.warning("No data found for selected date.")
         return
 
@@ -78,62 +54,48 @@ def show_creators():
         return
 
     # Preprocess columns for display
-    df["play_display"] = df["video_play_count"].apply(format_number)
-    df["like_display"] = df["video_like_count"].apply(format_number)
-    df["follower_display"] = df["follower_count"].apply(format_number)
+    df["play_display"] = format_numbers(df["video_play_count"], na="0")
+    df["like_display"] = format_numbers(df["video_like_count"], na="0")
+    df["follower_display"] = format_numbers(df["follower_count"], na="0")
 
     # ============ KPI Overview ============
     st.subheader("Overall Metrics")
 
     # Current metrics
-    total_creators = df["user_id"].nunique()
-    total_followers = df.groupby("user_id")["follower_count"].max().sum()
-    total_videos = df["video_item_id"].nunique()
-    total_views = df["video_play_count"].sum()
-    total_likes = df["video_like_count"].sum()
-    avg_engagement = (df["video_like_count"] / df["video_play_count"]).mean()
+    total_creators = stats["creator_count"]
+    total_followers = stats["follower_sum"]
+    total_videos = stats["video_count"]
+    total_views = stats["view_sum"]
+    total_likes = stats["like_sum"]
+    avg_engagement = stats["engagement_sum"] / stats["engagement_count"] if stats["engagement_count"] else 0
 
     # Previous day metrics (if available)
-    if not df_prev.empty:
-        prev_total_creators = df_prev["user_id"].nunique()
-        prev_total_followers = df_prev.groupby("user_id")["follower_count"].max().sum()
-        prev_total_videos = df_prev["video_item_id"].nunique()
-        prev_total_views = df_prev["video_play_count"].sum()
-        prev_total_likes = df_prev["video_like_count"].sum()
-        prev_avg_engagement = (df_prev["video_like_count"] / df_prev["video_play_count"]).mean()
+    if stats_prev is not None:
+        prev_total_creators = stats_prev["creator_count"]
+        prev_total_followers = stats_prev["follower_sum"]
+        prev_total_videos = stats_prev["video_count"]
+        prev_total_views = stats_prev["view_sum"]
+        prev_total_likes = stats_prev["like_sum"]
+        prev_avg_engagement = (
+            stats_prev["engagement_sum"] / stats_prev["engagement_count"] if stats_prev["engagement_count"] else 0
+        )
     else:
         prev_total_creators = prev_total_followers = prev_total_videos = prev_total_views = prev_total_likes = prev_avg_engagement = 0
 
     # Top creator and video (display name only, delta only compares values)
-    top_creator = (
-        df.groupby(["user_id","nickname"])["follower_count"]
-        .max().sort_values(ascending=False)
-        .reset_index().iloc[0]
-    )
-    top_creator_name = top_creator["nickname"]
-    top_creator_followers = top_creator["follower_count"]
+    top_creator_name = top_creators["nickname"].iloc[0]
+    top_creator_followers = top_creators["follower_count"].iloc[0]
     top_creator_followers_display = format_number(top_creator_followers)
 
     # Previous day's top creator followers value
-    if not df_prev.empty:
-        prev_top_creator_followers = df_prev.groupby(["user_id"])["follower_count"].max().max()
-    else:
-        prev_top_creator_followers = 0
+    prev_top_creator_followers = prev_top_creator["value"].iloc[0] if not prev_top_creator.empty else 0
 
-    top_video = (
-        df.groupby(["video_item_id","nickname"])["video_play_count"]
-        .max().sort_values(ascending=False)
-        .reset_index().iloc[0]
-    )
-    top_video_creator = top_video["nickname"]
-    top_video_views = top_video["video_play_count"]
+    top_video_creator = top_videos["nickname"].iloc[0]
+    top_video_views = top_videos["video_play_count"].iloc[0]
     top_video_views_display = format_number(top_video_views)
 
     # Previous day's top video views value
-    if not df_prev.empty:
-        prev_top_video_views = df_prev.groupby(["video_item_id"])["video_play_count"].max().max()
-    else:
-        prev_top_video_views = 0
+    prev_top_video_views = prev_top_video["value"].iloc[0] if not prev_top_video.empty else 0
 
     # Display KPI metrics (delta only for numeric values)
     kpi1, kpi2, kpi3 = st.columns(3)
@@ -149,11 +111,7 @@ def show_creators():
 
     # ============ Top Creators ============
     st.subheader("Top 20 Creators by Followers")
-    top_creators = (
-        df.groupby(["user_id","nickname","profile_url"])["follower_count"]
-        .max().sort_values(ascending=False).head(20).reset_index()
-    )
-    top_creators["follower_display"] = top_creators["follower_count"].apply(format_number)
+    top_creators["follower_display"] = format_numbers(top_creators["follower_count"], na="0")
 
     st.data_editor(
         top_creators[["nickname","profile_url","follower_count","follower_display"]],
@@ -168,28 +126,21 @@ def show_creators():
 
     # ============ Top Videos ============
     st.subheader("Top 20 Videos by Play Count")
-    if "video_url" in df.columns:
-        top_videos = (
-            df.groupby(["video_item_id","video_url","nickname"])[["video_play_count","video_like_count"]]
-            .max().sort_values("video_play_count",ascending=False).head(20).reset_index()
-        )
-        top_videos["play_display"] = top_videos["video_play_count"].apply(format_number)
-        top_videos["like_display"] = top_videos["video_like_count"].apply(format_number)
+    top_videos["play_display"] = format_numbers(top_videos["video_play_count"], na="0")
+    top_videos["like_display"] = format_numbers(top_videos["video_like_count"], na="0")
 
-        st.data_editor(
-            top_videos[["video_url","nickname","video_play_count","play_display","video_like_count","like_display"]],
-            column_config={
-                "video_url": st.column_config.LinkColumn("Video Link"),
-                "nickname": st.column_config.TextColumn("Creator"),
-                "video_play_count": st.column_config.NumberColumn("Views (Sort by)", format="%d"),
-                "play_display": st.column_config.TextColumn("Views"),
-                "video_like_count": st.column_config.NumberColumn("Likes (Sort by)", format="%d"),
-                "like_display": st.column_config.TextColumn("Likes"),
-            },
-            hide_index=True
-        )
-    else:
-        st.warning("Database does not include video_url column.")
+    st.data_editor(
+        top_videos[["video_url","nickname","video_play_count","play_display","video_like_count","like_display"]],
+        column_config={
+            "video_url": st.column_config.LinkColumn("Video Link"),
+            "nickname": st.column_config.TextColumn("Creator"),
+            "video_play_count": st.column_config.NumberColumn("Views (Sort by)", format="%d"),
+            "play_display": st.column_config.TextColumn("Views"),
+            "video_like_count": st.column_config.NumberColumn("Likes (Sort by)", format="%d"),
+            "like_display": st.column_config.TextColumn("Likes"),
+        },
+        hide_index=True
+    )
 
     # ============ Filter by Category ============
     if "video_type" in df.columns:
@@ -199,8 +150,8 @@ def show_creators():
         filtered_df = df if selected_cat=="All" else df[df["video_type"]==selected_cat]
 
         top_cat_videos = filtered_df.sort_values("video_play_count",ascending=False).head(20).reset_index(drop=True)
-        top_cat_videos["play_display"] = top_cat_videos["video_play_count"].apply(format_number)
-        top_cat_videos["like_display"] = top_cat_videos["video_like_count"].apply(format_number)
+        top_cat_videos["play_display"] = format_numbers(top_cat_videos["video_play_count"], na="0")
+        top_cat_videos["like_display"] = format_numbers(top_cat_videos["video_like_count"], na="0")
 
         show_cols = ["video_type","nickname","video_play_count","play_display","video_like_count","like_display"]
         if "video_url" in top_cat_videos.columns:
@@ -220,32 +171,39 @@ def show_creators():
             hide_index=True
         )
 
-    # ============ Display All Data ============
+    # ============ Display All Data (filtered, sorted and paged in SQLite) ============
     st.subheader("All Data from DB")
-    df_all = df.copy()
-    df_all.insert(0,"No.",range(1,len(df_all)+1))
-    df_all["user_id_str"] = df_all["user_id"].astype(str)
-    df_all["video_item_id_str"] = df_all["video_item_id"].astype(str)
 
     # Filters
     col1,col2,col3,col4 = st.columns(4)
-    creators = df_all["nickname"].dropna().unique().tolist()
+    creators = distinct_values("creators", selected_date, "nickname")
     selected_creator = col1.selectbox("Creator Name", ["All"]+creators)
-    video_types = df_all["video_type"].dropna().unique().tolist() if "video_type" in df_all.columns else []
+    video_types = distinct_values("creators", selected_date, "video_type")
     selected_video_type = col2.selectbox("Video Type", ["All"]+video_types)
-    creator_ranks = df_all["creator_rank"].dropna().unique().tolist() if "creator_rank" in df_all.columns else []
-    selected_creator_rank = col3.selectbox("Creator Rank", ["All"]+sorted(creator_ranks))
-    video_ranks = df_all["video_rank"].dropna().unique().tolist() if "video_rank" in df_all.columns else []
-    selected_video_rank = col4.selectbox("Video Rank", ["All"]+sorted(video_ranks))
-
-    if selected_creator!="All":
-        df_all = df_all[df_all["nickname"]==selected_creator]
-    if selected_video_type!="All":
-        df_all = df_all[df_all["video_type"]==selected_video_type]
-    if selected_creator_rank!="All":
-        df_all = df_all[df_all["creator_rank"]==selected_creator_rank]
-    if selected_video_rank!="All":
-        df_all = df_all[df_all["video_rank"]==selected_video_rank]
+    creator_ranks = distinct_values("creators", selected_date, "creator_rank")
+    selected_creator_rank = col3.selectbox("Creator Rank", ["All"]+creator_ranks)
+    video_ranks = distinct_values("creators", selected_date, "video_rank")
+    selected_video_rank = col4.selectbox("Video Rank", ["All"]+video_ranks)
+
+    df_all = paged_rows(
+        "creators", selected_date,
+        columns=[
+            "nickname","uniqueId","user_id","follower_count","bio",
+            "creator_rank","video_type","video_item_id","video_name",
+            "video_url","profile_url","video_play_count","video_like_count","video_rank"
+        ],
+        filters={
+            "nickname": selected_creator, "video_type": selected_video_type,
+            "creator_rank": selected_creator_rank, "video_rank": selected_video_rank,
+        },
+        sort_columns={
+            "Video Views": "video_play_count", "Video Likes": "video_like_count", "Followers": "follower_count",
+            "Creator Rank": "creator_rank", "Video Rank": "video_rank",
+        },
+        key="creators_all"
+    )
+    df_all["user_id_str"] = df_all["user_id"].astype(str)
+    df_all["video_item_id_str"] = df_all["video_item_id"].astype(str)
 
     columns_to_show = [
         "No.","nickname","uniqueId","user_id_str","follower_count","bio",
@@ -1,66 +1,33 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
 import datetime
 
-def show_hashtags():
-    # Helper function to format numbers (K, M)
-    def format_number(n):
-        try:
-            if pd.isna(n) or n == "":
-                return ""
-            if n >= 1_000_000:
-                return f"{n/1_000_000:.1f}M"
-            elif n >= 1_000:
-                return f"{n/1_000:.1f}K"
-            else:
-                return str(int(n))
-        except:
-            return str(n)
+from number_format import format_number, format_numbers
+from dashboard_data import date_range, load_day, distinct_values, paged_rows, hashtags_industries, select_date
 
+def show_hashtags():
     # App title
     st.markdown("### <u>Hashtags Dashboard</u>", unsafe_allow_html=True)
 
-    # === Connect to SQLite DB ===
-    db_path = "database/tiktokdb.db"
-    conn = sqlite3.connect(db_path)
-
-    # Get min and max date from database
-    minmax_query = "SELECT MIN(crawl_date) as min_date, MAX(crawl_date) as max_date FROM hashtags"
-    minmax_df = pd.read_sql(minmax_query, conn)
+    # Get min and max date from database (cached)
+    min_date, max_date = date_range("hashtags")
 
-    if minmax_df.empty or minmax_df["min_date"].iloc[0] is None:
+    if min_date is None:
         st.warning("No data found in database. Please run crawler first.")
-        conn.close()
         return
 
-    min_date = datetime.datetime.strptime(minmax_df["min_date"].iloc[0], "%Y-%m-%d").date()
-    max_date = datetime.datetime.strptime(minmax_df["max_date"].iloc[0], "%Y-%m-%d").date()
+    min_date = datetime.datetime.strptime(min_date, "%Y-%m-%d").date()
+    max_date = datetime.datetime.strptime(max_date, "%Y-%m-%d").date()
 
     # === Select one crawl_date ===
-    query_dates = "SELECT DISTINCT crawl_date FROM hashtags ORDER BY crawl_date"
-    dates_df = pd.read_sql(query_dates, conn)
-    available_dates = [datetime.datetime.strptime(d, "%Y-%m-%d").date() for d in dates_df["crawl_date"].tolist()]
-
-    selected_date = st.date_input(
-        "Select Date",
-        min_value=min(available_dates),
-        max_value=max(available_dates),
-        value=max(available_dates),
-        key="hashtags_date"
-    )
+    selected_date = select_date(min_date, max_date, key="hashtags_date")
 
-    # Query hashtags for selected date
-    query = f"SELECT * FROM hashtags WHERE crawl_date = '{selected_date}'"
-    df = pd.read_sql(query, conn)
-    df = df.drop_duplicates(subset=["hashtag_id", "hashtag_name"])
+    # Hashtags for selected date (cached)
+    df = load_day("hashtags", selected_date)
 
-    # Query hashtags for previous day
+    # Daily industry rollups for selected date and previous day (cached)
     prev_date = selected_date - datetime.timedelta(days=1)
-    query_prev = f"SELECT * FROM hashtags WHERE crawl_date = '{prev_date}'"
-    df_prev = pd.read_sql(query_prev, conn)
-    df_prev = df_prev.drop_duplicates(subset=["hashtag_id", "hashtag_name"])
-    conn.close()
+    industry_stats = hashtags_industries(selected_date)
+    industry_stats_prev = hashtags_industries(prev_date)
 
     if df.empty:
         st.warning("No data found for selected date.")
@@ -70,22 +37,22 @@ def show_hashtags():
         df["industry_value"] = ""
 
     df = df.dropna(subset=["hashtag_name"])
-    df['video_views_dis'] = df['video_views'].apply(format_number)
-    df['publish_count_dis'] = df['publish_count'].apply(format_number)
+    df['video_views_dis'] = format_numbers(df['video_views'])
+    df['publish_count_dis'] = format_numbers(df['publish_count'])
 
     # === KPI Overview without Top Hashtag ===
     st.subheader("Overall Metrics")
 
     # Current day metrics
-    total_views = df['video_views'].sum()
-    total_hashtags = df['hashtag_name'].nunique()
-    total_posts = df['publish_count'].sum()
+    total_views = industry_stats['view_sum'].sum()
+    total_hashtags = industry_stats['hashtag_count'].sum()
+    total_posts = industry_stats['publish_sum'].sum()
 
     # Previous day metrics
-    if not df_prev.empty:
-        prev_total_views = df_prev['video_views'].sum()
-        prev_total_hashtags = df_prev['hashtag_name'].nunique()
-        prev_total_posts = df_prev['publish_count'].sum()
+    if not industry_stats_prev.empty:
+        prev_total_views = industry_stats_prev['view_sum'].sum()
+        prev_total_hashtags = industry_stats_prev['hashtag_count'].sum()
+        prev_total_posts = industry_stats_prev['publish_sum'].sum()
     else:
         prev_total_views = prev_total_hashtags = prev_total_posts = 0
 
@@ -111,7 +78,7 @@ def show_hashtags():
         .head(20)
         .reset_index()
     )
-    top20_views['video_views_dis'] = top20_views['video_views'].apply(format_number)
+    top20_views['video_views_dis'] = format_numbers(top20_views['video_views'])
 
     st.data_editor(
         top20_views[["hashtag_name", "industry_value", "video_views", "video_views_dis"]],
@@ -141,7 +108,7 @@ def show_hashtags():
         .head(20)
         .reset_index()
     )
-    top20_posts['publish_count_dis'] = top20_posts['publish_count'].apply(format_number)
+    top20_posts['publish_count_dis'] = format_numbers(top20_posts['publish_count'])
 
     st.data_editor(
         top20_posts[["hashtag_name", "industry_value", "publish_count", "publish_count_dis"]],
@@ -157,15 +124,21 @@ def show_hashtags():
 
     # === Full Dataset Display ===
     st.subheader("All Data from DB")
-    industries_all = [i for i in df["industry_value"].dropna().unique() if i != ""]
+    industries_all = [i for i in distinct_values("hashtags", selected_date, "industry_value") if i != ""]
     selected_industry_all = st.selectbox("Select Industry (All Data)", ["All"] + industries_all, key="hashtags_all_industry")
 
-    df_all = df.copy()
-    if selected_industry_all != "All":
-        df_all = df_all[df_all["industry_value"] == selected_industry_all]
-
-    df_all.insert(0, "No.", range(1, len(df_all) + 1))
+    # Filtered, sorted and paged in SQLite
+    df_all = paged_rows(
+        "hashtags", selected_date,
+        columns=["hashtag_id", "hashtag_name", "country", "rank", "video_views", "publish_count",
+                 "industry_value", "region", "crawl_date", "crawl_time"],
+        filters={"industry_value": selected_industry_all},
+        sort_columns={"Video Views": "video_views", "Publish Count": "publish_count", "Rank": "rank"},
+        key="hashtags_all"
+    )
     df_all["hashtag_id"] = df_all["hashtag_id"].astype(str)
+    df_all["video_views_dis"] = format_numbers(df_all["video_views"])
+    df_all["publish_count_dis"] = format_numbers(df_all["publish_count"])
 
     st.data_editor(
         df_all,
@@ -1,105 +1,69 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sqlite3
 import datetime
 
-def show_posts():
-    # Helper function to format numbers (K, M)
-    def format_number(n):
-        try:
-            if pd.isna(n):
-                return ""
-            if n >= 1_000_000:
-                return f"{n/1_000_000:.1f}M"
-            elif n >= 1_000:
-                return f"{n/1_000:.1f}K"
-            else:
-                return str(int(n))
-        except:
-            return str(n)
+from number_format import format_number, format_numbers
+from dashboard_data import (
+    date_range, load_day, distinct_values, paged_rows, posts_genres, posts_creator_plays, select_date,
+)
 
+def show_posts():
     # App title
     st.markdown("### <u>Posts Dashboard</u>", unsafe_allow_html=True)
 
-    # === Connect to SQLite DB and get available date range ===
-    db_path = "database/tiktokdb.db"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT MIN(crawl_date), MAX(crawl_date) FROM posts")
-    min_date, max_date = cursor.fetchone()
-    conn.close()
+    # === Get available date range (cached) ===
+    min_date, max_date = date_range("posts")
 
     if not min_date or not max_date:
         st.warning("No data available in posts table.")
         return
 
     # === Date selection based on DB values ===
-    selected_date = st.date_input(
-        "Select Date",
-        min_value=pd.to_datetime(min_date).date(),
-        max_value=pd.to_datetime(max_date).date(),
-        value=pd.to_datetime(max_date).date(),
-        key="posts_date"
-    )
-
-    # === Query posts table for selected date and previous day ===
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql(f"SELECT * FROM posts WHERE crawl_date = '{selected_date}'", conn)
-    prev_date = pd.to_datetime(selected_date) - pd.Timedelta(days=1)
-    df_prev = pd.read_sql(f"SELECT * FROM posts WHERE crawl_date = '{prev_date.date()}'", conn)
-    conn.close()
-
-    df = df.drop_duplicates(subset=["item_id", "user_id"], keep="first")
-    df_prev = df_prev.drop_duplicates(subset=["item_id", "user_id"], keep="first")  
-
-    if df.empty:
+    selected_date = select_date(pd.to_datetime(min_date).date(), pd.to_datetime(max_date).date(), key="posts_date")
+
+    # === Query daily rollups for selected date and previous day (cached) ===
+    prev_date = (pd.to_datetime(selected_date) - pd.Timedelta(days=1)).date()
+    genre_stats = posts_genres(selected_date)
+    genre_stats_prev = posts_genres(prev_date)
+    top_creator_name, top_creator_plays = posts_creator_plays(selected_date)
+    prev_top_creator_plays = posts_creator_plays(prev_date, top_creator_name)
+    # Raw rows are only needed for the filtered video tables below
+    df = load_day("posts", selected_date)
+
+    if df.empty or genre_stats.empty:
         st.warning("No data found for selected date.")
         return
 
     # Format numbers for display
-    df['play_count_dis'] = df['play_count'].apply(format_number)
-    df['like_count_dis'] = df['like_count'].apply(format_number)
+    df['play_count_dis'] = format_numbers(df['play_count'])
+    df['like_count_dis'] = format_numbers(df['like_count'])
 
     # === KPI Overview with delta compared to previous day ===
     st.subheader("Overall Metrics")
 
     # Current metrics
-    total_plays = df['play_count'].sum()
-    total_likes = df['like_count'].sum()
-    total_videos = len(df)
-    avg_engagement = (df['like_count'] / df['play_count']).mean()
+    total_plays = genre_stats['play_sum'].sum()
+    total_likes = genre_stats['like_sum'].sum()
+    total_videos = genre_stats['video_count'].sum()
+    avg_engagement = genre_stats['engagement_sum'].sum() / genre_stats['engagement_count'].sum()
 
     # Previous day metrics
-    if not df_prev.empty:
-        prev_total_plays = df_prev['play_count'].sum()
-        prev_total_likes = df_prev['like_count'].sum()
-        prev_total_videos = len(df_prev)
-        prev_avg_engagement = (df_prev['like_count'] / df_prev['play_count']).mean()
+    if not genre_stats_prev.empty:
+        prev_total_plays = genre_stats_prev['play_sum'].sum()
+        prev_total_likes = genre_stats_prev['like_sum'].sum()
+        prev_total_videos = genre_stats_prev['video_count'].sum()
+        prev_avg_engagement = genre_stats_prev['engagement_sum'].sum() / genre_stats_prev['engagement_count'].sum()
     else:
         prev_total_plays = prev_total_likes = prev_total_videos = prev_avg_engagement = 0
 
-    # === Top Creator ===
-    top_creator_row = df.groupby("nickname")["play_count"].sum().sort_values(ascending=False)
-    top_creator_name = top_creator_row.index[0]
-    top_creator_plays = top_creator_row.iloc[0]
-
-    # Previous day Top Creator plays
-    if not df_prev.empty and top_creator_name in df_prev["nickname"].values:
-        prev_top_creator_plays = df_prev.groupby("nickname")["play_count"].sum().get(top_creator_name, 0)
-    else:
-        prev_top_creator_plays = 0
-
     # === Top Genre ===
-    top_genre_row = df.groupby("genre")["play_count"].sum().sort_values(ascending=False)
-    top_genre_name = top_genre_row.index[0]
-    top_genre_plays = top_genre_row.iloc[0]
+    top_genre_row = genre_stats.sort_values("play_sum", ascending=False).iloc[0]
+    top_genre_name = top_genre_row["genre"]
+    top_genre_plays = top_genre_row["play_sum"]
 
     # Previous day Top Genre plays
-    if not df_prev.empty and top_genre_name in df_prev["genre"].values:
-        prev_top_genre_plays = df_prev.groupby("genre")["play_count"].sum().get(top_genre_name, 0)
-    else:
-        prev_top_genre_plays = 0
+    prev_top_genre_plays = genre_stats_prev.set_index("genre")["play_sum"].get(top_genre_name, 0)
 
     # Display KPIs
     # First row: Top Creator & Top Genre
@@ -122,9 +86,9 @@ def show_posts():
         return
 
     # === Genre average statistics ===
-    genre_avg = df.groupby('genre')[['play_count', 'like_count']].mean().round(0).reset_index()
-    genre_avg['play_count_dis'] = genre_avg['play_count'].apply(format_number)
-    genre_avg['like_count_dis'] = genre_avg['like_count'].apply(format_number)
+    genre_avg = genre_stats[['genre', 'play_count', 'like_count']].copy()
+    genre_avg['play_count_dis'] = format_numbers(genre_avg['play_count'])
+    genre_avg['like_count_dis'] = format_numbers(genre_avg['like_count'])
 
     st.subheader("Average Metrics by Genre")
     st.data_editor(
@@ -167,8 +131,7 @@ def show_posts():
 
     # Engagement Rate
     st.subheader("Engagement Rate by Genre")
-    df["engagement_rate"] = df["like_count"] / df["play_count"]
-    genre_engagement = df.groupby("genre")["engagement_rate"].mean().sort_values(ascending=False)
+    genre_engagement = genre_stats.set_index("genre")["engagement_rate"].sort_values(ascending=False)
     fig_engagement = px.bar(
         genre_engagement,
         x=genre_engagement.index,
@@ -200,10 +163,10 @@ def show_posts():
     creator_stats = df_filtered.groupby("nickname")[["play_count","like_count"]].sum().reset_index()
     top_videos = top_videos.merge(creator_stats, on="nickname", suffixes=("", "_creator"))
 
-    top_videos["play_count_dis"] = top_videos["play_count"].apply(format_number)
-    top_videos["like_count_dis"] = top_videos["like_count"].apply(format_number)
-    top_videos["play_count_creator_dis"] = top_videos["play_count_creator"].apply(format_number)
-    top_videos["like_count_creator_dis"] = top_videos["like_count_creator"].apply(format_number)
+    top_videos["play_count_dis"] = format_numbers(top_videos["play_count"])
+    top_videos["like_count_dis"] = format_numbers(top_videos["like_count"])
+    top_videos["play_count_creator_dis"] = format_numbers(top_videos["play_count_creator"])
+    top_videos["like_count_creator_dis"] = format_numbers(top_videos["like_count_creator"])
 
     st.subheader("Top 20 Videos & Creators Combined Ranking")
     st.data_editor(
@@ -242,24 +205,23 @@ def show_posts():
     )
     st.plotly_chart(fig_scatter, use_container_width=True)
 
-    # All Data Table
+    # All Data Table (filtered, sorted and paged in SQLite)
     st.subheader("All Data from DB")
-    df_display = df.copy()
-    df_display.insert(0, "No.", range(1, len(df_display) + 1))
-    df_display["user_id_str"] = df_display["user_id"].astype(str)
-    df_display["item_id_str"] = df_display["item_id"].astype(str)
-
     col1, col2 = st.columns(2)
-    creators = df_display["nickname"].dropna().unique().tolist()
+    creators = distinct_values("posts", selected_date, "nickname")
     selected_creator = col1.selectbox("Filter by Creator", ["All"] + creators)
-    genres = df_display["genre"].dropna().unique().tolist()
+    genres = distinct_values("posts", selected_date, "genre")
     selected_genre = col2.selectbox("Filter by Genre", ["All"] + genres)
 
-    df_filtered = df_display.copy()
-    if selected_creator != "All":
-        df_filtered = df_filtered[df_filtered["nickname"] == selected_creator]
-    if selected_genre != "All":
-        df_filtered = df_filtered[df_filtered["genre"] == selected_genre]
+    df_filtered = paged_rows(
+        "posts", selected_date,
+        columns=["url","nickname","user_id","item_id","item_name","genre","like_count","play_count"],
+        filters={"nickname": selected_creator, "genre": selected_genre},
+        sort_columns={"Plays": "play_count", "Likes": "like_count", "Creator": "nickname", "Genre": "genre"},
+        key="posts_all"
+    )
+    df_filtered["user_id_str"] = df_filtered["user_id"].astype(str)
+    df_filtered["item_id_str"] = df_filtered["item_id"].astype(str)
 
     columns_to_show = ["No.","url","nickname","user_id_str","item_id_str","item_name","genre","like_count","play_count"]
     st.data_editor(
@@ -0,0 +1,115 @@
+import streamlit as st
+import plotly.express as px
+import datetime
+
+from number_format import format_number
+from dashboard_data import date_range, select_date, trend, trend_choices
+
+# Default history shown when a video / hashtag is picked
+DEFAULT_TREND_DAYS = 30
+
+TREND_TABLES = {"Video": "posts", "Hashtag": "hashtags"}
+
+
+def show_trends():
+    # App title
+    st.markdown("### <u>Trends Dashboard</u>", unsafe_allow_html=True)
+
+    kind = st.radio("Trend of", list(TREND_TABLES), horizontal=True, key="trends_kind")
+    table = TREND_TABLES[kind]
+
+    # Get min and max date from database (cached)
+    min_date, max_date = date_range(table)
+
+    if min_date is None:
+        st.warning("No data found in database. Please run crawler first.")
+        return
+
+    min_date = datetime.datetime.strptime(min_date, "%Y-%m-%d").date()
+    max_date = datetime.datetime.strptime(max_date, "%Y-%m-%d").date()
+
+    # === Pick a video / hashtag from the top of one day ===
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_date = select_date(min_date, max_date, key="trends_date")
+    choices = trend_choices(table, selected_date)
+
+    if choices.empty:
+        st.warning("No data found for selected date.")
+        return
+
+    if table == "posts":
+        labels = dict(zip(choices["item_id"].astype(str),
+                          choices["nickname"].fillna("") + " - " + choices["item_name"].fillna("").str.slice(0, 60)))
+    else:
+        labels = dict(zip(choices["hashtag_id"].astype(str), "#" + choices["hashtag_name"].fillna("")))
+
+    entity_id = col2.selectbox(kind, list(labels), format_func=labels.get, key=f"trends_{table}_id")
+
+    # === Date range ===
+    default_start = max(min_date, max_date - datetime.timedelta(days=DEFAULT_TREND_DAYS - 1))
+    period = st.date_input(
+        "Date Range",
+        min_value=min_date,
+        max_value=max_date,
+        value=(default_start, max_date),
+        key="trends_range"
+    )
+    # The picker returns a single date while the range is half chosen
+    if len(period) != 2:
+        st.info("Pick an end date.")
+        return
+    start, end = period
+
+    df, bucket_days = trend(table, entity_id, start, end)
+
+    if df.empty:
+        st.warning(f"No history for this {kind.lower()} between {start} and {end}.")
+        return
+
+    if bucket_days > 1:
+        st.caption(f"{len(df)} points, one per {bucket_days} days (highest value in each period).")
+
+    # === Charts ===
+    if table == "posts":
+        latest = df.iloc[-1]
+        col1, col2 = st.columns(2)
+        col1.metric("Play Count", format_number(latest["play_count"]),
+                    delta=format_number(latest["play_count"] - df["play_count"].iloc[0]))
+        col2.metric("Like Count", format_number(latest["like_count"]),
+                    delta=format_number(latest["like_count"] - df["like_count"].iloc[0]))
+
+        st.subheader("Plays and Likes")
+        fig = px.line(
+            df,
+            x="period",
+            y=["play_count", "like_count"],
+            markers=True,
+            labels={"period": "Date", "value": "Count", "variable": "Metric"}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        latest = df.iloc[-1]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Video Views", format_number(latest["video_views"]),
+                    delta=format_number(latest["video_views"] - df["video_views"].iloc[0]))
+        col2.metric("Posts", format_number(latest["publish_count"]),
+                    delta=format_number(latest["publish_count"] - df["publish_count"].iloc[0]))
+        col3.metric("Best Rank", int(latest["best_rank"]),
+                    delta=int(df["best_rank"].iloc[0] - latest["best_rank"]))
+
+        st.subheader("Views")
+        fig_views = px.line(df, x="period", y="video_views", markers=True,
+                            labels={"period": "Date", "video_views": "Video Views"})
+        st.plotly_chart(fig_views, use_container_width=True)
+
+        st.subheader("Posts")
+        fig_posts = px.line(df, x="period", y="publish_count", markers=True,
+                            labels={"period": "Date", "publish_count": "Posts"})
+        st.plotly_chart(fig_posts, use_container_width=True)
+
+        st.subheader("Rank")
+        fig_rank = px.line(df, x="period", y="best_rank", markers=True,
+                           labels={"period": "Date", "best_rank": "Best Rank"})
+        fig_rank.update_yaxes(autorange="reversed")
+        st.plotly_chart(fig_rank, use_container_width=True)
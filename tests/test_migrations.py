@@ -0,0 +1,202 @@
+import csv
+import os
+import sqlite3
+from collections import Counter
+
+import pytest
+
+from create_tiktok_db import (
+    CREATE_CREATORS, CREATE_CREATORS_LATEST, CREATE_HASHTAGS, CREATE_POSTS, ROLLUP_TABLES, SCHEMA_VERSION, init_db,
+)
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "csv_file")
+# Two consecutive days (videos seen again) and one from the next month
+FOLDERS = ["24092025", "25092025", "29102025"]
+CSV_FILES = {
+    "posts": "trending_tiktok_posts.csv",
+    "hashtags": "trending_tiktok_hashtags.csv",
+    "creators": "trending_tiktok_creators.csv",
+}
+
+# Creator tables and view as schema v8 created them: TEXT ids and
+# crawl_date / crawl_time columns (the typed layout came with v9)
+LEGACY_V8_CREATORS = """
+CREATE TABLE creator_profiles (
+    user_id TEXT PRIMARY KEY,
+    nickname TEXT,
+    uniqueId TEXT,
+    bio TEXT,
+    profile_url TEXT,
+    crawl_date TEXT,
+    crawl_time TEXT
+);
+CREATE TABLE creator_snapshots (
+    user_id TEXT,
+    region TEXT NOT NULL DEFAULT 'MY',
+    video_type TEXT,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    follower_count INTEGER,
+    creator_rank INTEGER,
+    PRIMARY KEY (user_id, region, video_type, crawl_date, crawl_time)
+);
+CREATE TABLE creator_videos (
+    user_id TEXT,
+    video_item_id TEXT,
+    region TEXT NOT NULL DEFAULT 'MY',
+    video_type TEXT,
+    video_name TEXT,
+    video_url TEXT,
+    video_play_count INTEGER,
+    video_like_count INTEGER,
+    video_rank INTEGER,
+    crawl_date TEXT,
+    crawl_time TEXT,
+    PRIMARY KEY (user_id, video_item_id, region)
+);
+INSERT INTO creator_profiles (user_id, nickname, uniqueId, bio, profile_url, crawl_date, crawl_time)
+SELECT user_id, nickname, uniqueId, bio, profile_url, crawl_date, crawl_time FROM (
+    SELECT *, ROW_NUMBER() OVER (
+        PARTITION BY user_id ORDER BY crawl_date DESC, crawl_time DESC, rowid DESC) AS newest
+    FROM creators)
+WHERE newest = 1;
+INSERT OR IGNORE INTO creator_snapshots
+    (user_id, region, video_type, crawl_date, crawl_time, follower_count, creator_rank)
+SELECT user_id, region, video_type, crawl_date, crawl_time, follower_count, creator_rank
+FROM creators ORDER BY rowid;
+INSERT INTO creator_videos (user_id, video_item_id, region, video_type, video_name, video_url,
+                            video_play_count, video_like_count, video_rank, crawl_date, crawl_time)
+SELECT user_id, video_item_id, region, video_type, video_name, video_url,
+       video_play_count, video_like_count, video_rank, crawl_date, crawl_time
+FROM creators ORDER BY rowid;
+DROP TABLE creators;
+CREATE VIEW creators AS
+SELECT creator_profiles.nickname, creator_profiles.uniqueId, creator_videos.user_id,
+       creator_snapshots.follower_count, creator_profiles.bio, creator_snapshots.creator_rank,
+       creator_videos.video_type, creator_videos.video_item_id, creator_videos.video_name,
+       creator_videos.video_url, creator_profiles.profile_url, creator_videos.video_play_count,
+       creator_videos.video_like_count, creator_videos.video_rank, creator_videos.region,
+       creator_videos.crawl_date, creator_videos.crawl_time
+FROM creator_videos
+JOIN creator_snapshots USING (user_id, region, video_type, crawl_date, crawl_time)
+JOIN creator_profiles USING (user_id);
+"""
+
+
+def load_flat_tables(conn):
+    """
+    The flat posts / hashtags / creators tables loaded with a few archive folders
+    """
+    for create_sql in (CREATE_POSTS, CREATE_HASHTAGS, CREATE_CREATORS, *ROLLUP_TABLES.values()):
+        conn.execute(create_sql)
+    for folder in FOLDERS:
+        for table, file_name in CSV_FILES.items():
+            with open(os.path.join(CSV_DIR, folder, file_name), newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                columns = next(reader)
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})", reader)
+    # A late crawl on the first day that renamed some posts / hashtags, which
+    # are back to their old names the next day: v10 must keep three versions
+    conn.execute("""
+        INSERT INTO posts (url, nickname, user_id, item_id, item_name, genre, like_count, play_count,
+                           region, crawl_date, crawl_time)
+        SELECT url, nickname || ' (renamed)', user_id, item_id, item_name, 'Other', like_count + 1,
+               play_count + 1, region, crawl_date, '23:59:00'
+        FROM posts WHERE crawl_date = '2025-09-24' ORDER BY rowid LIMIT 100""")
+    conn.execute("""
+        INSERT INTO hashtags (hashtag_id, hashtag_name, country, rank, video_views, publish_count,
+                              industry_value, region, crawl_date, crawl_time)
+        SELECT hashtag_id, hashtag_name || '_renamed', country, rank, video_views, publish_count,
+               industry_value, region, crawl_date, '23:59:00'
+        FROM hashtags WHERE crawl_date = '2025-09-24' ORDER BY rowid LIMIT 20""")
+
+
+def build_v8_database(db_path):
+    """
+    A v8 database: flat posts / hashtags tables and the normalized creator
+    tables behind a creators view
+    """
+    conn = sqlite3.connect(db_path)
+    load_flat_tables(conn)
+    conn.executescript(LEGACY_V8_CREATORS)
+    conn.execute("PRAGMA user_version = 8")
+    conn.commit()
+    conn.close()
+
+
+def build_v7_database(db_path):
+    """
+    A v7 database: every table flat. Some creators show up in a late crawl on
+    the first day with a new video and another nickname and bio, which are
+    back to the old ones the next day.
+    """
+    conn = sqlite3.connect(db_path)
+    load_flat_tables(conn)
+    conn.execute(CREATE_CREATORS_LATEST)
+    conn.execute("""
+        INSERT INTO creators (nickname, uniqueId, user_id, follower_count, bio, creator_rank, video_type,
+                              video_item_id, video_name, video_url, profile_url, video_play_count,
+                              video_like_count, video_rank, region, crawl_date, crawl_time)
+        SELECT nickname || ' (renamed)', uniqueId, user_id, follower_count + 1, 'new bio', creator_rank,
+               video_type, '1' || substr(video_item_id, 2), video_name, video_url, profile_url, video_play_count,
+               video_like_count, video_rank, region, crawl_date, '23:59:00'
+        FROM creators WHERE crawl_date = '2025-09-24' ORDER BY rowid LIMIT 50""")
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+    conn.close()
+
+
+def view_rows(db_path, table):
+    """
+    Every row of a view as a multiset; values compared as text because v9
+    made the ids INTEGER and hashtags.industry_value TEXT
+    """
+    conn = sqlite3.connect(db_path)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    rows = conn.execute(f"SELECT {', '.join(sorted(columns))} FROM {table}").fetchall()
+    conn.close()
+    return Counter(tuple(None if value is None else str(value) for value in row) for row in rows)
+
+
+@pytest.fixture(scope="module")
+def migrated(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("v8") / "tiktok.db")
+    build_v8_database(db_path)
+    before = {table: view_rows(db_path, table) for table in CSV_FILES}
+    init_db(db_path)
+    return db_path, before
+
+
+def test_migrates_to_latest_version(migrated):
+    db_path, _ = migrated
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+
+
+@pytest.mark.parametrize("table", list(CSV_FILES))
+def test_views_keep_their_rows(migrated, table):
+    """
+    posts / hashtags / creators return the same rows after v9 to v11
+    """
+    db_path, before = migrated
+    assert before[table]
+    assert view_rows(db_path, table) == before[table]
+
+
+def test_flat_creators_keep_each_rows_profile(tmp_path):
+    """
+    From v7, creators rows keep the profile they were crawled with (v8 keeps
+    every profile change as a version)
+    """
+    db_path = str(tmp_path / "tiktok.db")
+    build_v7_database(db_path)
+    before = view_rows(db_path, "creators")
+    init_db(db_path)
+    assert view_rows(db_path, "creators") == before
+    conn = sqlite3.connect(db_path)
+    renamed = conn.execute("SELECT COUNT(*) FROM creators WHERE nickname LIKE '% (renamed)'").fetchone()[0]
+    conn.close()
+    assert renamed == 50
@@ -0,0 +1,52 @@
+import pytest
+
+from script import probe_page_size
+
+
+def ranking(items, cap=None):
+    """
+    fetch(page_num, page_size) over a ranking of `items` videos; `cap`
+    silently limits the page size like an endpoint ignoring PageSize
+    """
+    calls = []
+
+    def fetch(page_num, page_size):
+        calls.append((page_num, page_size))
+        size = min(page_size, cap or page_size)
+        start = page_num * size
+        return [{"item_id": i} for i in range(start, min(start + size, items))]
+
+    return fetch, calls
+
+
+def test_full_page_accepts_the_largest_size():
+    fetch, calls = ranking(500)
+    size, first_page = probe_page_size(fetch, "videos")
+    assert size == 50
+    assert len(first_page) == 50
+    assert calls == [(0, 50)]
+
+
+def test_capped_size_is_rejected():
+    fetch, _ = ranking(500, cap=30)
+    size, first_page = probe_page_size(fetch, "videos")
+    assert size == 30
+    assert len(first_page) == 30
+
+
+@pytest.mark.parametrize("items", [7, 35])
+def test_short_last_page_accepts_the_size(items):
+    """
+    A ranking smaller than the probed size keeps that size instead of
+    falling back to the default
+    """
+    fetch, calls = ranking(items)
+    size, first_page = probe_page_size(fetch, "videos")
+    assert size == 50
+    assert len(first_page) == items
+    assert calls == [(0, 50), (1, 50)]
+
+
+def test_failed_probe_keeps_the_default():
+    size, first_page = probe_page_size(lambda page_num, page_size: None, "videos")
+    assert (size, first_page) == (10, None)
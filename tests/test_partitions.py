@@ -0,0 +1,95 @@
+import os
+import sqlite3
+
+import pytest
+
+from create_tiktok_db import init_db
+from partitions import (
+    PartitionRouter, PartitionedReader, freeze_partition, partition_dir, partition_path, thaw_partition,
+)
+from script import ENDPOINT_TABLES
+
+TABLE, COLUMNS = ENDPOINT_TABLES["videos"]
+
+
+def post(n, crawl_date):
+    return {"url": f"https://tiktok.com/@username/video/{n}", "nickname": "creator", "user_id": 7000,
+            "item_id": 9000 + n, "item_name": f"video {n}", "genre": "Entertainment", "like_count": n,
+            "play_count": 10 * n, "region": "MY", "crawl_date": crawl_date, "crawl_time": "08:00:00"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "tiktok.db")
+    init_db(path)
+    os.makedirs(partition_dir(path))
+    return path
+
+
+def save(db_path, rows):
+    router = PartitionRouter(db_path)
+    try:
+        for writer, month_rows in router.split(rows, lambda row: row["crawl_date"]).items():
+            with writer.transaction():
+                writer.insert_rows(TABLE, COLUMNS, month_rows)
+    finally:
+        router.close()
+
+
+def crawl_dates(path):
+    conn = sqlite3.connect(path)
+    dates = [row[0] for row in conn.execute(f"SELECT DISTINCT crawl_date FROM {TABLE} ORDER BY 1")]
+    conn.close()
+    return dates
+
+
+def test_rows_go_to_their_month_partition(db_path):
+    rows = [post(1, "2025-10-01"), post(2, "2025-09-30"), post(3, "2025-09-01"), post(4, "2025-10-31")]
+    router = PartitionRouter(db_path)
+    try:
+        routed = router.split(rows, lambda row: row["crawl_date"])
+        assert [writer.db_path for writer in routed] == [partition_path(db_path, "2025-09"),
+                                                         partition_path(db_path, "2025-10")]
+        assert [[row["item_id"] for row in month_rows] for month_rows in routed.values()] == [[9002, 9003],
+                                                                                              [9001, 9004]]
+        # One writer per month, reused for every date in it
+        assert router.writer("2025-09-15") is router.writer("2025-09")
+    finally:
+        router.close()
+
+    save(db_path, rows)
+    assert crawl_dates(partition_path(db_path, "2025-09")) == ["2025-09-01", "2025-09-30"]
+    assert crawl_dates(partition_path(db_path, "2025-10")) == ["2025-10-01", "2025-10-31"]
+    assert crawl_dates(db_path) == []
+
+
+def test_unpartitioned_database_has_a_single_writer(tmp_path):
+    path = str(tmp_path / "tiktok.db")
+    init_db(path)
+    router = PartitionRouter(path)
+    try:
+        routed = router.split([post(1, "2025-09-30"), post(2, "2025-10-01")], lambda row: row["crawl_date"])
+        assert [writer.db_path for writer in routed] == [path]
+    finally:
+        router.close()
+
+
+def test_frozen_partition_refuses_writes_until_thawed(db_path):
+    save(db_path, [post(1, "2025-09-30")])
+    september = partition_path(db_path, "2025-09")
+    freeze_partition(september)
+
+    with pytest.raises(sqlite3.OperationalError, match="frozen"):
+        save(db_path, [post(2, "2025-09-30")])
+    # Other months stay writable and the frozen one is still readable
+    save(db_path, [post(3, "2025-10-01")])
+    reader = PartitionedReader(partition_dir(db_path))
+    count = reader.read(lambda conn: conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0],
+                        "2025-09-01", "2025-10-31")
+    assert count == 2
+
+    thaw_partition(september)
+    save(db_path, [post(2, "2025-09-30")])
+    conn = sqlite3.connect(september)
+    assert conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,66 @@
+import pytest
+
+import http_client
+import rate_limiter
+from rate_limiter import RATE_DECREASE, RATE_INCREASE, TokenBucket
+
+
+def test_throttle_halves_the_rate_and_drops_the_burst():
+    bucket = TokenBucket(rate=4.0, min_rate=0.25, max_rate=10.0)
+    bucket.on_throttle()
+    assert RATE_DECREASE == 0.5
+    assert bucket.rate == 2.0
+    assert bucket.tokens <= 0
+    assert bucket.throttles == 1
+
+
+def test_rate_recovers_additively_up_to_the_ceiling():
+    bucket = TokenBucket(rate=4.0, min_rate=0.25, max_rate=5.0)
+    bucket.on_throttle()
+    for n in range(1, 6):
+        bucket.on_success()
+        assert bucket.rate == pytest.approx(2.0 + n * RATE_INCREASE)
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 5.0
+
+
+def test_rate_never_drops_below_the_floor():
+    bucket = TokenBucket(rate=1.0, min_rate=0.25, max_rate=5.0)
+    for _ in range(10):
+        bucket.on_throttle()
+    assert bucket.rate == 0.25
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, **kwargs):
+        return FakeResponse(self.statuses.pop(0))
+
+
+def test_http_get_slows_down_on_429_and_retries(monkeypatch):
+    """
+    A 429 halves the host's rate and is retried; the success then adds
+    RATE_INCREASE back
+    """
+    rate_limiter.reset_buckets()
+    session = FakeSession([429, 200])
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    monkeypatch.setattr(http_client, "backoff_delay", lambda attempt, retry_after=None: 0)
+    start = rate_limiter.HOST_RATES["www.tiktok.com"]["rate"]
+
+    response = http_client.http_get("https://www.tiktok.com/creator_studio/")
+
+    bucket = rate_limiter.get_bucket("www.tiktok.com")
+    assert response.status_code == 200
+    assert bucket.rate == pytest.approx(start * RATE_DECREASE + RATE_INCREASE)
+    assert (bucket.requests, bucket.retries, bucket.throttles) == (2, 1, 1)
+    rate_limiter.reset_buckets()
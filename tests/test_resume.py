@@ -0,0 +1,94 @@
+import csv
+import os
+import sqlite3
+
+import pytest
+
+import script
+from checkpoint import load_completed, load_run, start_run
+from create_tiktok_db import init_db
+from partitions import partition_dir, partition_path
+
+CRAWL_DATE, CRAWL_TIME = "2025-09-24", "08:00:00"
+RANKING_SIZES = {"videos": 25, "hashtags": 45}
+
+
+def fake_row(endpoint, n):
+    if endpoint == "videos":
+        return {"url": f"https://tiktok.com/@username/video/{n}", "nickname": f"creator{n % 4}",
+                "user_id": 7000 + n % 4, "item_id": 9000 + n, "item_name": f"video {n}",
+                "genre": "Entertainment", "like_count": n, "play_count": 10 * n, "region": "MY"}
+    return {"hashtag_id": 500 + n, "hashtag_name": f"tag{n}", "country": "Malaysia", "rank": n + 1,
+            "video_views": 100 * n, "publish_count": n, "industry_value": "", "region": "MY"}
+
+
+def fake_fetchers(calls, failing=()):
+    """
+    endpoint_fetchers stand-in: one ranking per endpoint; fetches are
+    recorded in `calls` and the (endpoint, page_num) in `failing` fail
+    """
+    def fetcher(endpoint):
+        def fetch(page_num, page_size):
+            calls.append((endpoint, page_num))
+            if (endpoint, page_num) in failing:
+                return None
+            start = page_num * page_size
+            return [fake_row(endpoint, n) for n in range(start, min(start + page_size, RANKING_SIZES[endpoint]))]
+        return fetch
+
+    return lambda regions: [("videos", "MY", "Entertainment", fetcher("videos")),
+                            ("hashtags", "MY", "All", fetcher("hashtags"))]
+
+
+def crawl(db_path, csv_files, run_id, jobs, append=False):
+    writer = script.CrawlWriter(db_path, csv_files, run_id, CRAWL_DATE, CRAWL_TIME, append=append).start()
+    try:
+        script.crawl_serial(jobs, writer.put)
+    finally:
+        writer.close()
+    return writer
+
+
+@pytest.mark.parametrize("partitioned", [False, True], ids=["single-file", "partitioned"])
+def test_resumed_run_fetches_only_pages_without_checkpoint(tmp_path, monkeypatch, partitioned):
+    db_path = str(tmp_path / "tiktok.db")
+    init_db(db_path)
+    if partitioned:
+        os.makedirs(partition_dir(db_path))
+    csv_files = {"videos": str(tmp_path / "posts.csv"), "hashtags": str(tmp_path / "hashtags.csv")}
+
+    # First run: page 2 of the videos ranking fails
+    calls = []
+    monkeypatch.setattr(script, "endpoint_fetchers", fake_fetchers(calls, failing={("videos", 1)}))
+    jobs = script.build_jobs(3, regions=["MY"], probe=False)
+    page_sizes = {job["endpoint"]: job["page_size"] for job in jobs}
+    start_run(db_path, "run-1", CRAWL_DATE, CRAWL_TIME, ["MY"], page_sizes)
+    writer = crawl(db_path, csv_files, "run-1", jobs)
+    assert writer.failed == 1
+    assert sorted(calls) == [("hashtags", 0), ("hashtags", 1), ("hashtags", 2),
+                             ("videos", 0), ("videos", 1), ("videos", 2)]
+
+    # Resume: every checkpointed page is skipped, only the failed one is fetched
+    run = load_run(db_path)
+    assert run["run_id"] == "run-1"
+    completed = load_completed(db_path, "run-1")
+    assert len(completed) == 5
+    calls.clear()
+    monkeypatch.setattr(script, "endpoint_fetchers", fake_fetchers(calls))
+    jobs = script.build_jobs(3, regions=run["regions"], page_sizes=run["page_sizes"], completed=completed)
+    writer = crawl(db_path, csv_files, "run-1", jobs, append=True)
+    assert writer.failed == 0
+    assert calls == [("videos", 1)]
+    assert len(load_completed(db_path, "run-1")) == 6
+
+    data_path = partition_path(db_path, CRAWL_DATE[:7]) if partitioned else db_path
+    conn = sqlite3.connect(data_path)
+    assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == RANKING_SIZES["videos"]
+    assert conn.execute("SELECT COUNT(*) FROM hashtags").fetchone()[0] == RANKING_SIZES["hashtags"]
+    conn.close()
+    # The CSV files hold every row exactly once across both runs
+    for endpoint, path in csv_files.items():
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == RANKING_SIZES[endpoint]
+        assert len({tuple(row.values()) for row in rows}) == len(rows)
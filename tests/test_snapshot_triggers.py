@@ -0,0 +1,172 @@
+import random
+import sqlite3
+
+import pytest
+
+from create_tiktok_db import (
+    CRAWL_DATE_TIME, CRAWL_TS, CREATE_CREATORS, CREATE_HASHTAG_SNAPSHOTS_V9, CREATE_POST_SNAPSHOTS_V9,
+    ENTITY_IDS, SNAPSHOT_COLUMNS, init_db,
+)
+
+# Full-row tables with the same key as the delta storage: what the views must return
+REFERENCE_TABLES = {
+    "posts": CREATE_POST_SNAPSHOTS_V9.replace("post_snapshots", "post_reference"),
+    "hashtags": CREATE_HASHTAG_SNAPSHOTS_V9.replace("hashtag_snapshots", "hashtag_reference"),
+}
+REFERENCE_NAMES = {"posts": "post_reference", "hashtags": "hashtag_reference"}
+
+CRAWLS = [(f"2025-09-{day:02d}", time) for day in range(24, 29) for time in ("08:00:00", "18:30:00")]
+
+
+def post_row(rng, item_id, region, crawl):
+    return {
+        "url": f"https://tiktok.com/@username/video/{item_id}",
+        "nickname": rng.choice(["alpha", "beta", None]),
+        "user_id": 7000 + item_id % 3,
+        "item_id": item_id,
+        "item_name": rng.choice(["first caption", "edited caption"]),
+        "genre": rng.choice(["Entertainment", "Sports"]),
+        "like_count": rng.randrange(10_000),
+        "play_count": rng.randrange(1_000_000),
+        "region": region,
+        "crawl_date": crawl[0],
+        "crawl_time": crawl[1],
+    }
+
+
+def hashtag_row(rng, hashtag_id, region, crawl):
+    return {
+        "hashtag_id": hashtag_id,
+        "hashtag_name": f"tag{hashtag_id}",
+        "country": rng.choice(["Malaysia", "United States"]),
+        "rank": rng.randrange(1, 101),
+        "video_views": rng.randrange(1_000_000),
+        "publish_count": rng.randrange(10_000),
+        "industry_value": rng.choice(["", "Games", "Beauty", None]),
+        "region": region,
+        "crawl_date": crawl[0],
+        "crawl_time": crawl[1],
+    }
+
+
+def generate_rows(rng, table, make_row):
+    """
+    A few entities seen on most crawls, their descriptive columns changing at
+    random, plus repeats of some crawls (identical or with other values)
+    """
+    rows = []
+    for entity in range(1, 6):
+        for region in ("MY", "US"):
+            for crawl in CRAWLS:
+                if rng.random() < 0.8:
+                    rows.append(make_row(rng, entity, region, crawl))
+    repeats = rng.sample(rows, len(rows) // 4)
+    for row in repeats:
+        if rng.random() < 0.5:
+            rows.append(dict(row))
+        else:
+            rows.append(make_row(rng, row[ENTITY_IDS[table]], row["region"], (row["crawl_date"], row["crawl_time"])))
+    return rows
+
+
+def load(conn, table, rows):
+    """
+    INSERT OR IGNORE every row into the view and into the reference table
+    """
+    reference = REFERENCE_NAMES[table]
+    columns = SNAPSHOT_COLUMNS[table]
+    placeholders = ", ".join("?" for _ in columns)
+    for row in rows:
+        values = [row[c] for c in columns] + [row["crawl_date"], row["crawl_time"]]
+        conn.execute(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}, crawl_date, crawl_time) "
+                     f"VALUES ({placeholders}, ?, ?)", values)
+        conn.execute(f"INSERT OR IGNORE INTO {reference} ({', '.join(columns)}, crawl_ts) "
+                     f"VALUES ({placeholders}, {CRAWL_TS.format(date='?', time='?')})", values)
+
+
+def view_and_reference(conn, table):
+    reference = REFERENCE_NAMES[table]
+    columns = ", ".join(SNAPSHOT_COLUMNS[table])
+    view_rows = conn.execute(f"SELECT {columns}, crawl_date, crawl_time FROM {table}").fetchall()
+    reference_rows = conn.execute(
+        f"SELECT {columns}, {CRAWL_DATE_TIME.format(ts='crawl_ts')} FROM {reference}").fetchall()
+    return sorted(view_rows, key=repr), sorted(reference_rows, key=repr)
+
+
+@pytest.mark.parametrize("table, make_row", [("posts", post_row), ("hashtags", hashtag_row)])
+@pytest.mark.parametrize("seed", range(8))
+def test_view_matches_full_rows_in_any_insert_order(tmp_path, table, make_row, seed):
+    """
+    Loading the same rows in any order gives the rows a full-row table keeps
+    """
+    db_path = str(tmp_path / "tiktok.db")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(REFERENCE_TABLES[table])
+
+    rng = random.Random(seed)
+    rows = generate_rows(rng, table, make_row)
+    rng.shuffle(rows)
+    load(conn, table, rows)
+
+    view_rows, reference_rows = view_and_reference(conn, table)
+    assert view_rows == reference_rows
+    conn.close()
+
+
+
+def generate_creator_rows(rng):
+    """
+    Creator video rows over the crawls: the profile changes at random between
+    crawls but is the same on every row of a crawl, as are followers / rank
+    within a vertical
+    """
+    profiles, snapshots, rows = {}, {}, []
+    for crawl in CRAWLS:
+        for user_id in range(1, 5):
+            profiles[user_id, crawl] = (rng.choice([f"user{user_id}", f"renamed{user_id}", None]),
+                                        f"handle{user_id}", rng.choice(["bio", "new bio", ""]),
+                                        f"https://tiktok.com/@handle{user_id}")
+            for region in ("MY", "US"):
+                for video_type in ("Entertainment", "Sports"):
+                    snapshots[user_id, region, video_type, crawl] = (rng.randrange(1_000_000), rng.randrange(1, 51))
+                    for video_item_id in rng.sample(range(user_id * 100, user_id * 100 + 8), 3):
+                        nickname, unique_id, bio, profile_url = profiles[user_id, crawl]
+                        follower_count, creator_rank = snapshots[user_id, region, video_type, crawl]
+                        rows.append({
+                            "nickname": nickname, "uniqueId": unique_id, "user_id": user_id,
+                            "follower_count": follower_count, "bio": bio, "creator_rank": creator_rank,
+                            "video_type": video_type, "video_item_id": video_item_id,
+                            "video_name": f"video {video_item_id}", "video_url": f"https://tiktok.com/v/{video_item_id}",
+                            "profile_url": profile_url, "video_play_count": rng.randrange(1_000_000),
+                            "video_like_count": rng.randrange(10_000), "video_rank": rng.randrange(1, 51),
+                            "region": region, "crawl_date": crawl[0], "crawl_time": crawl[1],
+                        })
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_creators_view_shows_each_crawls_profile(tmp_path, seed):
+    """
+    Loading creator rows in any order gives the rows the flat creators table
+    kept, each with the profile of its own crawl
+    """
+    db_path = str(tmp_path / "tiktok.db")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(CREATE_CREATORS.replace("creators", "creator_reference"))
+
+    rng = random.Random(seed)
+    rows = generate_creator_rows(rng)
+    rng.shuffle(rows)
+    columns = list(rows[0])
+    for table in ("creators", "creator_reference"):
+        conn.executemany(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' for _ in columns)})", [[row[c] for c in columns] for row in rows])
+
+    view_rows, reference_rows = (
+        sorted((tuple(None if value is None else str(value) for value in row)
+                for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}")), key=repr)
+        for table in ("creators", "creator_reference"))
+    assert view_rows == reference_rows
+    conn.close()